@@ -0,0 +1,59 @@
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+from app.config import settings
+from app.sentencias import registro_sentencias
+from app.perfilado import registro_perfiles
+from app.trabajos import cola_trabajos
+import hmac
+import logging
+
+logger = logging.getLogger(__name__)
+
+async def verificar_admin(x_admin_token: Optional[str] = Header(None)):
+    """Exige el token de administración configurado en ADMIN_TOKEN"""
+    if not settings.admin_token or not x_admin_token or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Acceso denegado. Se requiere token de administración."
+        )
+
+router = APIRouter(prefix="/admin", tags=["Administración"], dependencies=[Depends(verificar_admin)])
+
+@router.get("/sentencias")
+async def get_sentencias(
+    limit: int = Query(20, ge=1, le=1000),
+    orden: str = Query("total", pattern="^(total|p99|ejecuciones)$", description="Criterio del top-N")
+):
+    """Huellas SQL con mayor tiempo total (o p99 / ejecuciones) acumulado desde el arranque"""
+    return registro_sentencias.resumen(limit, orden)
+
+@router.get("/sentencias/lentas")
+async def get_sentencias_lentas(limit: int = Query(50, ge=1, le=200)):
+    """Sentencias más recientes por encima de SQL_LENTO_MS, con su EXPLAIN QUERY PLAN"""
+    return registro_sentencias.lentas(limit)
+
+@router.delete("/sentencias", status_code=status.HTTP_204_NO_CONTENT)
+async def reiniciar_sentencias():
+    """Reinicia los tiempos acumulados y el log de sentencias lentas"""
+    registro_sentencias.reiniciar()
+
+@router.get("/perfiles")
+async def get_perfiles():
+    """Tiempos medios por ruta de las peticiones muestreadas (PERFILADO_MUESTREO)"""
+    return registro_perfiles.resumen()
+
+@router.get("/perfiles/stacks", response_class=PlainTextResponse)
+async def get_perfiles_stacks(ruta: Optional[str] = Query(None, description="Ruta a filtrar, p. ej. 'GET /paquetes-turisticos/'")):
+    """Pilas colapsadas por ruta, listas para flamegraph.pl o speedscope"""
+    return registro_perfiles.stacks(ruta)
+
+@router.delete("/perfiles", status_code=status.HTTP_204_NO_CONTENT)
+async def reiniciar_perfiles():
+    """Reinicia los perfiles acumulados"""
+    registro_perfiles.reiniciar()
+
+@router.get("/trabajos")
+async def get_trabajos():
+    """Trabajos de la cola por tipo y estado, últimos fallidos y si este proceso es el líder"""
+    return cola_trabajos.resumen()
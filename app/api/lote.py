@@ -0,0 +1,127 @@
+"""POST /batch: varias lecturas en una sola petición HTTP.
+
+Las subpeticiones se despachan dentro del proceso directamente al router de
+la aplicación (con sus manejadores de excepciones), sin volver a pasar por
+CORS, compresión ni métricas. El usuario se autentica una sola vez: las
+subpeticiones con el mismo token lo reciben de `usuario_lote` en lugar de
+verificar el JWT y consultarlo de nuevo. Los cuerpos JSON de las
+subrespuestas se insertan tal cual en la respuesta combinada, sin
+decodificarlos.
+"""
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from fastapi.middleware.asyncexitstack import AsyncExitStackMiddleware
+from starlette.middleware.exceptions import ExceptionMiddleware
+from typing import Optional, Tuple
+from urllib.parse import unquote
+from app.config import settings
+from app.models.lote import LoteRequest, LoteResponse, SubPeticion
+from app.models.usuario import UsuarioResponse
+from app.auth.auth_handler import auth_handler, usuario_lote
+from app.respuestas import RespuestaJSON
+import asyncio
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/batch", tags=["Batch"])
+
+# Cabeceras de la petición externa que no se copian a las subpeticiones
+CABECERAS_EXCLUIDAS = {b"content-length", b"content-type", b"accept-encoding", b"transfer-encoding"}
+
+_despachadores = {}
+
+def _despachador(app):
+    """Router de `app` con sus manejadores de excepciones, como en su pila de middlewares"""
+    if app not in _despachadores:
+        manejadores = {
+            clave: manejador for clave, manejador in app.exception_handlers.items()
+            if clave not in (500, Exception)
+        }
+        _despachadores[app] = ExceptionMiddleware(AsyncExitStackMiddleware(app.router), handlers=manejadores)
+    return _despachadores[app]
+
+async def _ejecutar(request: Request, peticion: SubPeticion) -> Tuple[int, bytes, bool]:
+    """Ejecuta una subpetición GET; devuelve (status, cuerpo, es_json)"""
+    ruta, _, query = peticion.ruta.partition("?")
+    if ruta == router.prefix or ruta.startswith(router.prefix + "/"):
+        return status.HTTP_400_BAD_REQUEST, b'{"detail":"No se admiten lotes anidados"}', True
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": "GET",
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": unquote(ruta),
+        "raw_path": ruta.encode("latin-1", "replace"),
+        "query_string": query.encode("latin-1", "replace"),
+        "headers": [(clave, valor) for clave, valor in request.scope["headers"] if clave not in CABECERAS_EXCLUIDAS],
+        "app": request.app,
+    }
+    if "state" in request.scope:
+        scope["state"] = request.scope["state"]
+
+    respuesta = {"status": 500, "cuerpo": [], "tipo": b""}
+
+    async def recibir():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def enviar(mensaje):
+        if mensaje["type"] == "http.response.start":
+            respuesta["status"] = mensaje["status"]
+            for clave, valor in mensaje.get("headers", []):
+                if clave.lower() == b"content-type":
+                    respuesta["tipo"] = valor
+        elif mensaje["type"] == "http.response.body":
+            respuesta["cuerpo"].append(mensaje.get("body", b""))
+
+    try:
+        await _despachador(request.app)(scope, recibir, enviar)
+    except Exception as e:
+        logger.error(f"Error en subpetición de lote {peticion.ruta}: {e}")
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, b'{"detail":"Error interno del servidor"}', True
+    return respuesta["status"], b"".join(respuesta["cuerpo"]), b"json" in respuesta["tipo"]
+
+def _subrespuesta(id_peticion: Optional[str], codigo: int, cuerpo: bytes, es_json: bool) -> bytes:
+    if not cuerpo:
+        contenido = b"null"
+    elif es_json:
+        contenido = cuerpo
+    else:
+        contenido = json.dumps(cuerpo.decode("utf-8", "replace"), ensure_ascii=False).encode()
+    return b'{"id":%s,"status":%d,"body":%s}' % (json.dumps(id_peticion).encode(), codigo, contenido)
+
+@router.post("", response_model=LoteResponse)
+async def ejecutar_lote(
+    lote: LoteRequest,
+    request: Request,
+    current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
+):
+    """Ejecuta varias lecturas (GET) en paralelo con una sola autenticación y devuelve sus respuestas en orden"""
+    if len(lote.peticiones) > settings.batch_max_peticiones:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Un lote admite como máximo {settings.batch_max_peticiones} peticiones"
+        )
+    try:
+        token = request.headers.get("authorization", "").partition(" ")[2].strip()
+        # Las tareas de gather copian el contexto: todas ven al usuario ya autenticado
+        marca = usuario_lote.set((token, current_user))
+        try:
+            resultados = await asyncio.gather(*(_ejecutar(request, peticion) for peticion in lote.peticiones))
+        finally:
+            usuario_lote.reset(marca)
+        partes = [
+            _subrespuesta(peticion.id, *resultado)
+            for peticion, resultado in zip(lote.peticiones, resultados)
+        ]
+        return RespuestaJSON(b'{"respuestas":[' + b",".join(partes) + b"]}")
+    except Exception as e:
+        logger.error(f"Error al ejecutar lote: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
@@ -1,15 +1,43 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
-from typing import List, Optional
-from app.models.paqueteturistico import PaqueteTuristicoResponse, PaqueteTuristicoCreate, PaqueteTuristicoUpdate, PaqueteTuristicoFiltros
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
+from typing import List, Optional, Union
+from app.models.paqueteturistico import PaqueteTuristicoResponse, PaqueteTuristicoCreate, PaqueteTuristicoUpdate, PaqueteTuristicoFiltros, PaqueteTuristicoBusquedaResponse, PaqueteTuristicoFacetas, PaqueteTuristicoTarjeta
 from app.models.usuario import UsuarioResponse
 from app.repositories.instances import paquete_turistico_repository
+from app.repositories.ranking_repository import ORDENAMIENTO_PATTERN
 from app.auth.auth_handler import auth_handler
+from app.respuestas import respuesta_json
+from app.models.imagen import SubidaImagenesResponse, ImagenEnProceso
+from app.proyecciones import DESCRIPCION_FIELDS, parsear_campos, modelo_respuesta
+from app.imagenes import procesador_imagenes, recibir_imagenes, esquema_multipart, es_url, decodificar_base64, procesar_imagen, procesar_archivo, destino_nuevo, url_publica
+from app.config import settings
+from functools import lru_cache
+from pydantic import create_model
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/paquetes-turisticos", tags=["Paquetes Turísticos"])
 
+@lru_cache(maxsize=256)
+def _busqueda_parcial(tipo):
+    """Respuesta de búsqueda con facetas cuyos resultados usan el modelo recortado `tipo`"""
+    return create_model(
+        "PaqueteTuristicoBusquedaParcial",
+        resultados=(List[tipo], ...),
+        facetas=(PaqueteTuristicoFacetas, ...)
+    )
+
+def _programar_imagen(paquete_id: int, funcion, origen: Union[str, bytes], orden: int):
+    """Procesa una imagen del paquete en segundo plano y la registra al terminar"""
+    async def registrar(ruta: str):
+        await paquete_turistico_repository.agregar_imagen(paquete_id, url_publica(ruta), orden)
+
+    procesador_imagenes.programar(
+        f"imagen del paquete {paquete_id}", funcion, origen,
+        destino_nuevo("paquetes", str(paquete_id)), settings.imagen_lado_maximo,
+        al_terminar=registrar
+    )
+
 @router.post("/", response_model=PaqueteTuristicoResponse, status_code=status.HTTP_201_CREATED)
 async def create_paquete_turistico(
     paquete_data: PaqueteTuristicoCreate,
@@ -27,7 +55,25 @@ async def create_paquete_turistico(
         # Asignar el operador actual
         paquete_data.operador_id = current_user.id
         
+        # Base64 inválido se rechaza antes de crear el paquete; el procesado se hace después de responder
+        en_base64 = []
+        for orden, imagen in enumerate(paquete_data.imagenes or ()):
+            if es_url(imagen):
+                continue
+            try:
+                datos = decodificar_base64(imagen)
+            except ValueError as e:
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Imagen {orden + 1}: {e}")
+            if len(datos) > settings.max_file_size:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Las imágenes no pueden superar {settings.max_file_size} bytes"
+                )
+            en_base64.append((orden, datos))
+        
         paquete = await paquete_turistico_repository.create_paquete_turistico(paquete_data)
+        for orden, datos in en_base64:
+            _programar_imagen(paquete.id, procesar_imagen, datos, orden)
         return paquete
     except HTTPException:
         raise
@@ -42,13 +88,16 @@ async def create_paquete_turistico(
 async def get_paquetes_turisticos(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    sort: str = Query("recent", pattern=ORDENAMIENTO_PATTERN),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: Optional[UsuarioResponse] = Depends(auth_handler.get_current_user)
 ):
-    """Obtiene todos los paquetes turísticos activos"""
+    """Obtiene todos los paquetes turísticos activos (sort: popular, rating, price o recent)"""
+    campos = parsear_campos(fields, PaqueteTuristicoResponse)
     try:
         user_id = str(current_user.id) if current_user else None
-        paquetes = await paquete_turistico_repository.get_all_paquetes(skip, limit, user_id)
-        return paquetes
+        paquetes = await paquete_turistico_repository.get_all_paquetes(skip, limit, user_id, sort, campos)
+        return respuesta_json(paquetes, List[modelo_respuesta(PaqueteTuristicoResponse, campos)])
     except Exception as e:
         logger.error(f"Error al obtener paquetes turísticos: {e}")
         raise HTTPException(
@@ -56,15 +105,33 @@ async def get_paquetes_turisticos(
             detail="Error interno del servidor"
         )
 
+@router.get("/cards", response_model=List[PaqueteTuristicoTarjeta])
+async def get_tarjetas_paquetes(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+):
+    """Tarjetas compactas de los paquetes activos más recientes para las rejillas del catálogo"""
+    try:
+        tarjetas = paquete_turistico_repository.get_tarjetas(skip, limit)
+        return respuesta_json(tarjetas, List[PaqueteTuristicoTarjeta])
+    except Exception as e:
+        logger.error(f"Error al obtener tarjetas de paquetes: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.get("/{paquete_id}", response_model=PaqueteTuristicoResponse)
 async def get_paquete_turistico(
     paquete_id: str,
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: Optional[UsuarioResponse] = Depends(auth_handler.get_current_user)
 ):
     """Obtiene un paquete turístico específico por ID"""
+    campos = parsear_campos(fields, PaqueteTuristicoResponse)
     try:
         user_id = str(current_user.id) if current_user else None
-        paquete = await paquete_turistico_repository.get_paquete_turistico_by_id(paquete_id, user_id)
+        paquete = await paquete_turistico_repository.get_paquete_turistico_by_id(paquete_id, user_id, campos)
         
         if not paquete:
             raise HTTPException(
@@ -72,6 +139,8 @@ async def get_paquete_turistico(
                 detail="Paquete turístico no encontrado"
             )
         
+        if campos is not None:
+            return respuesta_json(paquete, modelo_respuesta(PaqueteTuristicoResponse, campos))
         return paquete
     except HTTPException:
         raise
@@ -82,6 +151,26 @@ async def get_paquete_turistico(
             detail="Error interno del servidor"
         )
 
+@router.get("/{paquete_id}/similares", response_model=List[PaqueteTuristicoResponse])
+async def get_paquetes_similares(
+    paquete_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
+    current_user: Optional[UsuarioResponse] = Depends(auth_handler.get_current_user)
+):
+    """Obtiene paquetes turísticos similares a uno dado"""
+    campos = parsear_campos(fields, PaqueteTuristicoResponse)
+    try:
+        user_id = str(current_user.id) if current_user else None
+        paquetes = await paquete_turistico_repository.get_paquetes_similares(paquete_id, limit, user_id, campos)
+        return respuesta_json(paquetes, List[modelo_respuesta(PaqueteTuristicoResponse, campos)])
+    except Exception as e:
+        logger.error(f"Error al obtener paquetes similares: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.put("/{paquete_id}", response_model=PaqueteTuristicoResponse)
 async def update_paquete_turistico(
     paquete_id: str,
@@ -116,6 +205,47 @@ async def update_paquete_turistico(
             detail="Error interno del servidor"
         )
 
+@router.post(
+    "/{paquete_id}/imagenes",
+    response_model=SubidaImagenesResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=esquema_multipart("archivos")
+)
+async def subir_imagenes_paquete(
+    paquete_id: int,
+    request: Request,
+    current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
+):
+    """Sube imágenes del paquete (multipart, campo archivos); se procesan en segundo plano"""
+    # Permisos antes de leer el cuerpo: una subida rechazada no llega a escribirse
+    paquete = await paquete_turistico_repository.get_paquete_by_id(paquete_id, campos=frozenset({"id", "operador_id"}))
+    if not paquete:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Paquete turístico no encontrado"
+        )
+    if str(paquete.operador_id) != str(current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para actualizar este paquete turístico"
+        )
+    recibidas = await recibir_imagenes(request, settings.imagenes_max_por_subida)
+    try:
+        # Posiciones en el orden de subida, no en el que termine cada procesado
+        primero = paquete_turistico_repository.reservar_orden_imagenes(paquete_id, len(recibidas))
+        for orden, recibida in enumerate(recibidas, start=primero):
+            _programar_imagen(paquete_id, procesar_archivo, recibida.ruta, orden)
+        return SubidaImagenesResponse(imagenes=[
+            ImagenEnProceso(archivo=recibida.nombre, tamano=recibida.tamano)
+            for recibida in recibidas
+        ])
+    except Exception as e:
+        logger.error(f"Error al subir imágenes del paquete: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.delete("/{paquete_id}")
 async def delete_paquete_turistico(
     paquete_id: str,
@@ -159,12 +289,14 @@ async def delete_paquete_turistico(
 async def get_my_paquetes_turisticos(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
 ):
     """Obtiene los paquetes turísticos del operador actual"""
+    campos = parsear_campos(fields, PaqueteTuristicoResponse)
     try:
-        paquetes = await paquete_turistico_repository.get_paquetes_by_operador(str(current_user.id), skip, limit)
-        return paquetes
+        paquetes = await paquete_turistico_repository.get_paquetes_by_operador(str(current_user.id), skip, limit, campos)
+        return respuesta_json(paquetes, List[modelo_respuesta(PaqueteTuristicoResponse, campos)])
     except Exception as e:
         logger.error(f"Error al obtener paquetes del operador: {e}")
         raise HTTPException(
@@ -172,18 +304,30 @@ async def get_my_paquetes_turisticos(
             detail="Error interno del servidor"
         )
 
-@router.post("/search", response_model=List[PaqueteTuristicoResponse])
+@router.post("/search", response_model=Union[List[PaqueteTuristicoResponse], PaqueteTuristicoBusquedaResponse])
 async def search_paquetes_turisticos(
     filtros: PaqueteTuristicoFiltros,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    sort: str = Query("recent", pattern=ORDENAMIENTO_PATTERN),
+    facetas: bool = Query(False, description="Incluir conteos por faceta junto a los resultados"),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: Optional[UsuarioResponse] = Depends(auth_handler.get_current_user)
 ):
-    """Busca paquetes turísticos con filtros avanzados"""
+    """Busca paquetes turísticos con filtros avanzados (sort: popular, rating, price o recent)"""
+    campos = parsear_campos(fields, PaqueteTuristicoResponse)
     try:
         user_id = str(current_user.id) if current_user else None
-        paquetes = await paquete_turistico_repository.search_paquetes_turisticos(filtros, skip, limit, user_id)
-        return paquetes
+        paquetes = await paquete_turistico_repository.search_paquetes_turisticos(filtros, skip, limit, user_id, sort, campos)
+        tipo = modelo_respuesta(PaqueteTuristicoResponse, campos)
+        if facetas:
+            modelo_busqueda = PaqueteTuristicoBusquedaResponse if campos is None else _busqueda_parcial(tipo)
+            busqueda = modelo_busqueda(
+                resultados=paquetes,
+                facetas=paquete_turistico_repository.get_facetas(filtros)
+            )
+            return respuesta_json(busqueda, modelo_busqueda)
+        return respuesta_json(paquetes, List[tipo])
     except Exception as e:
         logger.error(f"Error al buscar paquetes turísticos: {e}")
         raise HTTPException(
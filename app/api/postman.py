@@ -0,0 +1,78 @@
+"""GET /postman/download: colección de Postman generada una vez y servida desde memoria.
+
+La colección se genera a partir del esquema OpenAPI la primera vez que se pide
+para cada URL base y versión de la aplicación; se guarda ya serializada con su
+ETag y las variantes gzip / Brotli se comprimen una sola vez, la primera vez
+que un cliente las acepta. Las descargas siguientes no generan, serializan ni
+escriben nada, y con If-None-Match responden 304.
+"""
+from fastapi import APIRouter, HTTPException, status, Request, Response
+from typing import Dict, Tuple
+from app.config import settings
+from app.compresion import comprimir, elegir_codificacion, etag_con_codificacion
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/postman", tags=["Postman"])
+
+# Colecciones distintas que se guardan a la vez (la URL base sale de la cabecera Host)
+MAXIMO_COLECCIONES = 8
+NOMBRE_ARCHIVO = "paquetes_turisticos_api_postman_collection.json"
+
+_colecciones: Dict[Tuple[str, str], dict] = {}
+
+def _coleccion(request: Request) -> dict:
+    """Colección serializada para la URL base de `request`, generándola si hace falta"""
+    clave = (str(request.base_url).rstrip("/"), settings.app_version)
+    if clave not in _colecciones:
+        # El generador solo se carga cuando alguien descarga la colección
+        from app.postman_generator import postman_generator
+        coleccion = postman_generator.generate_collection(request.app.openapi(), clave[0])
+        cuerpo = json.dumps(coleccion, indent=2, ensure_ascii=False).encode("utf-8")
+        if len(_colecciones) >= MAXIMO_COLECCIONES:
+            _colecciones.pop(next(iter(_colecciones)))
+        _colecciones[clave] = {
+            "cuerpo": cuerpo,
+            "etag": f'"{hashlib.sha256(cuerpo).hexdigest()[:32]}"',
+            "variantes": {},
+        }
+    return _colecciones[clave]
+
+def _coincide(if_none_match: str, etag: str) -> bool:
+    """Comparación débil de If-None-Match con `etag`"""
+    etiquetas = [etiqueta.strip().removeprefix("W/") for etiqueta in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+@router.get("/download")
+async def download_postman_collection(request: Request):
+    """Descarga la colección de Postman como archivo JSON"""
+    try:
+        coleccion = _coleccion(request)
+        headers = {
+            "Content-Disposition": f"attachment; filename={NOMBRE_ARCHIVO}",
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "ETag": coleccion["etag"],
+        }
+        # La compresión quita el sufijo de codificación de If-None-Match antes de llegar aquí
+        if _coincide(request.headers.get("if-none-match", ""), coleccion["etag"]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        cuerpo = coleccion["cuerpo"]
+        codificacion = elegir_codificacion(request.headers.get("accept-encoding", ""))
+        if codificacion:
+            if codificacion not in coleccion["variantes"]:
+                coleccion["variantes"][codificacion] = comprimir(cuerpo, codificacion, nivel_gzip=9, nivel_brotli=11)
+            cuerpo = coleccion["variantes"][codificacion]
+            headers["Content-Encoding"] = codificacion
+            headers["ETag"] = etag_con_codificacion(coleccion["etag"], codificacion)
+        return Response(content=cuerpo, media_type="application/json", headers=headers)
+    except Exception as e:
+        logger.error(f"Error descargando colección Postman: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error descargando colección Postman"
+        )
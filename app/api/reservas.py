@@ -5,6 +5,8 @@ from app.models.reserva import ReservaResponse, ReservaCreate, ReservaUpdate, Re
 from app.models.usuario import UsuarioResponse
 from app.repositories.instances import reserva_repository
 from app.auth.auth_handler import auth_handler
+from app.respuestas import respuesta_json
+from app.proyecciones import DESCRIPCION_FIELDS, parsear_campos, modelo_respuesta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -15,12 +17,14 @@ router = APIRouter(prefix="/reservas", tags=["Reservas"])
 async def get_reservas_by_operador(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
 ):
     if not current_user.es_operador:
         raise HTTPException(status_code=403, detail="Solo operadores pueden ver sus reservas")
-    reservas = await reserva_repository.get_reservas_by_operador(str(current_user.id), skip, limit)
-    return reservas  # No lances error si reservas es []
+    campos = parsear_campos(fields, ReservaResponse)
+    reservas = await reserva_repository.get_reservas_by_operador(str(current_user.id), skip, limit, campos)
+    return respuesta_json(reservas, List[modelo_respuesta(ReservaResponse, campos)])  # No lances error si reservas es []
 
 @router.post("/", response_model=ReservaResponse, status_code=status.HTTP_201_CREATED)
 async def create_reserva(
@@ -46,11 +50,13 @@ async def create_reserva(
 @router.get("/{reserva_id}", response_model=ReservaResponse)
 async def get_reserva(
     reserva_id: str,
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
 ):
     """Obtiene una reserva específica"""
+    campos = parsear_campos(fields, ReservaResponse)
     try:
-        reserva = await reserva_repository.get_reserva_by_id(reserva_id, str(current_user.id))
+        reserva = await reserva_repository.get_reserva_by_id(reserva_id, str(current_user.id), campos)
         
         if not reserva:
             raise HTTPException(
@@ -58,6 +64,8 @@ async def get_reserva(
                 detail="Reserva no encontrada"
             )
         
+        if campos is not None:
+            return respuesta_json(reserva, modelo_respuesta(ReservaResponse, campos))
         return reserva
     except HTTPException:
         raise
@@ -100,12 +108,14 @@ async def update_reserva(
 async def get_my_reservas(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
 ):
     """Obtiene las reservas de paquetes turísticos del usuario actual"""
+    campos = parsear_campos(fields, ReservaResponse)
     try:
-        reservas = await reserva_repository.get_reservas_by_user(str(current_user.id), skip, limit)
-        return reservas
+        reservas = await reserva_repository.get_reservas_by_user(str(current_user.id), skip, limit, campos)
+        return respuesta_json(reservas, List[modelo_respuesta(ReservaResponse, campos)])
     except Exception as e:
         logger.error(f"Error al obtener reservas: {e}")
         raise HTTPException(
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from typing import List, Optional
-from app.models.review import ReviewResponse, ReviewCreate, ReviewUpdate
+from app.models.review import ReviewResponse, ReviewCreate, ReviewUpdate, ReviewSummaryResponse
 from app.models.usuario import UsuarioResponse
 from app.repositories.instances import review_repository
 from app.auth.auth_handler import auth_handler
+from app.respuestas import respuesta_json
+from app.proyecciones import DESCRIPCION_FIELDS, parsear_campos, modelo_respuesta
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,12 +15,14 @@ router = APIRouter(prefix="/reviews", tags=["Reviews"])
 async def get_my_reviews(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS),
     current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
 ):
     """Obtiene las reviews hechas por el usuario autenticado"""
+    campos = parsear_campos(fields, ReviewResponse)
     try:
-        reviews = review_repository.get_reviews_by_autor(current_user.id, skip, limit)
-        return reviews
+        reviews = review_repository.get_reviews_by_autor(current_user.id, skip, limit, campos)
+        return respuesta_json(reviews, List[modelo_respuesta(ReviewResponse, campos)])
     except Exception as e:
         logger.error(f"Error al obtener mis reviews: {e}")
         raise HTTPException(
@@ -50,12 +54,14 @@ async def create_review(
 async def get_reviews_by_paquete(
     paquete_id: str,
     skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=1000)
+    limit: int = Query(100, ge=1, le=1000),
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS)
 ):
     """Obtiene las reviews de un paquete turístico"""
+    campos = parsear_campos(fields, ReviewResponse)
     try:
-        reviews = review_repository.get_reviews_by_paquete(paquete_id, skip, limit)
-        return reviews
+        reviews = review_repository.get_reviews_by_paquete(paquete_id, skip, limit, campos)
+        return respuesta_json(reviews, List[modelo_respuesta(ReviewResponse, campos)])
     except Exception as e:
         logger.error(f"Error al obtener reviews: {e}")
         raise HTTPException(
@@ -63,16 +69,36 @@ async def get_reviews_by_paquete(
             detail="Error interno del servidor"
         )
 
+@router.get("/paquete/{paquete_id}/summary", response_model=ReviewSummaryResponse)
+async def get_review_summary(paquete_id: int):
+    """Obtiene el histograma, promedios por categoría y calificación bayesiana de un paquete turístico"""
+    try:
+        return review_repository.get_review_summary(paquete_id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error al obtener resumen de reviews: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.get("/{review_id}", response_model=ReviewResponse)
-async def get_review_by_id(review_id: str):
+async def get_review_by_id(
+    review_id: str,
+    fields: Optional[str] = Query(None, description=DESCRIPCION_FIELDS)
+):
     """Obtiene una review específica"""
+    campos = parsear_campos(fields, ReviewResponse)
     try:
-        review = review_repository.get_review_by_id(review_id)
+        review = review_repository.get_review_by_id(review_id, campos)
         if not review:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Review no encontrada"
             )
+        if campos is not None:
+            return respuesta_json(review, modelo_respuesta(ReviewResponse, campos))
         return review
     except HTTPException:
         raise
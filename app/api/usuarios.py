@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Request
 from typing import List, Optional
 from app.models.usuario import UsuarioResponse, UsuarioUpdate
-from app.repositories.instances import usuario_repository
+from app.models.paqueteturistico import PaqueteTuristicoResponse
+from app.repositories.instances import usuario_repository, paquete_turistico_repository, recomendacion_repository
 from app.auth.auth_handler import auth_handler
+from app.models.imagen import SubidaImagenesResponse, ImagenEnProceso
+from app.respuestas import respuesta_json
+from app.imagenes import procesador_imagenes, recibir_imagenes, esquema_multipart, procesar_archivo, destino_nuevo, url_publica, eliminar_archivos
+from app.config import settings
+import os
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,6 +38,47 @@ async def update_current_user(
             detail="Error interno del servidor"
         )
 
+@router.put(
+    "/me/avatar",
+    response_model=SubidaImagenesResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    openapi_extra=esquema_multipart("archivo", multiple=False)
+)
+async def update_my_avatar(
+    request: Request,
+    current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
+):
+    """Sube el avatar del usuario actual (multipart, campo archivo); se procesa en segundo plano"""
+    recibidas = await recibir_imagenes(request, 1)
+    try:
+        user_id = str(current_user.id)
+
+        async def registrar(ruta: str):
+            anterior = await usuario_repository.get_user_by_id(user_id)
+            if await usuario_repository.update_user_avatar(user_id, url_publica(ruta)) is None:
+                eliminar_archivos([ruta])
+            elif anterior and (anterior.avatar_url or "").startswith("/uploads/"):
+                # El avatar anterior ya no lo referencia nadie; solo se borra si lo escribió esta ruta
+                carpeta = os.path.join(os.path.realpath(settings.upload_dir), "avatares", user_id)
+                previa = os.path.realpath(os.path.join(settings.upload_dir, anterior.avatar_url[len("/uploads/"):]))
+                if os.path.dirname(previa) == carpeta:
+                    eliminar_archivos([previa])
+
+        procesador_imagenes.programar(
+            f"avatar del usuario {user_id}", procesar_archivo, recibidas[0].ruta,
+            destino_nuevo("avatares", user_id), settings.avatar_lado_maximo,
+            al_terminar=registrar
+        )
+        return SubidaImagenesResponse(imagenes=[
+            ImagenEnProceso(archivo=recibidas[0].nombre, tamano=recibidas[0].tamano)
+        ])
+    except Exception as e:
+        logger.error(f"Error al subir avatar: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.get("/{user_id}", response_model=UsuarioResponse)
 async def get_user_by_id(user_id: str):
     """Obtiene un usuario por ID"""
@@ -62,7 +109,7 @@ async def get_all_users(
     """Obtiene todos los usuarios (solo para administradores del sistema)"""
     try:
         users = await usuario_repository.get_all_users(skip, limit)
-        return users
+        return respuesta_json(users, List[UsuarioResponse])
     except Exception as e:
         logger.error(f"Error al obtener usuarios: {e}")
         raise HTTPException(
@@ -81,7 +128,7 @@ async def get_operadores_turisticos(
         # Por ahora usamos el método general y filtramos
         users = await usuario_repository.get_all_users(skip, limit * 3)  # Obtenemos más para filtrar
         operadores = [user for user in users if user.es_operador and user.es_verificado]
-        return operadores[:limit]
+        return respuesta_json(operadores[:limit], List[UsuarioResponse])
     except Exception as e:
         logger.error(f"Error al obtener operadores turísticos: {e}")
         raise HTTPException(
@@ -125,6 +172,32 @@ async def get_my_stats(current_user: UsuarioResponse = Depends(auth_handler.get_
             detail="Error interno del servidor"
         )
 
+@router.get("/me/recomendaciones", response_model=List[PaqueteTuristicoResponse])
+async def get_my_recomendaciones(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: UsuarioResponse = Depends(auth_handler.get_current_user)
+):
+    """Recomienda paquetes turísticos según las reservas y favoritos del usuario actual"""
+    try:
+        user_id = str(current_user.id)
+        paquete_ids = recomendacion_repository.get_recomendaciones_usuario(user_id, limit)
+        paquetes = await paquete_turistico_repository.get_paquetes_by_ids(paquete_ids, user_id)
+        
+        # Usuarios sin historial suficiente: completar con los paquetes más populares
+        # que no estén ya en la lista ni el usuario haya reservado o marcado como favoritos
+        if len(paquetes) < limit:
+            excluidos = {paquete.id for paquete in paquetes} | recomendacion_repository.get_historial_usuario(user_id)
+            populares = await paquete_turistico_repository.get_all_paquetes(0, limit + len(excluidos), user_id, "popular")
+            paquetes.extend(paquete for paquete in populares if paquete.id not in excluidos)
+        
+        return respuesta_json(paquetes[:limit], List[PaqueteTuristicoResponse])
+    except Exception as e:
+        logger.error(f"Error al obtener recomendaciones: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Error interno del servidor"
+        )
+
 @router.post("/me/convert-to-operator")
 async def convert_to_operator(current_user: UsuarioResponse = Depends(auth_handler.get_current_user)):
     """Convierte un turista en operador turístico (requiere aprobación)"""
@@ -1,7 +1,8 @@
-from typing import Optional
+from contextvars import ContextVar
+from typing import Optional, Tuple
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.database import db
+from app.database import UsaConexion
 from app.auth.jwt_handler import jwt_handler
 from app.models.usuario import UsuarioResponse, UsuarioCreate
 import logging
@@ -10,14 +11,14 @@ logger = logging.getLogger(__name__)
 
 security = HTTPBearer()
 
-class AuthHandler(object):
-    def __init__(self):
-        self.connection = db.get_client()
-    
+# Usuario ya autenticado por POST /batch, compartido con sus subpeticiones: (token, usuario)
+usuario_lote: ContextVar[Optional[Tuple[str, UsuarioResponse]]] = ContextVar("usuario_lote", default=None)
+
+class AuthHandler(UsaConexion):
     async def authenticate_user(self, email: str, password: str) -> Optional[UsuarioResponse]:
         """Autentica un usuario (turista u operador turístico) con email y contraseña"""
         try:
-            logger.info(f"Intentando autenticar usuario: {email}")
+            logger.debug("Intentando autenticar usuario: %s", email)
             cursor = self.connection.cursor()
             cursor.execute(
                 "SELECT * FROM usuarios WHERE email = ?",
@@ -28,11 +29,10 @@ class AuthHandler(object):
                 logger.warning(f"Usuario no encontrado: {email}")
                 return None
             user_dict = dict(user_data)
-            logger.info(f"Usuario encontrado: {user_dict}")
             if not jwt_handler.verify_password(password, user_dict['password_hash']):
                 logger.warning(f"Contraseña incorrecta para usuario: {email}")
                 return None
-            logger.info(f"Contraseña correcta para usuario: {email}")
+            logger.debug("Contraseña correcta para usuario: %s", email)
             cursor.execute(
                 "UPDATE usuarios SET ultimo_acceso = CURRENT_TIMESTAMP WHERE id = ?",
                 (user_dict['id'],)
@@ -46,7 +46,7 @@ class AuthHandler(object):
     async def register_user(self, user_data: UsuarioCreate) -> UsuarioResponse:
         """Registra un nuevo usuario en el sistema de turismo (turista u operador turístico)"""
         try:
-            logger.info(f"Intentando registrar usuario: {user_data.email}")
+            logger.debug("Intentando registrar usuario: %s", user_data.email)
             cursor = self.connection.cursor()
             cursor.execute(
                 "SELECT id FROM usuarios WHERE email = ?",
@@ -59,11 +59,9 @@ class AuthHandler(object):
                     detail="El email ya está registrado en nuestro sistema de turismo"
                 )
             hashed_password = jwt_handler.get_password_hash(user_data.password)
-            logger.info(f"Hash de contraseña generado para {user_data.email}")
             user_dict = user_data.dict()
             user_dict['password_hash'] = hashed_password
             del user_dict['password']
-            logger.info(f"Datos a insertar en la base de datos: {user_dict}")
             cursor.execute("""
                 INSERT INTO usuarios (
                     email, password_hash, nombre, apellido, telefono, 
@@ -79,13 +77,12 @@ class AuthHandler(object):
                 user_dict.get('es_verificado', False), user_dict.get('es_operador', False)
             ))
             self.connection.commit()
-            logger.info(f"Usuario registrado correctamente: {user_data.email}")
+            logger.info("Usuario registrado correctamente: %s", user_data.email)
             cursor.execute(
                 "SELECT * FROM usuarios WHERE email = ?",
                 (user_data.email,)
             )
             created_user = dict(cursor.fetchone())
-            logger.info(f"Usuario creado en la base de datos: {created_user}")
             return UsuarioResponse(**created_user)
         except HTTPException:
             raise
@@ -100,9 +97,10 @@ class AuthHandler(object):
         """Obtiene el usuario actual basado en el token JWT"""
         try:
             token = credentials.credentials
-            logger.info(f"Token recibido: {token}")
+            lote = usuario_lote.get()
+            if lote is not None and lote[0] == token:
+                return lote[1]
             token_data = jwt_handler.verify_token(token)
-            logger.info(f"Token data decodificada: {token_data}")
             if token_data is None:
                 logger.warning("Token inválido o expirado")
                 raise HTTPException(
@@ -112,13 +110,12 @@ class AuthHandler(object):
                 )
             # Buscar usuario en la base de datos
             cursor = self.connection.cursor()
-            logger.info(f"Buscando usuario con id: {token_data.user_id}")
+            logger.debug("Buscando usuario con id: %s", token_data.user_id)
             cursor.execute(
                 "SELECT * FROM usuarios WHERE id = ?",
                 (token_data.user_id,)
             )
             user_data = cursor.fetchone()
-            logger.info(f"Resultado de búsqueda de usuario: {user_data}")
             if not user_data:
                 logger.warning("Usuario no encontrado en la base de datos")
                 raise HTTPException(
@@ -3,8 +3,10 @@ from typing import Optional, Union
 from jose import JWTError,jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.metricas import metricas
 from app.models.usuario import TokenData
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -19,19 +21,29 @@ class JWTHandler(object):
     
     def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """Verifica si la contraseña coincide con el hash almacenado"""
+        metricas.incrementar("bcrypt_en_curso")
+        inicio = time.perf_counter()
         try:
             return self.pwd_context.verify(plain_password, hashed_password)
         except Exception as e:
             logger.error(f"Error al verificar contraseña: {e}")
             return False
+        finally:
+            metricas.incrementar("bcrypt_en_curso", valor=-1)
+            metricas.observar("bcrypt_duracion_segundos", time.perf_counter() - inicio, (("operacion", "verificar"),))
     
     def get_password_hash(self, password: str) -> str:
         """Genera el hash seguro de la contraseña usando bcrypt"""
+        metricas.incrementar("bcrypt_en_curso")
+        inicio = time.perf_counter()
         try:
             return self.pwd_context.hash(password)
         except Exception as e:
             logger.error(f"Error al generar hash de contraseña: {e}")
             raise
+        finally:
+            metricas.incrementar("bcrypt_en_curso", valor=-1)
+            metricas.observar("bcrypt_duracion_segundos", time.perf_counter() - inicio, (("operacion", "hash"),))
     
     def create_access_token(self, data: dict, expires_delta: Optional[timedelta] = None) -> str:
         """Crea un token de acceso JWT"""
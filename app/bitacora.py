@@ -0,0 +1,121 @@
+"""Configuración del logging de la aplicación.
+
+Los registros se encolan en el hilo que los emite (QueueHandler) y un hilo
+aparte (QueueListener) los redacta, formatea y escribe, de modo que las
+peticiones no esperan a la E/S de los logs. El hilo emisor solo resuelve el
+mensaje con sus argumentos; por eso los logs de rutas calientes usan
+formato perezoso (`logger.debug("... %s", valor)`) y nivel DEBUG, que no
+cuesta nada cuando está desactivado.
+"""
+from logging.handlers import QueueHandler, QueueListener
+import atexit
+import json
+import logging
+import queue
+import random
+import re
+import sys
+import traceback
+
+from app.config import settings
+
+# Atributos estándar de LogRecord; el resto (extra=...) se añade al JSON
+_ATRIBUTOS_ESTANDAR = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_CLAVES_SECRETAS = r"password(?:_hash)?|contrasena|(?:access_|refresh_)?token|secret(?:_key)?|authorization"
+_REDACCIONES = (
+    (re.compile(r"\bBearer\s+[\w.~+/=-]+", re.IGNORECASE), "Bearer <redactado>"),
+    # Valores de claves sensibles en dicts, JSON o key=value
+    (re.compile(rf"""(['"]?\b(?:{_CLAVES_SECRETAS})\b['"]?\s*[:=]\s*)(?!Bearer\b)(?:(['"])(?:(?!\2)[^\\]|\\.)*\2|[^\s,&}}]+)""", re.IGNORECASE), r"\1\2<redactado>\2"),
+    (re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]+"), "<jwt>"),
+    (re.compile(r"\$2[abxy]?\$\d{2}\$[./A-Za-z0-9]{53}"), "<hash>"),
+    (re.compile(r"(data:[\w/+.-]+;base64,)[A-Za-z0-9+/=]{32,}"), r"\1<...>"),
+    (re.compile(r"[A-Za-z0-9+/]{256,}={0,2}"), "<base64>"),
+)
+
+def redactar(texto: str) -> str:
+    """Oculta tokens, contraseñas, hashes e imágenes en base64"""
+    for patron, reemplazo in _REDACCIONES:
+        texto = patron.sub(reemplazo, texto)
+    return texto
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos de `extra` y el mensaje redactado"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        datos = {
+            "fecha": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "nivel": record.levelname,
+            "logger": record.name,
+            "mensaje": redactar(record.getMessage()),
+        }
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_ESTANDAR:
+                datos[clave] = redactar(valor) if isinstance(valor, str) else valor
+        if record.exc_text:
+            datos["excepcion"] = redactar(record.exc_text)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+class FormateadorTexto(logging.Formatter):
+    """Formato de texto histórico, con el mensaje redactado"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        return redactar(super().format(record))
+
+class FiltroMuestreoDebug(logging.Filter):
+    """Deja pasar solo una fracción de los registros DEBUG"""
+
+    def __init__(self, fraccion: float):
+        super().__init__()
+        self.fraccion = fraccion
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.fraccion
+
+class ManejadorCola(QueueHandler):
+    """QueueHandler que solo resuelve el mensaje en el hilo emisor; el formato se hace en el listener"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            # La traza se resuelve aquí: los marcos no deben viajar a otro hilo
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+_listener = None
+
+def configurar_logging():
+    """Instala el pipeline de logs en el logger raíz según LOG_NIVEL, LOG_FORMATO y LOG_MUESTREO_DEBUG"""
+    global _listener
+    if _listener is not None:
+        return
+
+    salida = logging.StreamHandler(sys.stderr)
+    salida.setFormatter(FormateadorJSON() if settings.log_formato == "json" else FormateadorTexto())
+
+    cola = queue.SimpleQueue()
+    manejador = ManejadorCola(cola)
+    if settings.log_muestreo_debug < 1:
+        manejador.addFilter(FiltroMuestreoDebug(settings.log_muestreo_debug))
+
+    raiz = logging.getLogger()
+    for anterior in list(raiz.handlers):
+        raiz.removeHandler(anterior)
+    raiz.addHandler(manejador)
+    raiz.setLevel(settings.log_nivel.upper())
+
+    _listener = QueueListener(cola, salida, respect_handler_level=True)
+    _listener.start()
+    atexit.register(detener_logging)
+
+def detener_logging():
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
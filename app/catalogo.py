@@ -0,0 +1,184 @@
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SERVICIOS_INCLUIDOS = ("incluye_transporte", "incluye_alojamiento", "incluye_comidas", "incluye_guia")
+COLUMNAS_CATEGORIA = ("tipo_paquete", "nivel_dificultad", "pais_destino", "ciudad_destino")
+
+# Claves de ordenamiento equivalentes a ORDENAMIENTOS_PAQUETE: (columna, descendente)
+# Con más resultados que este límite se recorre el orden precalculado en bloques
+MAX_CANDIDATOS_ORDENAR = 2048
+MIN_BLOQUE_RECORRIDO = 1024
+
+CLAVES_ORDEN = {
+    "recent": ("fecha_creacion", True),
+    "price": ("precio_por_persona", False),
+    "popular": ("puntuacion_popularidad", True),
+    "rating": ("puntuacion_calificacion", True),
+}
+
+def _timestamp(valor) -> float:
+    """Convierte un TIMESTAMP de SQLite en segundos (-inf si no hay fecha)"""
+    if not valor:
+        return -np.inf
+    try:
+        return datetime.fromisoformat(str(valor)).timestamp()
+    except ValueError:
+        return -np.inf
+
+def _numero(valor, defecto: float) -> float:
+    return defecto if valor is None else float(valor)
+
+class CatalogoColumnar(object):
+    """Instantánea en columnas NumPy de los paquetes turísticos activos.
+
+    Cada filtro de PaqueteTuristicoFiltros que aplica la búsqueda SQL se evalúa
+    como una máscara vectorizada, y el orden se resuelve con rangos
+    precalculados por ordenamiento. Las columnas de texto se codifican como
+    enteros con un diccionario por columna.
+    """
+
+    def __init__(self, filas: Sequence[dict]):
+        self.codigos: Dict[str, Dict[str, int]] = {columna: {} for columna in COLUMNAS_CATEGORIA}
+        self.posiciones: Dict[int, int] = {}
+        n = len(filas)
+        self.ids = np.zeros(n, dtype=np.int64)
+        self.activo = np.zeros(n, dtype=bool)
+        self.columnas = {
+            "precio_por_persona": np.zeros(n, dtype=np.float64),
+            "duracion_dias": np.zeros(n, dtype=np.int32),
+            "capacidad_maxima": np.zeros(n, dtype=np.int32),
+            "edad_minima": np.zeros(n, dtype=np.float64),
+            "fecha_creacion": np.zeros(n, dtype=np.float64),
+            "puntuacion_popularidad": np.zeros(n, dtype=np.float64),
+            "puntuacion_calificacion": np.zeros(n, dtype=np.float64),
+        }
+        for columna in COLUMNAS_CATEGORIA:
+            self.columnas[columna] = np.zeros(n, dtype=np.int32)
+        for servicio in SERVICIOS_INCLUIDOS:
+            self.columnas[servicio] = np.zeros(n, dtype=np.int8)
+        self._ordenes: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+        for posicion, fila in enumerate(filas):
+            self._escribir(posicion, fila)
+
+    def __len__(self) -> int:
+        return int(self.activo.sum())
+
+    def _codigo(self, columna: str, valor) -> int:
+        codigos = self.codigos[columna]
+        if valor not in codigos:
+            codigos[valor] = len(codigos)
+        return codigos[valor]
+
+    def _escribir(self, posicion: int, fila: dict):
+        """Copia una fila de la base de datos en la posición indicada"""
+        self.ids[posicion] = fila["id"]
+        self.activo[posicion] = True
+        self.posiciones[int(fila["id"])] = posicion
+        columnas = self.columnas
+        columnas["precio_por_persona"][posicion] = _numero(fila["precio_por_persona"], np.nan)
+        columnas["duracion_dias"][posicion] = fila["duracion_dias"]
+        columnas["capacidad_maxima"][posicion] = fila["capacidad_maxima"]
+        # Una edad mínima NULL no cumple ningún filtro, igual que en SQL
+        columnas["edad_minima"][posicion] = _numero(fila["edad_minima"], np.inf)
+        columnas["fecha_creacion"][posicion] = _timestamp(fila["fecha_creacion"])
+        # SQLite ordena los NULL al final en los ordenamientos descendentes
+        columnas["puntuacion_popularidad"][posicion] = _numero(fila["puntuacion_popularidad"], -np.inf)
+        columnas["puntuacion_calificacion"][posicion] = _numero(fila["puntuacion_calificacion"], -np.inf)
+        for columna in COLUMNAS_CATEGORIA:
+            columnas[columna][posicion] = self._codigo(columna, fila[columna])
+        for servicio in SERVICIOS_INCLUIDOS:
+            columnas[servicio][posicion] = -1 if fila[servicio] is None else int(fila[servicio])
+
+    def actualizar(self, filas: Sequence[dict], eliminados: Sequence[int] = ()):
+        """Aplica en la instantánea paquetes modificados o desactivados"""
+        for paquete_id in eliminados:
+            posicion = self.posiciones.pop(int(paquete_id), None)
+            if posicion is not None:
+                self.activo[posicion] = False
+
+        nuevas = [fila for fila in filas if int(fila["id"]) not in self.posiciones]
+        if nuevas:
+            crecer = len(nuevas)
+            self.ids = np.concatenate([self.ids, np.zeros(crecer, dtype=self.ids.dtype)])
+            self.activo = np.concatenate([self.activo, np.zeros(crecer, dtype=bool)])
+            for columna, valores in self.columnas.items():
+                self.columnas[columna] = np.concatenate([valores, np.zeros(crecer, dtype=valores.dtype)])
+            inicio = len(self.ids) - crecer
+            for desplazamiento, fila in enumerate(nuevas):
+                self.posiciones[int(fila["id"])] = inicio + desplazamiento
+
+        for fila in filas:
+            self._escribir(self.posiciones[int(fila["id"])], fila)
+        self._ordenes.clear()
+
+    def _orden(self, sort: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Posiciones ordenadas y rango de cada fila (desempate por id ascendente)"""
+        if sort not in self._ordenes:
+            columna, descendente = CLAVES_ORDEN[sort]
+            clave = self.columnas[columna]
+            orden = np.lexsort((self.ids, -clave if descendente else clave))
+            rango = np.empty(len(orden), dtype=np.int64)
+            rango[orden] = np.arange(len(orden))
+            self._ordenes[sort] = (orden, rango)
+        return self._ordenes[sort]
+
+    def _igual(self, columna: str, valor) -> Optional[np.ndarray]:
+        codigo = self.codigos[columna].get(valor)
+        if codigo is None:
+            return None
+        return self.columnas[columna] == codigo
+
+    def buscar(self, filtros, skip: int = 0, limit: int = 100, sort: str = "recent") -> List[int]:
+        """Devuelve los IDs de la página pedida en el orden indicado"""
+        mascara = self.activo.copy()
+        columnas = self.columnas
+
+        for columna in COLUMNAS_CATEGORIA:
+            valor = getattr(filtros, columna)
+            if valor:
+                igual = self._igual(columna, valor)
+                if igual is None:
+                    return []
+                mascara &= igual
+        if filtros.precio_min is not None:
+            mascara &= columnas["precio_por_persona"] >= float(filtros.precio_min)
+        if filtros.precio_max is not None:
+            mascara &= columnas["precio_por_persona"] <= float(filtros.precio_max)
+        if filtros.duracion_min is not None:
+            mascara &= columnas["duracion_dias"] >= filtros.duracion_min
+        if filtros.duracion_max is not None:
+            mascara &= columnas["duracion_dias"] <= filtros.duracion_max
+        if filtros.capacidad_minima is not None:
+            mascara &= columnas["capacidad_maxima"] >= filtros.capacidad_minima
+        if filtros.edad_minima_max is not None:
+            mascara &= columnas["edad_minima"] <= filtros.edad_minima_max
+        for servicio in SERVICIOS_INCLUIDOS:
+            valor = getattr(filtros, servicio)
+            if valor is not None:
+                mascara &= columnas[servicio] == int(valor)
+
+        total = int(np.count_nonzero(mascara))
+        fin = min(skip + limit, total)
+        if skip >= fin:
+            return []
+        orden, rango = self._orden(sort)
+        if total <= MAX_CANDIDATOS_ORDENAR:
+            # Pocos resultados: se ordenan directamente
+            candidatos = np.flatnonzero(mascara)
+            candidatos = candidatos[np.argsort(rango[candidatos])]
+        else:
+            # Muchos resultados: se recorre el orden precalculado hasta llenar la página
+            bloque = max(2 * fin * len(orden) // total, MIN_BLOQUE_RECORRIDO)
+            partes, encontrados = [], 0
+            for inicio in range(0, len(orden), bloque):
+                posiciones = orden[inicio:inicio + bloque]
+                parte = posiciones[mascara[posiciones]]
+                partes.append(parte)
+                encontrados += len(parte)
+                if encontrados >= fin:
+                    break
+            candidatos = np.concatenate(partes)
+        return self.ids[candidatos[skip:fin]].tolist()
@@ -0,0 +1,220 @@
+"""Compresión de respuestas HTTP (gzip y Brotli).
+
+MiddlewareCompresion negocia la codificación con Accept-Encoding y comprime
+en streaming las respuestas de tipos comprimibles que superan
+COMPRESION_MINIMO bytes. A los ETag de las respuestas comprimidas se les
+añade la codificación como sufijo ("abc" -> "abc-gzip") para que las cachés
+no mezclen variantes, y el sufijo se retira de If-None-Match antes de llegar
+a la aplicación, que así compara con sus propios ETag.
+
+ArchivosPrecomprimidos sirve upload_dir usando variantes .br / .gz generadas
+junto a cada archivo la primera vez que se piden, sin comprimir en cada
+petición. Brotli es opcional: sin el paquete `brotli` solo se ofrece gzip.
+"""
+from typing import Optional, Tuple
+import gzip
+import os
+import zlib
+
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TIPOS_COMPRIMIBLES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/problem+json",
+    "image/svg+xml",
+)
+EXTENSIONES = {"br": ".br", "gzip": ".gz"}
+
+def codificaciones_disponibles() -> Tuple[str, ...]:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """Codificación preferida por el cliente entre las disponibles (Brotli antes que gzip a igual calidad)"""
+    calidades = {}
+    for parte in accept_encoding.split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        calidad = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith("q="):
+            try:
+                calidad = float(parametros[2:])
+            except ValueError:
+                calidad = 0.0
+        calidades[nombre.strip().lower()] = calidad
+    mejor, mejor_calidad = None, 0.0
+    for codificacion in codificaciones_disponibles():
+        calidad = calidades.get(codificacion, calidades.get("*", 0.0))
+        if calidad > mejor_calidad:
+            mejor, mejor_calidad = codificacion, calidad
+    return mejor
+
+def es_comprimible(content_type: str) -> bool:
+    content_type = content_type.lower()
+    return content_type.startswith(TIPOS_COMPRIMIBLES) or "+json" in content_type or "+xml" in content_type
+
+def comprimir(datos: bytes, codificacion: str, nivel_gzip: int = 6, nivel_brotli: int = 4) -> bytes:
+    """Comprime `datos` completos con `codificacion`"""
+    if codificacion == "br":
+        return brotli.compress(datos, quality=nivel_brotli)
+    return gzip.compress(datos, compresslevel=nivel_gzip, mtime=0)
+
+class _Compresor(object):
+    """Compresor incremental con la misma interfaz para gzip y Brotli"""
+
+    def __init__(self, codificacion: str, nivel_gzip: int, nivel_brotli: int):
+        if codificacion == "br":
+            self._objeto = brotli.Compressor(quality=nivel_brotli)
+            self._comprimir = self._objeto.process
+            self._terminar = self._objeto.finish
+        else:
+            self._objeto = zlib.compressobj(nivel_gzip, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+            self._comprimir = self._objeto.compress
+            self._terminar = self._objeto.flush
+
+    def comprimir(self, datos: bytes) -> bytes:
+        return self._comprimir(datos)
+
+    def terminar(self) -> bytes:
+        return self._terminar()
+
+def etag_con_codificacion(etag: str, codificacion: str) -> str:
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{codificacion}"'
+    return f"{etag}-{codificacion}"
+
+def _sin_sufijos(if_none_match: str) -> str:
+    for codificacion in EXTENSIONES:
+        if_none_match = if_none_match.replace(f'-{codificacion}"', '"')
+    return if_none_match
+
+class MiddlewareCompresion(object):
+    """Middleware ASGI que comprime en streaming las respuestas grandes y comprimibles"""
+
+    def __init__(self, app, minimo: int = 1024, nivel_gzip: int = 6, nivel_brotli: int = 4):
+        self.app = app
+        self.minimo = minimo
+        self.nivel_gzip = nivel_gzip
+        self.nivel_brotli = nivel_brotli
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cabeceras = Headers(scope=scope)
+        codificacion = elegir_codificacion(cabeceras.get("accept-encoding", ""))
+        # Un 304 conserva el sufijo si el cliente validó una variante comprimida
+        validaba_variante = codificacion is not None and f'-{codificacion}"' in cabeceras.get("if-none-match", "")
+        if "if-none-match" in cabeceras:
+            # La aplicación compara con sus ETag sin sufijo de codificación
+            scope = dict(scope)
+            scope["headers"] = [
+                (clave, _sin_sufijos(valor.decode("latin-1")).encode("latin-1") if clave == b"if-none-match" else valor)
+                for clave, valor in scope["headers"]
+            ]
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        inicio: Optional[dict] = None
+        compresor: Optional[_Compresor] = None
+        directo = False
+
+        async def enviar(mensaje):
+            nonlocal inicio, compresor, directo
+            if mensaje["type"] == "http.response.start":
+                inicio = mensaje
+                return
+            if mensaje["type"] != "http.response.body" or directo:
+                await send(mensaje)
+                return
+
+            cuerpo = mensaje.get("body", b"")
+            mas = mensaje.get("more_body", False)
+            if compresor is None:
+                respuesta = MutableHeaders(raw=inicio["headers"])
+                comprimible = (
+                    inicio["status"] not in (204, 206, 304)
+                    and "content-encoding" not in respuesta
+                    and es_comprimible(respuesta.get("content-type", ""))
+                )
+                if comprimible:
+                    respuesta.add_vary_header("Accept-Encoding")
+                if inicio["status"] == 304 and validaba_variante and "etag" in respuesta:
+                    respuesta["ETag"] = etag_con_codificacion(respuesta["etag"], codificacion)
+                if not comprimible or (not mas and len(cuerpo) < self.minimo):
+                    directo = True
+                    await send(inicio)
+                    await send(mensaje)
+                    return
+                compresor = _Compresor(codificacion, self.nivel_gzip, self.nivel_brotli)
+                respuesta["Content-Encoding"] = codificacion
+                if "content-length" in respuesta:
+                    del respuesta["Content-Length"]
+                if "etag" in respuesta:
+                    respuesta["ETag"] = etag_con_codificacion(respuesta["etag"], codificacion)
+                if not mas:
+                    datos = compresor.comprimir(cuerpo) + compresor.terminar()
+                    respuesta["Content-Length"] = str(len(datos))
+                    await send(inicio)
+                    await send({"type": "http.response.body", "body": datos})
+                    return
+                await send(inicio)
+
+            datos = compresor.comprimir(cuerpo)
+            if not mas:
+                datos += compresor.terminar()
+            if datos or not mas:
+                await send({"type": "http.response.body", "body": datos, "more_body": mas})
+
+        await self.app(scope, receive, enviar)
+        if inicio is not None and compresor is None and not directo:
+            # Respuesta sin cuerpo
+            await send(inicio)
+
+def comprimir_archivo(ruta: str, codificacion: str) -> Tuple[str, os.stat_result]:
+    """Escribe (o renueva) la variante comprimida de `ruta` junto a ella; devuelve su ruta y su stat"""
+    destino = ruta + EXTENSIONES[codificacion]
+    if not os.path.exists(destino) or os.path.getmtime(destino) < os.path.getmtime(ruta):
+        with open(ruta, "rb") as f:
+            datos = comprimir(f.read(), codificacion, nivel_gzip=9, nivel_brotli=11)
+        temporal = f"{destino}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, destino)
+    return destino, os.stat(destino)
+
+class ArchivosPrecomprimidos(StaticFiles):
+    """StaticFiles que sirve variantes .br / .gz de los archivos comprimibles"""
+
+    async def get_response(self, path: str, scope):
+        respuesta = await super().get_response(path, scope)
+        if not isinstance(respuesta, FileResponse) or not es_comprimible(respuesta.media_type or ""):
+            return respuesta
+        respuesta.headers.add_vary_header("Accept-Encoding")
+        peticion = Headers(scope=scope)
+        codificacion = elegir_codificacion(peticion.get("accept-encoding", ""))
+        if codificacion is None or str(respuesta.path).endswith(tuple(EXTENSIONES.values())):
+            return respuesta
+        variante, stat = await anyio.to_thread.run_sync(comprimir_archivo, str(respuesta.path), codificacion)
+        comprimida = FileResponse(
+            variante,
+            stat_result=stat,
+            media_type=respuesta.media_type,
+            headers={"Content-Encoding": codificacion, "Vary": "Accept-Encoding"}
+        )
+        # Las variantes tienen su propio ETag; la comparación de StaticFiles se hizo con el original
+        if self.is_not_modified(comprimida.headers, peticion):
+            return NotModifiedResponse(comprimida.headers)
+        return comprimida
@@ -13,6 +13,11 @@ class Settings(BaseSettings):
     vite_backend_url: str = "http://26.59.235.147:8000"
     # Configuración de la base de datos SQLite
     database_path: str = os.getenv("DATABASE_PATH", "database.sqlite")
+    sqlite_cached_statements: int = int(os.getenv("SQLITE_CACHED_STATEMENTS", "512"))  # Sentencias preparadas por conexión
+    sqlite_journal_mode: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")  # WAL: las lecturas largas no bloquean los commits
+    sqlite_busy_timeout: float = float(os.getenv("SQLITE_BUSY_TIMEOUT", "5"))  # Segundos de espera si la base de datos está bloqueada
+    sql_registro_habilitado: bool = os.getenv("SQL_REGISTRO_HABILITADO", "True").lower() == "true"  # Tiempos por huella SQL (/admin/sentencias)
+    sql_lento_ms: float = float(os.getenv("SQL_LENTO_MS", "200"))  # Umbral del log de sentencias lentas (0 lo desactiva)
     
     # Configuración JWT
     jwt_secret_key: str = os.getenv("JWT_SECRET_KEY", "your-secret-key-change-this")
@@ -26,12 +31,75 @@ class Settings(BaseSettings):
     debug: bool = os.getenv("DEBUG", "True").lower() == "true"
     environment: str = os.getenv("ENVIRONMENT", "development")
     
-
+    # Configuración de reviews
+    review_prior_weight: int = int(os.getenv("REVIEW_PRIOR_WEIGHT", "10"))  # Peso del promedio global en la calificación bayesiana
+    
+    # Configuración de rankings (0 desactiva el recálculo periódico)
+    ranking_refresh_seconds: int = int(os.getenv("RANKING_REFRESH_SECONDS", "900"))
+    
+    # Configuración de paquetes similares (0 desactiva el recálculo periódico)
+    similares_refresh_seconds: int = int(os.getenv("SIMILARES_REFRESH_SECONDS", "3600"))
+    similares_k: int = int(os.getenv("SIMILARES_K", "20"))
+    similares_usar_descripcion: bool = os.getenv("SIMILARES_USAR_DESCRIPCION", "True").lower() == "true"
+    
+    # Configuración de coocurrencias reservas/favoritos (0 desactiva el recálculo periódico)
+    coocurrencias_refresh_seconds: int = int(os.getenv("COOCURRENCIAS_REFRESH_SECONDS", "1800"))
+    coocurrencias_n: int = int(os.getenv("COOCURRENCIAS_N", "20"))
+    
+    # Configuración del catálogo en memoria para la búsqueda de paquetes
+    catalogo_en_memoria: bool = os.getenv("CATALOGO_EN_MEMORIA", "False").lower() == "true"
+    catalogo_refresh_seconds: int = int(os.getenv("CATALOGO_REFRESH_SECONDS", "300"))
+    
+    # Configuración de la cola de trabajos en segundo plano (TRABAJOS_WORKERS=0: este proceso no los ejecuta)
+    trabajos_workers: int = int(os.getenv("TRABAJOS_WORKERS", "2"))
+    trabajos_sondeo_segundos: float = float(os.getenv("TRABAJOS_SONDEO_SEGUNDOS", "2"))
+    trabajos_max_intentos: int = int(os.getenv("TRABAJOS_MAX_INTENTOS", "5"))
+    trabajos_reintento_base_segundos: float = float(os.getenv("TRABAJOS_REINTENTO_BASE_SEGUNDOS", "10"))  # Se duplica en cada intento
+    trabajos_reintento_maximo_segundos: float = float(os.getenv("TRABAJOS_REINTENTO_MAXIMO_SEGUNDOS", "3600"))
+    trabajos_bloqueo_segundos: int = int(os.getenv("TRABAJOS_BLOQUEO_SEGUNDOS", "600"))  # Después se reintenta en otro proceso
+    trabajos_lider_segundos: int = int(os.getenv("TRABAJOS_LIDER_SEGUNDOS", "30"))
+    trabajos_retencion_dias: int = int(os.getenv("TRABAJOS_RETENCION_DIAS", "7"))
+    
+    # Configuración del despacho de eventos de dominio (outbox)
+    eventos_sondeo_segundos: float = float(os.getenv("EVENTOS_SONDEO_SEGUNDOS", "1"))
+    eventos_lote: int = int(os.getenv("EVENTOS_LOTE", "500"))
+    eventos_retencion_dias: int = int(os.getenv("EVENTOS_RETENCION_DIAS", "7"))
+    
+    # Configuración del perfilado por muestreo (0 lo desactiva; 0.01 perfila el 1% de las peticiones)
+    perfilado_muestreo: float = float(os.getenv("PERFILADO_MUESTREO", "0"))
+    perfilado_intervalo_ms: int = int(os.getenv("PERFILADO_INTERVALO_MS", "5"))
+    
+    # Configuración de logs (LOG_FORMATO: json o texto; LOG_MUESTREO_DEBUG: fracción de registros DEBUG que se escriben)
+    log_nivel: str = os.getenv("LOG_NIVEL", "INFO")
+    log_formato: str = os.getenv("LOG_FORMATO", "json")
+    log_muestreo_debug: float = float(os.getenv("LOG_MUESTREO_DEBUG", "1"))
+    
+    # Configuración de compresión de respuestas (gzip y, si está instalado, Brotli)
+    compresion_habilitada: bool = os.getenv("COMPRESION_HABILITADA", "True").lower() == "true"
+    compresion_minimo: int = int(os.getenv("COMPRESION_MINIMO", "1024"))  # Bytes a partir de los que se comprime
+    compresion_nivel_gzip: int = int(os.getenv("COMPRESION_NIVEL_GZIP", "6"))
+    compresion_nivel_brotli: int = int(os.getenv("COMPRESION_NIVEL_BROTLI", "4"))
+    
+    # Configuración de métricas (/metrics en formato Prometheus)
+    metricas_habilitadas: bool = os.getenv("METRICAS_HABILITADAS", "True").lower() == "true"
+    
+    # Configuración de POST /batch (subpeticiones GET por lote)
+    batch_max_peticiones: int = int(os.getenv("BATCH_MAX_PETICIONES", "20"))
+    
+    # Token para los endpoints de administración (vacío los desactiva)
+    admin_token: str = os.getenv("ADMIN_TOKEN", "")
     
     # Configuración de archivos
     upload_dir: str = os.getenv("UPLOAD_DIR", "uploads")
     max_file_size: int = int(os.getenv("MAX_FILE_SIZE", "5242880"))  # 5MB
     
+    # Configuración del procesamiento de imágenes (en segundo plano)
+    imagenes_workers: int = int(os.getenv("IMAGENES_WORKERS", "2"))
+    imagenes_max_por_subida: int = int(os.getenv("IMAGENES_MAX_POR_SUBIDA", "10"))
+    imagen_lado_maximo: int = int(os.getenv("IMAGEN_LADO_MAXIMO", "1600"))  # px
+    avatar_lado_maximo: int = int(os.getenv("AVATAR_LADO_MAXIMO", "256"))  # px
+    imagen_calidad_jpeg: int = int(os.getenv("IMAGEN_CALIDAD_JPEG", "85"))
+    
     # Configuración del servidor
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", "8000"))
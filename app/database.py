@@ -2,56 +2,76 @@ import sqlite3
 import logging
 from pathlib import Path
 from typing import Optional
+from app.config import settings
+from app.sentencias import ConexionMedida
+from app.migraciones import aplicar_migraciones, hay_migraciones_pendientes
 
 logger = logging.getLogger(__name__)
 
 class Database:
+    """Conexión compartida de SQLite.
+
+    La conexión se abre en el primer get_client() y las migraciones se aplican
+    con inicializar(), que se llama desde el lifespan de la aplicación (o desde
+    las herramientas que usan la base de datos fuera de ella), no al importar.
+
+    La base de datos trabaja en modo WAL: los cálculos en segundo plano leen
+    tablas completas con conexiones propias, y en modo rollback journal sus
+    bloqueos SHARED impedirían confirmar a la conexión principal mientras dura
+    la lectura.
+    """
+
     def __init__(self):
-        self.db_path = Path("database.sqlite")
+        self.db_path = Path(settings.database_path)
         self.connection: Optional[sqlite3.Connection] = None
-        self._connect()
-        self._create_tables()
     
     def _connect(self):
         """Establece conexión con SQLite"""
         try:
-            self.connection = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=False
-            )
-            # Habilitar foreign keys
-            self.connection.execute("PRAGMA foreign_keys = ON")
-            # Configurar para retornar diccionarios
-            self.connection.row_factory = sqlite3.Row
+            self.connection = self.create_connection()
             logger.info("Conexión a SQLite establecida correctamente")
         except Exception as e:
             logger.error(f"Error al conectar con SQLite: {e}")
             raise
     
-    def _create_tables(self):
-        """Crea las tablas si no existen"""
+    def create_connection(self) -> sqlite3.Connection:
+        """Crea una conexión nueva con la misma configuración que la principal"""
+        connection = sqlite3.connect(
+            str(self.db_path),
+            check_same_thread=False,
+            # Espera máxima por bloqueo; ConexionMedida solo espera al reintentar y mide esa espera
+            timeout=settings.sqlite_busy_timeout,
+            factory=ConexionMedida,
+            cached_statements=settings.sqlite_cached_statements
+        )
+        # Habilitar foreign keys
+        connection.execute("PRAGMA foreign_keys = ON")
+        # El modo WAL queda guardado en el archivo; en una base ya en WAL no hace nada
+        connection.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+        # Configurar para retornar diccionarios
+        connection.row_factory = sqlite3.Row
+        return connection
+    
+    def _migrar(self):
+        """Aplica las migraciones de esquema pendientes"""
         try:
-            # Verificar si las tablas ya existen
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='usuarios'")
-            
-            if cursor.fetchone():
-                logger.info("Las tablas ya existen, omitiendo creación")
+            if not hay_migraciones_pendientes(self.connection):
                 return
-            
-            with open("database.sql", "r", encoding="utf-8") as f:
-                sql_script = f.read()
-            
-            # Ejecutar el script SQL
-            self.connection.executescript(sql_script)
-            self.connection.commit()
-            logger.info("Tablas creadas correctamente")
+            version = aplicar_migraciones(self.connection)
+            logger.info(f"Esquema actualizado a la versión {version}")
         except Exception as e:
-            logger.error(f"Error al crear tablas: {e}")
+            logger.error(f"Error al aplicar migraciones: {e}")
             raise
     
+    def inicializar(self):
+        """Abre la conexión y aplica las migraciones de esquema pendientes"""
+        self.get_client()
+        self._migrar()
+    
     def get_client(self):
-        """Retorna la conexión de SQLite"""
+        """Retorna la conexión de SQLite, abriéndola en el primer uso"""
+        if self.connection is None:
+            self._connect()
         return self.connection
     
     def health_check(self) -> bool:
@@ -71,4 +91,15 @@ class Database:
             self.connection.close()
 
 # Instancia global de la base de datos
-db = Database() 
\ No newline at end of file
+db = Database()
+
+class UsaConexion(object):
+    """Base de repositorios y servicios que usan la conexión compartida.
+
+    La conexión se resuelve en cada acceso a `self.connection`, así que crear
+    las instancias globales al importar no abre la base de datos.
+    """
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        return db.get_client()
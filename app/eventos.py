@@ -0,0 +1,193 @@
+"""Despacho de los eventos de dominio del outbox (tabla `eventos`).
+
+Los triggers de la migración 0011 añaden un evento por cada escritura en
+reservas, paquetes, reviews y favoritos dentro de la misma transacción. El
+despachador los lee en orden de id y los entrega por lotes a los suscriptores
+registrados con `@despachador_eventos.suscribir(...)`, de modo que los datos
+derivados se mantienen fuera de la petición que escribe.
+
+Cada suscriptor avanza por su cuenta y solo después de procesar el lote sin
+errores: la entrega es en orden y al menos una vez, así que los manejadores
+deben ser idempotentes. Un lote que falla se reintenta en el siguiente sondeo
+y bloquea a ese suscriptor (no a los demás) hasta que se procesa.
+
+- Compartidos (por defecto): para datos en la base de datos. Su posición se
+  guarda en `eventos_suscriptores` y solo los ejecuta el proceso líder de
+  app.trabajos, así que cada evento se procesa una vez aunque haya varios
+  workers de uvicorn.
+- `por_proceso=True`: para estado en memoria (cachés). Se ejecutan en todos
+  los procesos desde el último evento existente al arrancar.
+"""
+from fnmatch import fnmatchcase
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import asyncio
+import json
+import logging
+import time
+
+from app.config import settings
+from app.database import UsaConexion
+from app.metricas import metricas
+from app.trabajos import cola_trabajos
+
+logger = logging.getLogger(__name__)
+
+class Evento(object):
+    __slots__ = ("id", "tipo", "entidad_id", "datos", "fecha")
+
+    def __init__(self, id: int, tipo: str, entidad_id: int, datos: Dict[str, Any], fecha: float):
+        self.id = id
+        self.tipo = tipo
+        self.entidad_id = entidad_id
+        self.datos = datos
+        self.fecha = fecha
+
+    def __repr__(self) -> str:
+        return f"Evento({self.id}, {self.tipo}, {self.entidad_id})"
+
+Manejador = Callable[[List[Evento]], Union[Awaitable[None], None]]
+
+class Suscriptor(object):
+    def __init__(self, nombre: str, manejador: Manejador, tipos: Sequence[str], por_proceso: bool):
+        self.nombre = nombre
+        self.manejador = manejador
+        self.tipos = tuple(tipos)
+        self.por_proceso = por_proceso
+        # Último evento entregado de los suscriptores por proceso
+        self.ultimo_id = 0
+
+    def interesa(self, evento: Evento) -> bool:
+        return any(fnmatchcase(evento.tipo, patron) for patron in self.tipos)
+
+class DespachadorEventos(UsaConexion):
+    def __init__(self):
+        self.suscriptores: Dict[str, Suscriptor] = {}
+        self._tarea: Optional[asyncio.Task] = None
+        self._con_metricas = False
+
+    def suscribir(self, nombre: str, tipos: Sequence[str] = ("*",), por_proceso: bool = False):
+        """Decorador que registra un manejador de lotes de eventos cuyos tipos encajan con `tipos` (p. ej. "reserva.*")"""
+        def registrar(manejador: Manejador) -> Manejador:
+            self.suscriptores[nombre] = Suscriptor(nombre, manejador, tipos, por_proceso)
+            return manejador
+        return registrar
+
+    def _ultimo_evento(self) -> int:
+        return self.connection.execute("SELECT COALESCE(MAX(id), 0) FROM eventos").fetchone()[0]
+
+    def _posicion(self, suscriptor: Suscriptor) -> int:
+        if suscriptor.por_proceso:
+            return suscriptor.ultimo_id
+        fila = self.connection.execute(
+            "SELECT ultimo_id FROM eventos_suscriptores WHERE nombre = ?", (suscriptor.nombre,)
+        ).fetchone()
+        return fila[0] if fila else 0
+
+    def _avanzar(self, suscriptor: Suscriptor, ultimo_id: int):
+        if suscriptor.por_proceso:
+            suscriptor.ultimo_id = ultimo_id
+            return
+        self.connection.execute(
+            "UPDATE eventos_suscriptores SET ultimo_id = ?, actualizado = ? WHERE nombre = ?",
+            (ultimo_id, time.time(), suscriptor.nombre)
+        )
+        self.connection.commit()
+
+    def _leer(self, desde: int, limite: int) -> List[Evento]:
+        """Eventos posteriores a `desde` en orden de id"""
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "SELECT id, tipo, entidad_id, datos, fecha FROM eventos WHERE id > ? ORDER BY id LIMIT ?",
+            (desde, limite)
+        )
+        return [Evento(fila[0], fila[1], fila[2], json.loads(fila[3]), fila[4]) for fila in cursor.fetchall()]
+
+    async def _entregar(self, suscriptor: Suscriptor) -> int:
+        """Entrega al suscriptor los lotes pendientes; devuelve cuántos eventos avanzó"""
+        avanzados = 0
+        while True:
+            desde = self._posicion(suscriptor)
+            lote = self._leer(desde, settings.eventos_lote)
+            if not lote:
+                return avanzados
+            eventos = [evento for evento in lote if suscriptor.interesa(evento)]
+            if eventos:
+                if asyncio.iscoroutinefunction(suscriptor.manejador):
+                    await suscriptor.manejador(eventos)
+                else:
+                    await asyncio.to_thread(suscriptor.manejador, eventos)
+            self._avanzar(suscriptor, lote[-1].id)
+            avanzados += len(lote)
+            if len(lote) < settings.eventos_lote:
+                return avanzados
+
+    async def despachar(self) -> int:
+        """Una ronda de entrega a todos los suscriptores que corresponden a este proceso"""
+        total = 0
+        for suscriptor in list(self.suscriptores.values()):
+            if not suscriptor.por_proceso and not cola_trabajos.es_lider:
+                continue
+            try:
+                total += await self._entregar(suscriptor)
+            except Exception as e:
+                logger.error(f"Error al entregar eventos al suscriptor {suscriptor.nombre}: {e}")
+        return total
+
+    async def _bucle(self):
+        while True:
+            await self.despachar()
+            await asyncio.sleep(settings.eventos_sondeo_segundos)
+
+    async def iniciar(self):
+        """Fija las posiciones iniciales y arranca el despacho periódico"""
+        ultimo = self._ultimo_evento()
+        for suscriptor in self.suscriptores.values():
+            if suscriptor.por_proceso:
+                suscriptor.ultimo_id = ultimo
+            else:
+                # Un suscriptor compartido nuevo empieza en el presente, no en toda la historia retenida
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO eventos_suscriptores (nombre, ultimo_id, actualizado) VALUES (?, ?, ?)",
+                    (suscriptor.nombre, ultimo, time.time())
+                )
+        self.connection.commit()
+        if not self._con_metricas:
+            metricas.registrar_recolector(self._retrasos)
+            self._con_metricas = True
+        self._tarea = asyncio.create_task(self._bucle())
+
+    async def detener(self):
+        if self._tarea is not None:
+            self._tarea.cancel()
+            await asyncio.gather(self._tarea, return_exceptions=True)
+            self._tarea = None
+
+    def _retrasos(self) -> List[Tuple[str, tuple, float]]:
+        """Eventos pendientes por suscriptor, para /metrics"""
+        ultimo = self._ultimo_evento()
+        return [
+            ("eventos_retraso", (("suscriptor", suscriptor.nombre),), ultimo - self._posicion(suscriptor))
+            for suscriptor in self.suscriptores.values()
+        ]
+
+    def purgar(self, dias: int) -> int:
+        """Elimina los eventos de hace más de `dias` días ya entregados a todos los suscriptores compartidos"""
+        compartidos = [nombre for nombre, suscriptor in self.suscriptores.items() if not suscriptor.por_proceso]
+        limite = self._ultimo_evento()
+        if compartidos:
+            # Solo cuentan los suscriptores registrados: uno retirado del código no retiene la tabla
+            marcadores = ", ".join("?" * len(compartidos))
+            fila = self.connection.execute(
+                f"SELECT MIN(ultimo_id) FROM eventos_suscriptores WHERE nombre IN ({marcadores})", compartidos
+            ).fetchone()
+            limite = min(limite, fila[0] or 0)
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "DELETE FROM eventos WHERE fecha < ? AND id <= ?",
+            (time.time() - dias * 86400, limite)
+        )
+        self.connection.commit()
+        return cursor.rowcount
+
+# Instancia global del despachador
+despachador_eventos = DespachadorEventos()
@@ -0,0 +1,264 @@
+"""Subida y procesamiento en segundo plano de imágenes.
+
+`recibir_imagenes` lee el cuerpo multipart a medida que llega y escribe cada
+archivo a disco en bloques con aiofiles, cortando con 413 en cuanto uno
+supera MAX_FILE_SIZE, sin esperar al cuerpo completo como request.form().
+
+El procesado (decodificar, corregir la orientación, reducir al lado máximo y
+volver a codificar sin metadatos EXIF) se ejecuta en un pool de hilos: Pillow
+libera el GIL al decodificar, escalar y codificar. Cuando termina, el
+resultado se registra desde el event loop con la conexión principal de
+SQLite, así que la petición que subió la imagen responde antes de que exista.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Union
+import asyncio
+import base64
+import binascii
+import functools
+import io
+import logging
+import os
+import tempfile
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import aiofiles
+import multipart
+from multipart.multipart import parse_options_header
+from fastapi import HTTPException, Request, status
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+TIPOS_IMAGEN = {b"image/jpeg", b"image/png", b"image/webp", b"image/gif"}
+# Holgura para cabeceras y separadores multipart al comprobar Content-Length
+MARGEN_MULTIPART = 64 * 1024
+
+class ImagenRecibida(object):
+    """Archivo subido ya escrito en un temporal, pendiente de procesar"""
+
+    def __init__(self, ruta: str, nombre: str, tipo: str):
+        self.ruta = ruta
+        self.nombre = nombre
+        self.tipo = tipo
+        self.tamano = 0
+
+def esquema_multipart(campo: str, multiple: bool = True) -> Dict[str, Any]:
+    """openapi_extra con el cuerpo multipart que lee `recibir_imagenes` (no lo declara FastAPI)"""
+    archivo = {"type": "string", "format": "binary"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {campo: {"type": "array", "items": archivo} if multiple else archivo},
+                        "required": [campo]
+                    }
+                }
+            }
+        }
+    }
+
+def eliminar_archivos(rutas: List[str]):
+    """Elimina los archivos que existan de `rutas`"""
+    for ruta in rutas:
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass
+
+async def recibir_imagenes(request: Request, maximo_archivos: int) -> List[ImagenRecibida]:
+    """Escribe en temporales las imágenes del cuerpo multipart según llegan, con límite por archivo"""
+    tipo, opciones = parse_options_header(request.headers.get("content-type", ""))
+    if tipo != b"multipart/form-data" or b"boundary" not in opciones:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Se esperaba un cuerpo multipart/form-data"
+        )
+    longitud = request.headers.get("content-length", "")
+    if longitud.isdigit() and int(longitud) > maximo_archivos * settings.max_file_size + MARGEN_MULTIPART:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="El cuerpo de la petición es demasiado grande"
+        )
+
+    # Los callbacks del parser son síncronos: acumulan eventos y la escritura se hace con await
+    eventos = []
+    parser = multipart.MultipartParser(opciones[b"boundary"], {
+        "on_part_begin": lambda: eventos.append(("inicio", b"")),
+        "on_header_field": lambda datos, inicio, fin: eventos.append(("nombre", datos[inicio:fin])),
+        "on_header_value": lambda datos, inicio, fin: eventos.append(("valor", datos[inicio:fin])),
+        "on_header_end": lambda: eventos.append(("cabecera", b"")),
+        "on_headers_finished": lambda: eventos.append(("cabeceras", b"")),
+        "on_part_data": lambda datos, inicio, fin: eventos.append(("datos", datos[inicio:fin])),
+        "on_part_end": lambda: eventos.append(("fin", b"")),
+    })
+
+    recibidas: List[ImagenRecibida] = []
+    cabeceras: Dict[bytes, bytes] = {}
+    nombre, valor = b"", b""
+    actual: Optional[ImagenRecibida] = None
+    archivo = None
+
+    async def procesar_eventos():
+        nonlocal cabeceras, nombre, valor, actual, archivo
+        for evento, datos in eventos:
+            if evento == "inicio":
+                cabeceras, actual = {}, None
+            elif evento == "nombre":
+                nombre += datos
+            elif evento == "valor":
+                valor += datos
+            elif evento == "cabecera":
+                cabeceras[nombre.lower()] = valor
+                nombre, valor = b"", b""
+            elif evento == "cabeceras":
+                _, disposicion = parse_options_header(cabeceras.get(b"content-disposition", b""))
+                if b"filename" not in disposicion:
+                    continue  # Los campos que no son archivos se ignoran
+                if len(recibidas) >= maximo_archivos:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail=f"Se admiten como máximo {maximo_archivos} imágenes por subida"
+                    )
+                tipo_parte, _ = parse_options_header(cabeceras.get(b"content-type", b""))
+                if tipo_parte not in TIPOS_IMAGEN:
+                    raise HTTPException(
+                        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="Solo se admiten imágenes JPEG, PNG, WebP o GIF"
+                    )
+                actual = ImagenRecibida(
+                    os.path.join(tempfile.gettempdir(), f"subida-{uuid.uuid4().hex}"),
+                    disposicion[b"filename"].decode("utf-8", "replace"),
+                    tipo_parte.decode()
+                )
+                recibidas.append(actual)
+                archivo = await aiofiles.open(actual.ruta, "wb")
+            elif evento == "datos" and actual is not None:
+                actual.tamano += len(datos)
+                if actual.tamano > settings.max_file_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"La imagen {actual.nombre} supera el tamaño máximo de {settings.max_file_size} bytes"
+                    )
+                await archivo.write(datos)
+            elif evento == "fin" and actual is not None:
+                await archivo.close()
+                actual, archivo = None, None
+        eventos.clear()
+
+    try:
+        async for bloque in request.stream():
+            parser.write(bloque)
+            await procesar_eventos()
+        parser.finalize()
+        await procesar_eventos()
+        if archivo is not None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cuerpo multipart incompleto")
+    except BaseException:
+        if archivo is not None:
+            await archivo.close()
+        eliminar_archivos([recibida.ruta for recibida in recibidas])
+        raise
+    if not recibidas:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No se recibió ninguna imagen")
+    return recibidas
+
+def es_url(imagen: str) -> bool:
+    """Distingue las URLs de las imágenes enviadas en base64 (un JPEG en base64 empieza por "/9j/")"""
+    return imagen.startswith(("http://", "https://", "/uploads/"))
+
+def decodificar_base64(texto: str) -> bytes:
+    """Bytes de una imagen en base64, con o sin prefijo data:...;base64,"""
+    if texto.startswith("data:"):
+        texto = texto.partition(",")[2]
+    try:
+        return base64.b64decode(texto, validate=True)
+    except binascii.Error:
+        raise ValueError("La imagen no es base64 válido")
+
+def procesar_imagen(origen: Union[str, bytes], destino: str, lado_maximo: int) -> str:
+    """Orienta, reduce y recodifica `origen` (ruta o bytes) sin metadatos; devuelve la ruta escrita.
+
+    `destino` va sin extensión: .png si la imagen tiene transparencia, .jpg en otro caso.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(origen) if isinstance(origen, bytes) else origen) as original:
+        # En JPEG decodifica directamente a una escala reducida cuando sobra resolución
+        original.draft("RGB", (lado_maximo, lado_maximo))
+        imagen = ImageOps.exif_transpose(original)
+        imagen.thumbnail((lado_maximo, lado_maximo))
+        transparente = imagen.mode in ("RGBA", "LA") or (imagen.mode == "P" and "transparency" in imagen.info)
+        imagen = imagen.convert("RGBA" if transparente else "RGB")
+        # Sin EXIF (GPS, cámara), comentarios ni perfiles del original
+        imagen.info = {}
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        if transparente:
+            destino += ".png"
+            imagen.save(destino, "PNG", optimize=True)
+        else:
+            destino += ".jpg"
+            imagen.save(destino, "JPEG", quality=settings.imagen_calidad_jpeg, optimize=True, progressive=True)
+    return destino
+
+def procesar_archivo(ruta: str, destino: str, lado_maximo: int) -> str:
+    """procesar_imagen sobre un temporal de subida, que se elimina al terminar"""
+    try:
+        return procesar_imagen(ruta, destino, lado_maximo)
+    finally:
+        eliminar_archivos([ruta])
+
+def destino_nuevo(*carpetas: str) -> str:
+    """Ruta sin extensión para una imagen nueva dentro de upload_dir"""
+    return os.path.join(settings.upload_dir, *carpetas, uuid.uuid4().hex)
+
+def url_publica(ruta: str) -> str:
+    """URL bajo /uploads de un archivo de upload_dir"""
+    return "/uploads/" + os.path.relpath(ruta, settings.upload_dir).replace(os.sep, "/")
+
+class ProcesadorImagenes(object):
+    """Pool de hilos para el procesado y tareas que registran cada resultado"""
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tareas: Set[asyncio.Task] = set()
+
+    def programar(self, descripcion: str, funcion: Callable[..., str], *argumentos,
+                  al_terminar: Callable[[str], Awaitable[None]]):
+        """Procesa en el pool y después llama a `al_terminar(ruta)` en el event loop"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="imagenes")
+        tarea = asyncio.get_running_loop().create_task(
+            self._ejecutar(descripcion, functools.partial(funcion, *argumentos), al_terminar)
+        )
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+    async def _ejecutar(self, descripcion: str, trabajo: Callable[[], str], al_terminar: Callable[[str], Awaitable[None]]):
+        try:
+            ruta = await asyncio.get_running_loop().run_in_executor(self._executor, trabajo)
+            await al_terminar(ruta)
+        except Exception as e:
+            logger.error(f"Error al procesar {descripcion}: {e}")
+
+    def pendientes(self) -> int:
+        return len(self._tareas)
+
+    async def esperar(self):
+        """Espera a que terminen las imágenes en proceso"""
+        if self._tareas:
+            await asyncio.gather(*list(self._tareas), return_exceptions=True)
+
+    async def cerrar(self):
+        await self.esperar()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+# Instancia global del procesador
+procesador_imagenes = ProcesadorImagenes(settings.imagenes_workers)
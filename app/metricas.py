@@ -0,0 +1,189 @@
+"""Métricas de la aplicación en formato de exposición de Prometheus (/metrics).
+
+Contadores e histogramas se acumulan en un fragmento por hilo, sin locks en
+el camino caliente, y se suman al exportar. Cada proceso de uvicorn tiene sus
+propias métricas: con varios workers hay que recoger cada uno por separado.
+"""
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+from app.perfilado import ruta_plantilla
+
+BUCKETS_DURACION = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 5, 10, 20, 50, 100, 250, 500)
+BUCKETS_BCRYPT = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# nombre -> (tipo, ayuda, buckets)
+DEFINICIONES = {
+    "http_peticiones_total": ("counter", "Peticiones HTTP atendidas", None),
+    "http_duracion_segundos": ("histogram", "Duración de las peticiones HTTP", BUCKETS_DURACION),
+    "http_peticiones_en_curso": ("gauge", "Peticiones HTTP en curso", None),
+    "db_consultas_por_peticion": ("histogram", "Sentencias SQL ejecutadas por petición HTTP", BUCKETS_CONSULTAS),
+    "db_consultas_total": ("counter", "Sentencias SQL ejecutadas", None),
+    "db_consultas_segundos_total": ("counter", "Tiempo total en sentencias SQL", None),
+    "db_sentencias_en_curso": ("gauge", "Sentencias SQL ejecutándose en este momento", None),
+    "sqlite_conexiones_abiertas": ("gauge", "Conexiones SQLite abiertas (principal y trabajos en lote)", None),
+    "sqlite_bloqueos_total": ("counter", "Sentencias que encontraron la base de datos bloqueada y esperaron", None),
+    "sqlite_espera_bloqueo_segundos_total": ("counter", "Tiempo esperando bloqueos de SQLite, incluido el reintento de la sentencia", None),
+    "sqlite_bloqueos_agotados_total": ("counter", "Sentencias que fallaron con SQLITE_BUSY tras agotar SQLITE_BUSY_TIMEOUT", None),
+    "bcrypt_en_curso": ("gauge", "Operaciones bcrypt en curso", None),
+    "bcrypt_duracion_segundos": ("histogram", "Duración de las operaciones bcrypt", BUCKETS_BCRYPT),
+    "cache_aciertos_total": ("counter", "Aciertos por caché", None),
+    "cache_fallos_total": ("counter", "Fallos por caché", None),
+    "cache_ratio_aciertos": ("gauge", "Proporción de aciertos por caché", None),
+    "eventos_retraso": ("gauge", "Eventos de dominio pendientes de entregar por suscriptor", None),
+}
+
+# Métricas que solo existen con etiquetas; el resto se exporta a 0 antes de su primer valor
+CON_ETIQUETAS = {"http_peticiones_total", "cache_aciertos_total", "cache_fallos_total", "cache_ratio_aciertos", "eventos_retraso"}
+
+Etiquetas = Tuple[Tuple[str, str], ...]
+
+# Contador de sentencias SQL de la petición en curso
+consultas_peticion: ContextVar[Optional[List[int]]] = ContextVar("consultas_peticion", default=None)
+
+class Metricas(object):
+    """Registro de métricas con un fragmento por hilo"""
+
+    def __init__(self):
+        self._local = threading.local()
+        self._fragmentos: List[dict] = []
+        self._lock = threading.Lock()
+        self._recolectores: List[Callable[[], Iterable[Tuple[str, Etiquetas, float]]]] = []
+
+    def _fragmento(self) -> dict:
+        fragmento = getattr(self._local, "fragmento", None)
+        if fragmento is None:
+            fragmento = self._local.fragmento = {}
+            with self._lock:
+                self._fragmentos.append(fragmento)
+        return fragmento
+
+    def incrementar(self, nombre: str, etiquetas: Etiquetas = (), valor: float = 1):
+        fragmento = self._fragmento()
+        clave = (nombre, etiquetas)
+        fragmento[clave] = fragmento.get(clave, 0) + valor
+
+    def observar(self, nombre: str, valor: float, etiquetas: Etiquetas = ()):
+        buckets = DEFINICIONES[nombre][2]
+        fragmento = self._fragmento()
+        clave = (nombre, etiquetas)
+        serie = fragmento.get(clave)
+        if serie is None:
+            # Un contador por bucket, otro para valores mayores que el último y la suma
+            serie = fragmento[clave] = [0] * (len(buckets) + 1) + [0.0]
+        serie[bisect_left(buckets, valor)] += 1
+        serie[-1] += valor
+
+    def registrar_recolector(self, recolector: Callable[[], Iterable[Tuple[str, Etiquetas, float]]]):
+        """Añade una función que aporta valores calculados al exportar (gauges, cachés externas)"""
+        self._recolectores.append(recolector)
+
+    def registrar_cache(self, nombre: str, estadisticas: Callable[[], Tuple[int, int]]):
+        """Publica los aciertos y fallos que devuelve `estadisticas` como los de la caché `nombre`"""
+        def recolector():
+            aciertos, fallos = estadisticas()
+            etiquetas = (("cache", nombre),)
+            return [("cache_aciertos_total", etiquetas, aciertos), ("cache_fallos_total", etiquetas, fallos)]
+        self.registrar_recolector(recolector)
+
+    def _sumar(self) -> Dict[tuple, object]:
+        with self._lock:
+            fragmentos = list(self._fragmentos)
+        totales: Dict[tuple, object] = {}
+        for fragmento in fragmentos:
+            for clave, valor in dict(fragmento).items():
+                if isinstance(valor, list):
+                    acumulado = totales.get(clave)
+                    totales[clave] = list(valor) if acumulado is None else [a + b for a, b in zip(acumulado, valor)]
+                else:
+                    totales[clave] = totales.get(clave, 0) + valor
+        for recolector in self._recolectores:
+            for nombre, etiquetas, valor in recolector():
+                totales[(nombre, etiquetas)] = totales.get((nombre, etiquetas), 0) + valor
+        return totales
+
+    def exportar(self) -> str:
+        """Texto en formato de exposición de Prometheus 0.0.4"""
+        totales = self._sumar()
+        caches = {dict(etiquetas)["cache"] for nombre, etiquetas in totales if nombre == "cache_aciertos_total"}
+        for cache in caches:
+            etiquetas = (("cache", cache),)
+            aciertos = totales.get(("cache_aciertos_total", etiquetas), 0)
+            consultas = aciertos + totales.get(("cache_fallos_total", etiquetas), 0)
+            totales[("cache_ratio_aciertos", etiquetas)] = aciertos / consultas if consultas else 0.0
+
+        por_nombre: Dict[str, List[Tuple[Etiquetas, object]]] = {}
+        for (nombre, etiquetas), valor in totales.items():
+            por_nombre.setdefault(nombre, []).append((etiquetas, valor))
+
+        lineas = []
+        for nombre, (tipo, ayuda, buckets) in DEFINICIONES.items():
+            series = por_nombre.get(nombre)
+            if not series and (tipo == "histogram" or nombre in CON_ETIQUETAS):
+                continue
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, valor in sorted(series or [((), 0)]):
+                if tipo == "histogram":
+                    acumulado = 0
+                    for limite, cantidad in zip(buckets + (float("inf"),), valor[:-1]):
+                        acumulado += cantidad
+                        le = "+Inf" if limite == float("inf") else _numero(limite)
+                        lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', le),))} {acumulado}")
+                    lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(valor[-1])}")
+                    lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {acumulado}")
+                else:
+                    lineas.append(f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}")
+        return "\n".join(lineas) + "\n"
+
+def _etiquetas(etiquetas: Etiquetas) -> str:
+    if not etiquetas:
+        return ""
+    pares = ",".join(
+        f'{clave}="{str(valor).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), chr(92) + "n")}"'
+        for clave, valor in etiquetas
+    )
+    return "{" + pares + "}"
+
+def _numero(valor: float) -> str:
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+# Instancia global de métricas
+metricas = Metricas()
+
+class MiddlewareMetricas(object):
+    """Middleware ASGI que mide duración, estado y sentencias SQL de cada petición"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        estado = [500]
+
+        async def enviar(mensaje):
+            if mensaje["type"] == "http.response.start":
+                estado[0] = mensaje["status"]
+            await send(mensaje)
+
+        consultas = [0]
+        token = consultas_peticion.set(consultas)
+        metricas.incrementar("http_peticiones_en_curso")
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            consultas_peticion.reset(token)
+            metricas.incrementar("http_peticiones_en_curso", valor=-1)
+            etiquetas = (("metodo", scope["method"]), ("ruta", ruta_plantilla(scope)))
+            metricas.incrementar("http_peticiones_total", etiquetas + (("estado", str(estado[0])),))
+            metricas.observar("http_duracion_segundos", duracion, etiquetas)
+            metricas.observar("db_consultas_por_peticion", consultas[0], etiquetas)
@@ -1,13 +1,8 @@
-import sqlite3
+"""Hace opcional reviews.reserva_id (sustituye a app/migrar_reviews.py)"""
+from app.migraciones import reconstruir_tabla
 
-db_path = "database.sqlite"  # Cambia si tu archivo tiene otro nombre
-
-conn = sqlite3.connect(db_path)
-cursor = conn.cursor()
-
-# 1. Crear nueva tabla temporal
-cursor.execute("""
-CREATE TABLE reviews_new (
+REVIEWS_SQL = """
+CREATE TABLE {tabla} (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   reserva_id INTEGER,
   autor_id INTEGER NOT NULL,
@@ -15,6 +10,7 @@ CREATE TABLE reviews_new (
   calificacion INTEGER NOT NULL CHECK(calificacion >= 1 AND calificacion <= 5),
   comentario TEXT,
   fecha_review TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  -- Categorías específicas para turismo
   organizacion INTEGER CHECK(organizacion >= 1 AND organizacion <= 5),
   comunicacion INTEGER CHECK(comunicacion >= 1 AND comunicacion <= 5),
   actividades INTEGER CHECK(actividades >= 1 AND actividades <= 5),
@@ -25,18 +21,11 @@ CREATE TABLE reviews_new (
   FOREIGN KEY (autor_id) REFERENCES usuarios(id) ON DELETE CASCADE,
   FOREIGN KEY (paquete_id) REFERENCES paquetes_turisticos(id) ON DELETE CASCADE
 )
-""")
-
-# 2. Copiar los datos
-cursor.execute("INSERT INTO reviews_new SELECT * FROM reviews")
-
-# 3. Eliminar la tabla original
-cursor.execute("DROP TABLE reviews")
-
-# 4. Renombrar la tabla nueva
-cursor.execute("ALTER TABLE reviews_new RENAME TO reviews")
-
-conn.commit()
-conn.close()
-
-print("Migración completada. Ahora reserva_id es opcional.")
\ No newline at end of file
+"""
+
+def aplicar(connection):
+    columnas = {fila[1]: fila[3] for fila in connection.execute("PRAGMA table_info(reviews)")}
+    # Bases ya migradas a mano con migrar_reviews.py
+    if not columnas.get("reserva_id"):
+        return
+    reconstruir_tabla(connection, "reviews", REVIEWS_SQL, "Migración 0002 reviews")
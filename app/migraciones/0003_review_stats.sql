@@ -0,0 +1,221 @@
+-- Agregados de reviews por paquete turístico, mantenidos por triggers.
+-- La fila con paquete_id = 0 guarda el agregado global de todas las reviews.
+CREATE TABLE IF NOT EXISTS review_stats (
+  paquete_id INTEGER PRIMARY KEY,
+  total INTEGER NOT NULL DEFAULT 0,
+  suma_calificacion INTEGER NOT NULL DEFAULT 0,
+  estrellas_1 INTEGER NOT NULL DEFAULT 0,
+  estrellas_2 INTEGER NOT NULL DEFAULT 0,
+  estrellas_3 INTEGER NOT NULL DEFAULT 0,
+  estrellas_4 INTEGER NOT NULL DEFAULT 0,
+  estrellas_5 INTEGER NOT NULL DEFAULT 0,
+  suma_organizacion INTEGER NOT NULL DEFAULT 0,
+  total_organizacion INTEGER NOT NULL DEFAULT 0,
+  suma_comunicacion INTEGER NOT NULL DEFAULT 0,
+  total_comunicacion INTEGER NOT NULL DEFAULT 0,
+  suma_actividades INTEGER NOT NULL DEFAULT 0,
+  total_actividades INTEGER NOT NULL DEFAULT 0,
+  suma_guia INTEGER NOT NULL DEFAULT 0,
+  total_guia INTEGER NOT NULL DEFAULT 0,
+  suma_seguridad INTEGER NOT NULL DEFAULT 0,
+  total_seguridad INTEGER NOT NULL DEFAULT 0,
+  suma_valor INTEGER NOT NULL DEFAULT 0,
+  total_valor INTEGER NOT NULL DEFAULT 0,
+  fecha_actualizacion TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_review_stats_insert AFTER INSERT ON reviews
+BEGIN
+  INSERT OR IGNORE INTO review_stats (paquete_id) VALUES (NEW.paquete_id), (0);
+  UPDATE review_stats SET
+    total = total + 1,
+    suma_calificacion = suma_calificacion + NEW.calificacion,
+    estrellas_1 = estrellas_1 + (NEW.calificacion = 1),
+    estrellas_2 = estrellas_2 + (NEW.calificacion = 2),
+    estrellas_3 = estrellas_3 + (NEW.calificacion = 3),
+    estrellas_4 = estrellas_4 + (NEW.calificacion = 4),
+    estrellas_5 = estrellas_5 + (NEW.calificacion = 5),
+    suma_organizacion = suma_organizacion + COALESCE(NEW.organizacion, 0),
+    total_organizacion = total_organizacion + (NEW.organizacion IS NOT NULL),
+    suma_comunicacion = suma_comunicacion + COALESCE(NEW.comunicacion, 0),
+    total_comunicacion = total_comunicacion + (NEW.comunicacion IS NOT NULL),
+    suma_actividades = suma_actividades + COALESCE(NEW.actividades, 0),
+    total_actividades = total_actividades + (NEW.actividades IS NOT NULL),
+    suma_guia = suma_guia + COALESCE(NEW.guia, 0),
+    total_guia = total_guia + (NEW.guia IS NOT NULL),
+    suma_seguridad = suma_seguridad + COALESCE(NEW.seguridad, 0),
+    total_seguridad = total_seguridad + (NEW.seguridad IS NOT NULL),
+    suma_valor = suma_valor + COALESCE(NEW.valor, 0),
+    total_valor = total_valor + (NEW.valor IS NOT NULL),
+    fecha_actualizacion = CURRENT_TIMESTAMP
+  WHERE paquete_id IN (NEW.paquete_id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_review_stats_update AFTER UPDATE ON reviews
+BEGIN
+  UPDATE review_stats SET
+    total = total - 1,
+    suma_calificacion = suma_calificacion - OLD.calificacion,
+    estrellas_1 = estrellas_1 - (OLD.calificacion = 1),
+    estrellas_2 = estrellas_2 - (OLD.calificacion = 2),
+    estrellas_3 = estrellas_3 - (OLD.calificacion = 3),
+    estrellas_4 = estrellas_4 - (OLD.calificacion = 4),
+    estrellas_5 = estrellas_5 - (OLD.calificacion = 5),
+    suma_organizacion = suma_organizacion - COALESCE(OLD.organizacion, 0),
+    total_organizacion = total_organizacion - (OLD.organizacion IS NOT NULL),
+    suma_comunicacion = suma_comunicacion - COALESCE(OLD.comunicacion, 0),
+    total_comunicacion = total_comunicacion - (OLD.comunicacion IS NOT NULL),
+    suma_actividades = suma_actividades - COALESCE(OLD.actividades, 0),
+    total_actividades = total_actividades - (OLD.actividades IS NOT NULL),
+    suma_guia = suma_guia - COALESCE(OLD.guia, 0),
+    total_guia = total_guia - (OLD.guia IS NOT NULL),
+    suma_seguridad = suma_seguridad - COALESCE(OLD.seguridad, 0),
+    total_seguridad = total_seguridad - (OLD.seguridad IS NOT NULL),
+    suma_valor = suma_valor - COALESCE(OLD.valor, 0),
+    total_valor = total_valor - (OLD.valor IS NOT NULL),
+    fecha_actualizacion = CURRENT_TIMESTAMP
+  WHERE paquete_id IN (OLD.paquete_id, 0);
+  INSERT OR IGNORE INTO review_stats (paquete_id) VALUES (NEW.paquete_id);
+  UPDATE review_stats SET
+    total = total + 1,
+    suma_calificacion = suma_calificacion + NEW.calificacion,
+    estrellas_1 = estrellas_1 + (NEW.calificacion = 1),
+    estrellas_2 = estrellas_2 + (NEW.calificacion = 2),
+    estrellas_3 = estrellas_3 + (NEW.calificacion = 3),
+    estrellas_4 = estrellas_4 + (NEW.calificacion = 4),
+    estrellas_5 = estrellas_5 + (NEW.calificacion = 5),
+    suma_organizacion = suma_organizacion + COALESCE(NEW.organizacion, 0),
+    total_organizacion = total_organizacion + (NEW.organizacion IS NOT NULL),
+    suma_comunicacion = suma_comunicacion + COALESCE(NEW.comunicacion, 0),
+    total_comunicacion = total_comunicacion + (NEW.comunicacion IS NOT NULL),
+    suma_actividades = suma_actividades + COALESCE(NEW.actividades, 0),
+    total_actividades = total_actividades + (NEW.actividades IS NOT NULL),
+    suma_guia = suma_guia + COALESCE(NEW.guia, 0),
+    total_guia = total_guia + (NEW.guia IS NOT NULL),
+    suma_seguridad = suma_seguridad + COALESCE(NEW.seguridad, 0),
+    total_seguridad = total_seguridad + (NEW.seguridad IS NOT NULL),
+    suma_valor = suma_valor + COALESCE(NEW.valor, 0),
+    total_valor = total_valor + (NEW.valor IS NOT NULL),
+    fecha_actualizacion = CURRENT_TIMESTAMP
+  WHERE paquete_id IN (NEW.paquete_id, 0);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_review_stats_delete AFTER DELETE ON reviews
+BEGIN
+  UPDATE review_stats SET
+    total = total - 1,
+    suma_calificacion = suma_calificacion - OLD.calificacion,
+    estrellas_1 = estrellas_1 - (OLD.calificacion = 1),
+    estrellas_2 = estrellas_2 - (OLD.calificacion = 2),
+    estrellas_3 = estrellas_3 - (OLD.calificacion = 3),
+    estrellas_4 = estrellas_4 - (OLD.calificacion = 4),
+    estrellas_5 = estrellas_5 - (OLD.calificacion = 5),
+    suma_organizacion = suma_organizacion - COALESCE(OLD.organizacion, 0),
+    total_organizacion = total_organizacion - (OLD.organizacion IS NOT NULL),
+    suma_comunicacion = suma_comunicacion - COALESCE(OLD.comunicacion, 0),
+    total_comunicacion = total_comunicacion - (OLD.comunicacion IS NOT NULL),
+    suma_actividades = suma_actividades - COALESCE(OLD.actividades, 0),
+    total_actividades = total_actividades - (OLD.actividades IS NOT NULL),
+    suma_guia = suma_guia - COALESCE(OLD.guia, 0),
+    total_guia = total_guia - (OLD.guia IS NOT NULL),
+    suma_seguridad = suma_seguridad - COALESCE(OLD.seguridad, 0),
+    total_seguridad = total_seguridad - (OLD.seguridad IS NOT NULL),
+    suma_valor = suma_valor - COALESCE(OLD.valor, 0),
+    total_valor = total_valor - (OLD.valor IS NOT NULL),
+    fecha_actualizacion = CURRENT_TIMESTAMP
+  WHERE paquete_id IN (OLD.paquete_id, 0);
+END;
+
+-- Carga inicial de los agregados (solo si todavía no existe la fila global)
+INSERT INTO review_stats (
+  paquete_id,
+  total,
+  suma_calificacion,
+  estrellas_1,
+  estrellas_2,
+  estrellas_3,
+  estrellas_4,
+  estrellas_5,
+  suma_organizacion,
+  total_organizacion,
+  suma_comunicacion,
+  total_comunicacion,
+  suma_actividades,
+  total_actividades,
+  suma_guia,
+  total_guia,
+  suma_seguridad,
+  total_seguridad,
+  suma_valor,
+  total_valor
+)
+SELECT
+  paquete_id,
+  COUNT(*),
+  TOTAL(calificacion),
+  TOTAL(calificacion = 1),
+  TOTAL(calificacion = 2),
+  TOTAL(calificacion = 3),
+  TOTAL(calificacion = 4),
+  TOTAL(calificacion = 5),
+  TOTAL(organizacion),
+  COUNT(organizacion),
+  TOTAL(comunicacion),
+  COUNT(comunicacion),
+  TOTAL(actividades),
+  COUNT(actividades),
+  TOTAL(guia),
+  COUNT(guia),
+  TOTAL(seguridad),
+  COUNT(seguridad),
+  TOTAL(valor),
+  COUNT(valor)
+FROM reviews
+WHERE NOT EXISTS (SELECT 1 FROM review_stats WHERE paquete_id = 0)
+GROUP BY paquete_id;
+
+INSERT OR IGNORE INTO review_stats (
+  paquete_id,
+  total,
+  suma_calificacion,
+  estrellas_1,
+  estrellas_2,
+  estrellas_3,
+  estrellas_4,
+  estrellas_5,
+  suma_organizacion,
+  total_organizacion,
+  suma_comunicacion,
+  total_comunicacion,
+  suma_actividades,
+  total_actividades,
+  suma_guia,
+  total_guia,
+  suma_seguridad,
+  total_seguridad,
+  suma_valor,
+  total_valor
+)
+SELECT
+  0,
+  COUNT(*),
+  TOTAL(calificacion),
+  TOTAL(calificacion = 1),
+  TOTAL(calificacion = 2),
+  TOTAL(calificacion = 3),
+  TOTAL(calificacion = 4),
+  TOTAL(calificacion = 5),
+  TOTAL(organizacion),
+  COUNT(organizacion),
+  TOTAL(comunicacion),
+  COUNT(comunicacion),
+  TOTAL(actividades),
+  COUNT(actividades),
+  TOTAL(guia),
+  COUNT(guia),
+  TOTAL(seguridad),
+  COUNT(seguridad),
+  TOTAL(valor),
+  COUNT(valor)
+FROM reviews
+WHERE NOT EXISTS (SELECT 1 FROM review_stats WHERE paquete_id = 0);
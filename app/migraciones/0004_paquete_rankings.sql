@@ -0,0 +1,37 @@
+-- Ranking precalculado de paquetes turísticos (recalculado por un job periódico).
+-- Cada paquete tiene su fila desde la creación para que los listados ordenados
+-- puedan recorrer directamente los índices de puntuación.
+CREATE TABLE IF NOT EXISTS paquete_rankings (
+  paquete_id INTEGER PRIMARY KEY,
+  esta_activo BOOLEAN NOT NULL DEFAULT 1,
+  total_reservas INTEGER NOT NULL DEFAULT 0,
+  reservas_recientes INTEGER NOT NULL DEFAULT 0,
+  total_favoritos INTEGER NOT NULL DEFAULT 0,
+  calificacion_bayesiana REAL,
+  puntuacion_popularidad REAL NOT NULL DEFAULT 0,
+  puntuacion_calificacion REAL NOT NULL DEFAULT 0,
+  fecha_calculo TIMESTAMP,
+  FOREIGN KEY (paquete_id) REFERENCES paquetes_turisticos(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_rankings_popularidad ON paquete_rankings(esta_activo, puntuacion_popularidad DESC);
+CREATE INDEX IF NOT EXISTS idx_rankings_calificacion ON paquete_rankings(esta_activo, puntuacion_calificacion DESC);
+CREATE INDEX IF NOT EXISTS idx_paquetes_activos_fecha ON paquetes_turisticos(esta_activo, fecha_creacion DESC);
+CREATE INDEX IF NOT EXISTS idx_paquetes_activos_precio ON paquetes_turisticos(esta_activo, precio_por_persona);
+
+CREATE TRIGGER IF NOT EXISTS trg_rankings_paquete_insert AFTER INSERT ON paquetes_turisticos
+BEGIN
+  INSERT OR IGNORE INTO paquete_rankings (paquete_id, esta_activo)
+  VALUES (NEW.id, COALESCE(NEW.esta_activo, 1));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_rankings_paquete_estado AFTER UPDATE OF esta_activo ON paquetes_turisticos
+BEGIN
+  UPDATE paquete_rankings SET esta_activo = COALESCE(NEW.esta_activo, 1)
+  WHERE paquete_id = NEW.id;
+END;
+
+INSERT OR IGNORE INTO paquete_rankings (paquete_id, esta_activo)
+SELECT id, COALESCE(esta_activo, 1)
+FROM paquetes_turisticos
+WHERE NOT EXISTS (SELECT 1 FROM paquete_rankings);
@@ -0,0 +1,20 @@
+-- Última ejecución de los trabajos periódicos incrementales
+CREATE TABLE IF NOT EXISTS trabajos_estado (
+  nombre TEXT PRIMARY KEY,
+  ultima_ejecucion TIMESTAMP,
+  ultima_completa TIMESTAMP,
+  progreso TEXT -- JSON con las marcas de agua del trabajo
+);
+
+-- Vecinos más similares de cada paquete turístico (recalculados en lote)
+CREATE TABLE IF NOT EXISTS paquetes_similares (
+  paquete_id INTEGER NOT NULL,
+  posicion INTEGER NOT NULL,
+  similar_id INTEGER NOT NULL,
+  similitud REAL NOT NULL,
+  PRIMARY KEY (paquete_id, posicion),
+  FOREIGN KEY (paquete_id) REFERENCES paquetes_turisticos(id) ON DELETE CASCADE,
+  FOREIGN KEY (similar_id) REFERENCES paquetes_turisticos(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_similares_similar ON paquetes_similares(similar_id);
@@ -0,0 +1,12 @@
+-- Paquetes reservados o marcados como favoritos por los mismos usuarios
+CREATE TABLE IF NOT EXISTS paquetes_coocurrencia (
+  paquete_id INTEGER NOT NULL,
+  posicion INTEGER NOT NULL,
+  relacionado_id INTEGER NOT NULL,
+  puntuacion REAL NOT NULL,
+  PRIMARY KEY (paquete_id, posicion),
+  FOREIGN KEY (paquete_id) REFERENCES paquetes_turisticos(id) ON DELETE CASCADE,
+  FOREIGN KEY (relacionado_id) REFERENCES paquetes_turisticos(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_coocurrencia_relacionado ON paquetes_coocurrencia(relacionado_id);
@@ -0,0 +1,6 @@
+-- Índice de cobertura para el conteo de facetas de la búsqueda de paquetes
+CREATE INDEX IF NOT EXISTS idx_paquetes_facetas ON paquetes_turisticos(
+  esta_activo, tipo_paquete, nivel_dificultad, pais_destino, precio_por_persona,
+  incluye_transporte, incluye_alojamiento, incluye_comidas, incluye_guia,
+  ciudad_destino, duracion_dias, capacidad_maxima
+);
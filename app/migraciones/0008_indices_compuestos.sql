@@ -0,0 +1,13 @@
+-- Índices compuestos para los filtros y ordenamientos de los repositories
+-- (detectados con verificar_planes.py)
+CREATE INDEX IF NOT EXISTS idx_imagenes_paquete_orden ON imagenes_paquetes(paquete_id, orden, es_principal DESC);
+CREATE INDEX IF NOT EXISTS idx_paquetes_operador_fecha ON paquetes_turisticos(operador_id, esta_activo, fecha_creacion DESC);
+CREATE INDEX IF NOT EXISTS idx_reservas_turista_fecha ON reservas(turista_id, fecha_creacion DESC);
+CREATE INDEX IF NOT EXISTS idx_reviews_autor_fecha ON reviews(autor_id, fecha_review DESC);
+CREATE INDEX IF NOT EXISTS idx_reviews_paquete_fecha ON reviews(paquete_id, fecha_review DESC);
+CREATE INDEX IF NOT EXISTS idx_favoritos_usuario_fecha ON favoritos(usuario_id, fecha_agregado DESC);
+-- Filtros poco selectivos de la búsqueda con el orden por defecto (recientes):
+-- el índice da las filas ya ordenadas y el LIMIT corta sin ordenar el subconjunto
+CREATE INDEX IF NOT EXISTS idx_paquetes_activos_tipo_fecha ON paquetes_turisticos(esta_activo, tipo_paquete, fecha_creacion DESC);
+CREATE INDEX IF NOT EXISTS idx_paquetes_activos_nivel_fecha ON paquetes_turisticos(esta_activo, nivel_dificultad, fecha_creacion DESC);
+CREATE INDEX IF NOT EXISTS idx_paquetes_activos_pais_fecha ON paquetes_turisticos(esta_activo, pais_destino, fecha_creacion DESC);
@@ -0,0 +1,112 @@
+-- Representación compacta ("tarjeta") de cada paquete para las rejillas del catálogo,
+-- mantenida por triggers en cada escritura de paquetes, reviews e imágenes.
+-- idx_tarjetas_activas cubre todas las columnas de la tarjeta, de modo que el
+-- listado es un único recorrido del índice sin acceder a la tabla.
+-- La imagen de la tarjeta es la primera que sea una URL: las imágenes antiguas
+-- guardadas en base64 dentro de url_imagen no caben en una tarjeta compacta.
+CREATE TABLE IF NOT EXISTS paquetes_tarjetas (
+  paquete_id INTEGER PRIMARY KEY,
+  esta_activo BOOLEAN NOT NULL DEFAULT 1,
+  fecha_creacion TIMESTAMP,
+  titulo TEXT NOT NULL,
+  ciudad_destino TEXT,
+  pais_destino TEXT,
+  precio_por_persona REAL,
+  duracion_dias INTEGER,
+  calificacion_promedio REAL,
+  total_reviews INTEGER NOT NULL DEFAULT 0,
+  imagen_principal TEXT,
+  FOREIGN KEY (paquete_id) REFERENCES paquetes_turisticos(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_tarjetas_activas ON paquetes_tarjetas(
+  esta_activo, fecha_creacion DESC, paquete_id, titulo, ciudad_destino, pais_destino,
+  precio_por_persona, duracion_dias, calificacion_promedio, total_reviews, imagen_principal
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_tarjetas_paquete_insert AFTER INSERT ON paquetes_turisticos
+BEGIN
+  INSERT OR REPLACE INTO paquetes_tarjetas (
+    paquete_id, esta_activo, fecha_creacion, titulo, ciudad_destino, pais_destino,
+    precio_por_persona, duracion_dias
+  ) VALUES (
+    NEW.id, COALESCE(NEW.esta_activo, 1), NEW.fecha_creacion, NEW.titulo, NEW.ciudad_destino,
+    NEW.pais_destino, NEW.precio_por_persona, NEW.duracion_dias
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tarjetas_paquete_update AFTER UPDATE OF
+  esta_activo, fecha_creacion, titulo, ciudad_destino, pais_destino, precio_por_persona, duracion_dias
+  ON paquetes_turisticos
+BEGIN
+  UPDATE paquetes_tarjetas SET
+    esta_activo = COALESCE(NEW.esta_activo, 1),
+    fecha_creacion = NEW.fecha_creacion,
+    titulo = NEW.titulo,
+    ciudad_destino = NEW.ciudad_destino,
+    pais_destino = NEW.pais_destino,
+    precio_por_persona = NEW.precio_por_persona,
+    duracion_dias = NEW.duracion_dias
+  WHERE paquete_id = NEW.id;
+END;
+
+-- review_stats ya se actualiza con cada review; la tarjeta copia su promedio
+CREATE TRIGGER IF NOT EXISTS trg_tarjetas_review_stats AFTER UPDATE ON review_stats
+WHEN NEW.paquete_id != 0
+BEGIN
+  UPDATE paquetes_tarjetas SET
+    calificacion_promedio = CASE WHEN NEW.total > 0 THEN CAST(NEW.suma_calificacion AS REAL) / NEW.total END,
+    total_reviews = NEW.total
+  WHERE paquete_id = NEW.paquete_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tarjetas_imagen_insert AFTER INSERT ON imagenes_paquetes
+BEGIN
+  UPDATE paquetes_tarjetas SET imagen_principal = (
+    SELECT url_imagen FROM imagenes_paquetes WHERE paquete_id = NEW.paquete_id
+      AND (url_imagen LIKE 'http%' OR url_imagen LIKE '/uploads/%')
+    ORDER BY orden, es_principal DESC LIMIT 1
+  ) WHERE paquete_id = NEW.paquete_id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tarjetas_imagen_update AFTER UPDATE ON imagenes_paquetes
+BEGIN
+  UPDATE paquetes_tarjetas SET imagen_principal = (
+    SELECT i.url_imagen FROM imagenes_paquetes i WHERE i.paquete_id = paquetes_tarjetas.paquete_id
+      AND (i.url_imagen LIKE 'http%' OR i.url_imagen LIKE '/uploads/%')
+    ORDER BY i.orden, i.es_principal DESC LIMIT 1
+  ) WHERE paquete_id IN (OLD.paquete_id, NEW.paquete_id);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tarjetas_imagen_delete AFTER DELETE ON imagenes_paquetes
+BEGIN
+  UPDATE paquetes_tarjetas SET imagen_principal = (
+    SELECT url_imagen FROM imagenes_paquetes WHERE paquete_id = OLD.paquete_id
+      AND (url_imagen LIKE 'http%' OR url_imagen LIKE '/uploads/%')
+    ORDER BY orden, es_principal DESC LIMIT 1
+  ) WHERE paquete_id = OLD.paquete_id;
+END;
+
+-- Carga inicial
+INSERT OR IGNORE INTO paquetes_tarjetas (
+  paquete_id, esta_activo, fecha_creacion, titulo, ciudad_destino, pais_destino,
+  precio_por_persona, duracion_dias, calificacion_promedio, total_reviews, imagen_principal
+)
+SELECT
+  p.id,
+  COALESCE(p.esta_activo, 1),
+  p.fecha_creacion,
+  p.titulo,
+  p.ciudad_destino,
+  p.pais_destino,
+  p.precio_por_persona,
+  p.duracion_dias,
+  CASE WHEN s.total > 0 THEN CAST(s.suma_calificacion AS REAL) / s.total END,
+  COALESCE(s.total, 0),
+  (
+    SELECT url_imagen FROM imagenes_paquetes i WHERE i.paquete_id = p.id
+      AND (i.url_imagen LIKE 'http%' OR i.url_imagen LIKE '/uploads/%')
+    ORDER BY i.orden, i.es_principal DESC LIMIT 1
+  )
+FROM paquetes_turisticos p
+LEFT JOIN review_stats s ON s.paquete_id = p.id;
@@ -0,0 +1,32 @@
+-- Cola persistente de trabajos en segundo plano (app.trabajos).
+-- Los instantes son segundos desde epoch (REAL) para comparar sin conversiones.
+CREATE TABLE IF NOT EXISTS trabajos (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  tipo TEXT NOT NULL,
+  argumentos TEXT NOT NULL DEFAULT '{}',
+  estado TEXT NOT NULL DEFAULT 'pendiente' CHECK (estado IN ('pendiente', 'en_curso', 'completado', 'fallido')),
+  intentos INTEGER NOT NULL DEFAULT 0,
+  max_intentos INTEGER NOT NULL,
+  ejecutar_despues REAL NOT NULL,
+  clave_idempotencia TEXT UNIQUE,
+  bloqueado_por TEXT,
+  bloqueado_hasta REAL,
+  error TEXT,
+  creado REAL NOT NULL,
+  actualizado REAL NOT NULL
+);
+
+-- Siguiente trabajo listo: recorrido del índice parcial en orden de ejecución
+CREATE INDEX IF NOT EXISTS idx_trabajos_pendientes ON trabajos(ejecutar_despues) WHERE estado = 'pendiente';
+-- Trabajos cuyo proceso murió sin terminarlos (bloqueo vencido)
+CREATE INDEX IF NOT EXISTS idx_trabajos_en_curso ON trabajos(bloqueado_hasta) WHERE estado = 'en_curso';
+-- Purga de trabajos terminados
+CREATE INDEX IF NOT EXISTS idx_trabajos_terminados ON trabajos(actualizado) WHERE estado IN ('completado', 'fallido');
+
+-- Un único proceso (el líder) encola los trabajos periódicos; lo decide un
+-- arrendamiento que renueva mientras vive y que otro toma cuando vence.
+CREATE TABLE IF NOT EXISTS trabajos_lider (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  propietario TEXT NOT NULL,
+  expira REAL NOT NULL
+);
@@ -0,0 +1,110 @@
+-- Outbox de eventos de dominio (app.eventos). Los triggers añaden el evento en
+-- la misma transacción que la escritura, sea cual sea el código que la hace:
+-- si la escritura se confirma, su evento también, y en el mismo orden.
+CREATE TABLE IF NOT EXISTS eventos (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  tipo TEXT NOT NULL,
+  entidad_id INTEGER NOT NULL,
+  datos TEXT NOT NULL DEFAULT '{}',
+  -- Segundos desde epoch, como en trabajos
+  fecha REAL NOT NULL DEFAULT ((julianday('now') - 2440587.5) * 86400.0)
+);
+
+CREATE INDEX IF NOT EXISTS idx_eventos_fecha ON eventos(fecha);
+
+-- Último evento entregado a cada suscriptor compartido
+CREATE TABLE IF NOT EXISTS eventos_suscriptores (
+  nombre TEXT PRIMARY KEY,
+  ultimo_id INTEGER NOT NULL DEFAULT 0,
+  actualizado REAL
+);
+
+-- Reservas
+CREATE TRIGGER IF NOT EXISTS trg_eventos_reserva_insert AFTER INSERT ON reservas
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('reserva.creada', NEW.id, json_object(
+    'paquete_id', NEW.paquete_id, 'turista_id', NEW.turista_id, 'estado', NEW.estado,
+    'fecha_inicio', NEW.fecha_inicio, 'fecha_fin', NEW.fecha_fin, 'numero_personas', NEW.numero_personas
+  ));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_eventos_reserva_update AFTER UPDATE ON reservas
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES (
+    CASE WHEN NEW.estado IS NOT OLD.estado THEN 'reserva.estado_cambiado' ELSE 'reserva.actualizada' END,
+    NEW.id,
+    json_object(
+      'paquete_id', NEW.paquete_id, 'turista_id', NEW.turista_id, 'estado', NEW.estado,
+      'estado_anterior', OLD.estado, 'fecha_inicio', NEW.fecha_inicio, 'fecha_fin', NEW.fecha_fin,
+      'numero_personas', NEW.numero_personas
+    )
+  );
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_eventos_reserva_delete AFTER DELETE ON reservas
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('reserva.eliminada', OLD.id, json_object(
+    'paquete_id', OLD.paquete_id, 'turista_id', OLD.turista_id, 'estado', OLD.estado
+  ));
+END;
+
+-- Paquetes turísticos
+CREATE TRIGGER IF NOT EXISTS trg_eventos_paquete_insert AFTER INSERT ON paquetes_turisticos
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('paquete.creado', NEW.id, json_object(
+    'operador_id', NEW.operador_id, 'esta_activo', NEW.esta_activo, 'precio_por_persona', NEW.precio_por_persona
+  ));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_eventos_paquete_update AFTER UPDATE ON paquetes_turisticos
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('paquete.actualizado', NEW.id, json_object(
+    'operador_id', NEW.operador_id, 'esta_activo', NEW.esta_activo, 'esta_activo_anterior', OLD.esta_activo,
+    'precio_por_persona', NEW.precio_por_persona, 'precio_anterior', OLD.precio_por_persona
+  ));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_eventos_paquete_delete AFTER DELETE ON paquetes_turisticos
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('paquete.eliminado', OLD.id, json_object(
+    'operador_id', OLD.operador_id
+  ));
+END;
+
+-- Reviews
+CREATE TRIGGER IF NOT EXISTS trg_eventos_review_insert AFTER INSERT ON reviews
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('review.creada', NEW.id, json_object(
+    'paquete_id', NEW.paquete_id, 'autor_id', NEW.autor_id, 'reserva_id', NEW.reserva_id, 'calificacion', NEW.calificacion
+  ));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_eventos_review_update AFTER UPDATE ON reviews
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('review.actualizada', NEW.id, json_object(
+    'paquete_id', NEW.paquete_id, 'autor_id', NEW.autor_id, 'calificacion', NEW.calificacion,
+    'calificacion_anterior', OLD.calificacion
+  ));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_eventos_review_delete AFTER DELETE ON reviews
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('review.eliminada', OLD.id, json_object(
+    'paquete_id', OLD.paquete_id, 'autor_id', OLD.autor_id, 'calificacion', OLD.calificacion
+  ));
+END;
+
+-- Favoritos
+CREATE TRIGGER IF NOT EXISTS trg_eventos_favorito_insert AFTER INSERT ON favoritos
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('favorito.agregado', NEW.id, json_object(
+    'paquete_id', NEW.paquete_id, 'usuario_id', NEW.usuario_id
+  ));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_eventos_favorito_delete AFTER DELETE ON favoritos
+BEGIN
+  INSERT INTO eventos (tipo, entidad_id, datos) VALUES ('favorito.eliminado', OLD.id, json_object(
+    'paquete_id', OLD.paquete_id, 'usuario_id', OLD.usuario_id
+  ));
+END;
@@ -0,0 +1,258 @@
+"""Migraciones versionadas del esquema SQLite.
+
+Cada migración es un archivo `NNNN_nombre.sql` o `NNNN_nombre.py` en este
+directorio. La última versión aplicada se guarda en `PRAGMA user_version`, de
+modo que comprobar si hay migraciones pendientes al arrancar es una sola
+lectura de la cabecera de la base de datos.
+
+Las migraciones SQL se ejecutan en una única transacción BEGIN IMMEDIATE
+junto con el cambio de versión, y la versión se vuelve a leer dentro de esa
+transacción: con varios workers arrancando a la vez sobre la misma base, el
+que llega segundo ve la migración ya aplicada y no la repite. Las migraciones
+Python definen `aplicar(connection)` y pueden usar `reconstruir_tabla` /
+`copiar_en_lotes` para trabajar en lotes cortos sin bloquear a los escritores
+durante toda la migración; como confirman por lotes, no caben en una
+transacción, así que todo el proceso de migración se serializa además con un
+bloqueo de archivo junto a la base de datos. Deben poder repetirse si se
+interrumpen antes de registrar la versión.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence
+import importlib.util
+import logging
+import re
+import sqlite3
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo queda la comprobación dentro de BEGIN IMMEDIATE
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DIRECTORIO_MIGRACIONES = Path(__file__).parent
+# Filas copiadas por transacción y pausa entre lotes para dejar pasar a los escritores
+TAMANO_LOTE = 5000
+PAUSA_ENTRE_LOTES = 0.01
+
+_PATRON_ARCHIVO = re.compile(r"^(\d{4})_(\w+)\.(sql|py)$")
+
+class Migracion(object):
+    def __init__(self, version: int, nombre: str, ruta: Path):
+        self.version = version
+        self.nombre = nombre
+        self.ruta = ruta
+
+    def __repr__(self) -> str:
+        return f"{self.version:04d}_{self.nombre}"
+
+def cargar_migraciones() -> List[Migracion]:
+    """Migraciones disponibles ordenadas por versión"""
+    migraciones = []
+    for ruta in DIRECTORIO_MIGRACIONES.iterdir():
+        coincidencia = _PATRON_ARCHIVO.match(ruta.name)
+        if coincidencia:
+            migraciones.append(Migracion(int(coincidencia.group(1)), coincidencia.group(2), ruta))
+    migraciones.sort(key=lambda migracion: migracion.version)
+    versiones = [migracion.version for migracion in migraciones]
+    if len(set(versiones)) != len(versiones):
+        raise RuntimeError(f"Versiones de migración duplicadas: {versiones}")
+    return migraciones
+
+MIGRACIONES = cargar_migraciones()
+ULTIMA_VERSION = MIGRACIONES[-1].version if MIGRACIONES else 0
+
+def version_actual(connection: sqlite3.Connection) -> int:
+    return connection.execute("PRAGMA user_version").fetchone()[0]
+
+def hay_migraciones_pendientes(connection: sqlite3.Connection) -> bool:
+    """Comprobación en tiempo constante: compara user_version con la última migración"""
+    return version_actual(connection) < ULTIMA_VERSION
+
+def _tabla_existe(connection: sqlite3.Connection, tabla: str) -> bool:
+    return connection.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (tabla,)
+    ).fetchone() is not None
+
+def _sentencias(script: str) -> Iterator[str]:
+    """Sentencias completas de un script SQL (los cuerpos de trigger incluyen ';')"""
+    sentencia = ""
+    for trozo in script.split(";"):
+        sentencia += trozo + ";"
+        if sqlite3.complete_statement(sentencia):
+            yield sentencia
+            sentencia = ""
+
+@contextmanager
+def _bloqueo_escritura(connection: sqlite3.Connection) -> Iterator[int]:
+    """BEGIN IMMEDIATE y la versión leída ya con el bloqueo de escritura tomado"""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield version_actual(connection)
+        connection.commit()
+    except BaseException:
+        connection.rollback()
+        raise
+
+@contextmanager
+def _bloqueo_migraciones(connection: sqlite3.Connection) -> Iterator[None]:
+    """Bloqueo exclusivo entre procesos mientras se migra (archivo <base>.migraciones.lock)"""
+    ruta = connection.execute("PRAGMA database_list").fetchone()[2]
+    if fcntl is None or not ruta:
+        yield
+        return
+    with open(f"{ruta}.migraciones.lock", "a") as archivo:
+        fcntl.flock(archivo.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(archivo.fileno(), fcntl.LOCK_UN)
+
+def _aplicar_sql(connection: sqlite3.Connection, migracion: Migracion) -> bool:
+    """Aplica la migración si sigue pendiente dentro de la transacción; devuelve si la aplicó"""
+    script = migracion.ruta.read_text(encoding="utf-8")
+    with _bloqueo_escritura(connection) as version:
+        if version >= migracion.version:
+            return False
+        # executescript confirmaría la transacción abierta: sentencia a sentencia
+        for sentencia in _sentencias(script):
+            connection.execute(sentencia)
+        connection.execute(f"PRAGMA user_version = {migracion.version}")
+    return True
+
+def _aplicar_python(connection: sqlite3.Connection, migracion: Migracion) -> bool:
+    if version_actual(connection) >= migracion.version:
+        return False
+    spec = importlib.util.spec_from_file_location(f"app.migraciones.m{migracion}", migracion.ruta)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    modulo.aplicar(connection)
+    with _bloqueo_escritura(connection):
+        connection.execute(f"PRAGMA user_version = {migracion.version}")
+    return True
+
+def aplicar_migraciones(connection: sqlite3.Connection) -> int:
+    """Aplica en orden las migraciones pendientes y devuelve la versión final"""
+    if version_actual(connection) >= ULTIMA_VERSION:
+        return version_actual(connection)
+
+    with _bloqueo_migraciones(connection):
+        # Bases creadas con el antiguo database.sql: el esquema inicial ya existe
+        with _bloqueo_escritura(connection) as version:
+            if version == 0 and _tabla_existe(connection, "usuarios"):
+                logger.info("Esquema existente sin versión: se marca el esquema inicial como aplicado")
+                connection.execute("PRAGMA user_version = 1")
+
+        for migracion in MIGRACIONES:
+            inicio = time.monotonic()
+            if migracion.ruta.suffix == ".sql":
+                aplicada = _aplicar_sql(connection, migracion)
+            else:
+                aplicada = _aplicar_python(connection, migracion)
+            if aplicada:
+                logger.info(f"Migración {migracion} aplicada en {time.monotonic() - inicio:.2f}s")
+        return version_actual(connection)
+
+def copiar_en_lotes(connection: sqlite3.Connection, origen: str, destino: str, columnas: Sequence[str],
+                    nombre: str, tamano_lote: int = TAMANO_LOTE,
+                    progreso: Optional[Callable[[int, int], None]] = None) -> int:
+    """Copia las filas de `origen` a `destino` por rangos de id, una transacción por lote"""
+    lista = ", ".join(columnas)
+    maximo = connection.execute(f"SELECT COALESCE(MAX(id), 0) FROM {origen}").fetchone()[0]
+    ultimo, copiadas = 0, 0
+    while ultimo < maximo:
+        fila = connection.execute(
+            f"SELECT id FROM {origen} WHERE id > ? ORDER BY id LIMIT 1 OFFSET ?",
+            (ultimo, tamano_lote - 1)
+        ).fetchone()
+        limite = fila[0] if fila else maximo
+        cursor = connection.execute(
+            f"INSERT OR IGNORE INTO {destino} ({lista}) SELECT {lista} FROM {origen} WHERE id > ? AND id <= ?",
+            (ultimo, limite)
+        )
+        connection.commit()
+        copiadas += max(cursor.rowcount, 0)
+        ultimo = limite
+        if progreso:
+            progreso(ultimo, maximo)
+        else:
+            logger.info(f"{nombre}: {ultimo * 100 // max(maximo, 1)}% ({copiadas} filas copiadas)")
+        time.sleep(PAUSA_ENTRE_LOTES)
+    return copiadas
+
+def reconstruir_tabla(connection: sqlite3.Connection, tabla: str, crear_sql: str, nombre: str,
+                      tamano_lote: int = TAMANO_LOTE):
+    """Reconstruye `tabla` con una nueva definición sin bloquearla durante la copia.
+
+    `crear_sql` es el CREATE TABLE con `{tabla}` en lugar del nombre. Se crea la
+    tabla nueva con los mismos índices, unos triggers replican en ella las
+    escrituras concurrentes y las filas existentes se copian en lotes. Solo el
+    intercambio final de tablas se hace en una transacción, que es breve porque
+    no copia datos ni construye índices.
+    """
+    nueva = f"{tabla}_nueva"
+    replicas = [f"trg_{nueva}_{evento}" for evento in ("insert", "update", "delete")]
+
+    # Un intento anterior interrumpido pudo dejar los índices ya movidos a la tabla nueva
+    indices = connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name IN (?, ?) AND sql IS NOT NULL",
+        (tabla, nueva)
+    ).fetchall()
+    triggers = [
+        sql for nombre_trigger, sql in connection.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND tbl_name = ?", (tabla,)
+        ).fetchall()
+        if nombre_trigger not in replicas
+    ]
+    for replica in replicas:
+        connection.execute(f"DROP TRIGGER IF EXISTS {replica}")
+    connection.execute(f"DROP TABLE IF EXISTS {nueva}")
+
+    columnas_origen = [fila[1] for fila in connection.execute(f"PRAGMA table_info({tabla})")]
+    connection.execute(crear_sql.format(tabla=nueva))
+    columnas_nueva = {fila[1] for fila in connection.execute(f"PRAGMA table_info({nueva})")}
+    columnas = [columna for columna in columnas_origen if columna in columnas_nueva]
+
+    # Los índices se crean antes de copiar para mantenerse lote a lote
+    for nombre_indice, sql in indices:
+        connection.execute(f"DROP INDEX IF EXISTS {nombre_indice}")
+        connection.execute(re.sub(rf"\bON\s+({tabla}|{nueva})\s*\(", f"ON {nueva}(", sql, count=1, flags=re.IGNORECASE))
+
+    valores = ", ".join(f"NEW.{columna}" for columna in columnas)
+    lista = ", ".join(columnas)
+    connection.executescript(f"""
+        CREATE TRIGGER trg_{nueva}_insert AFTER INSERT ON {tabla} BEGIN
+          INSERT OR REPLACE INTO {nueva} ({lista}) VALUES ({valores});
+        END;
+        CREATE TRIGGER trg_{nueva}_update AFTER UPDATE ON {tabla} BEGIN
+          DELETE FROM {nueva} WHERE id = OLD.id;
+          INSERT OR REPLACE INTO {nueva} ({lista}) VALUES ({valores});
+        END;
+        CREATE TRIGGER trg_{nueva}_delete AFTER DELETE ON {tabla} BEGIN
+          DELETE FROM {nueva} WHERE id = OLD.id;
+        END;
+    """)
+    connection.commit()
+
+    copiar_en_lotes(connection, tabla, nueva, columnas, nombre, tamano_lote)
+
+    # Intercambio final; sin foreign keys para que DROP TABLE no borre fila a fila
+    connection.execute("PRAGMA foreign_keys = OFF")
+    try:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute(f"DROP TABLE {tabla}")
+        connection.execute(f"ALTER TABLE {nueva} RENAME TO {tabla}")
+        for sql in triggers:
+            connection.execute(sql)
+        errores = connection.execute(f"PRAGMA foreign_key_check({tabla})").fetchall()
+        if errores:
+            raise RuntimeError(f"{nombre}: {len(errores)} filas violan claves foráneas")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection.execute("PRAGMA foreign_keys = ON")
+    logger.info(f"{nombre}: tabla {tabla} reconstruida")
@@ -1,15 +1,28 @@
-from .usuario import Usuario, UsuarioCreate, UsuarioUpdate, UsuarioLogin
-from .paqueteturistico import PaqueteTuristico, PaqueteTuristicoCreate, PaqueteTuristicoUpdate
-from .reserva import Reserva, ReservaCreate, ReservaUpdate
-from .review import Review, ReviewCreate, ReviewUpdate
-from .favorito import Favorito, FavoritoCreate
-from .disponibilidad import Disponibilidad, DisponibilidadCreate, DisponibilidadUpdate, DisponibilidadResponse, DisponibilidadMasiva
-
-__all__ = [
-    "Usuario", "UsuarioCreate", "UsuarioUpdate", "UsuarioLogin",
-    "PaqueteTuristico", "PaqueteTuristicoCreate", "PaqueteTuristicoUpdate",
-    "Reserva", "ReservaCreate", "ReservaUpdate",
-    "Review", "ReviewCreate", "ReviewUpdate",
-    "Favorito", "FavoritoCreate",
-    "Disponibilidad", "DisponibilidadCreate", "DisponibilidadUpdate", "DisponibilidadResponse", "DisponibilidadMasiva"
-] 
\ No newline at end of file
+"""Modelos Pydantic de la API.
+
+Los nombres se cargan al primer acceso (PEP 562): importar un submódulo como
+app.models.usuario no construye los modelos de todos los demás.
+"""
+from importlib import import_module
+
+_MODULOS = {
+    "Usuario": "usuario", "UsuarioCreate": "usuario", "UsuarioUpdate": "usuario", "UsuarioLogin": "usuario",
+    "PaqueteTuristico": "paqueteturistico", "PaqueteTuristicoCreate": "paqueteturistico", "PaqueteTuristicoUpdate": "paqueteturistico",
+    "Reserva": "reserva", "ReservaCreate": "reserva", "ReservaUpdate": "reserva",
+    "Review": "review", "ReviewCreate": "review", "ReviewUpdate": "review",
+    "Favorito": "favorito", "FavoritoCreate": "favorito",
+    "Disponibilidad": "disponibilidad", "DisponibilidadCreate": "disponibilidad", "DisponibilidadUpdate": "disponibilidad",
+    "DisponibilidadResponse": "disponibilidad", "DisponibilidadMasiva": "disponibilidad",
+}
+
+__all__ = list(_MODULOS)
+
+def __getattr__(nombre: str):
+    if nombre not in _MODULOS:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(import_module(f".{_MODULOS[nombre]}", __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+from typing import List
+
+class ImagenEnProceso(BaseModel):
+    archivo: str  # Nombre del archivo subido
+    tamano: int  # Bytes recibidos
+    estado: str = "procesando"  # La URL aparece en el recurso cuando termina el procesado
+
+class SubidaImagenesResponse(BaseModel):
+    imagenes: List[ImagenEnProceso]
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Any, List, Optional
+
+class SubPeticion(BaseModel):
+    id: Optional[str] = None  # Identificador libre que se devuelve con la respuesta
+    metodo: str = Field("GET", pattern="^GET$")  # Solo lecturas
+    ruta: str = Field(..., pattern="^/", max_length=2048)  # Ruta con query string, p. ej. /reservas/?limit=5
+
+class LoteRequest(BaseModel):
+    peticiones: List[SubPeticion] = Field(..., min_length=1)
+
+class SubRespuesta(BaseModel):
+    id: Optional[str] = None
+    status: int
+    body: Any = None
+
+class LoteResponse(BaseModel):
+    respuestas: List[SubRespuesta]
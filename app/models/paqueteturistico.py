@@ -1,7 +1,8 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 from decimal import Decimal
+from typing_extensions import TypedDict
 
 class PaqueteTuristicoBase(BaseModel):
     titulo: str = Field(..., min_length=1, max_length=200)
@@ -34,7 +35,7 @@ class PaqueteTuristicoBase(BaseModel):
 
 class PaqueteTuristicoCreate(PaqueteTuristicoBase):
     operador_id: int  # Cambio de anfitrion_id a operador_id
-    imagenes: Optional[List[str]] = None  # Lista de imágenes en base64
+    imagenes: Optional[List[str]] = None  # URLs o imágenes en base64 (se procesan en segundo plano); mejor POST /{id}/imagenes
 
 class PaqueteTuristicoUpdate(BaseModel):
     titulo: Optional[str] = Field(None, min_length=1, max_length=200)
@@ -85,6 +86,7 @@ class PaqueteTuristicoResponse(PaqueteTuristico):
     calificacion_promedio: Optional[float] = None
     total_reviews: Optional[int] = None
     imagenes: Optional[List[str]] = None
+    imagen_principal: Optional[str] = None  # Primera de `imagenes`
     es_favorito: Optional[bool] = None
 
 class PaqueteTuristicoFiltros(BaseModel):
@@ -107,4 +109,42 @@ class PaqueteTuristicoFiltros(BaseModel):
     servicios_incluidos: Optional[List[str]] = None
     latitud: Optional[Decimal] = None
     longitud: Optional[Decimal] = None
-    radio_km: Optional[int] = None 
\ No newline at end of file
+    radio_km: Optional[int] = None
+
+class FacetaValor(BaseModel):
+    valor: str
+    total: int
+
+class FacetaRangoPrecio(BaseModel):
+    desde: Decimal
+    hasta: Optional[Decimal] = None  # None = sin límite superior
+    total: int
+
+class PaqueteTuristicoFacetas(BaseModel):
+    total: int = 0
+    tipo_paquete: List[FacetaValor] = []
+    nivel_dificultad: List[FacetaValor] = []
+    pais_destino: List[FacetaValor] = []
+    rango_precio: List[FacetaRangoPrecio] = []
+    # Paquetes que incluyen cada servicio (incluye_transporte, incluye_guia, ...)
+    servicios: Dict[str, int] = {}
+
+class PaqueteTuristicoBusquedaResponse(BaseModel):
+    resultados: List[PaqueteTuristicoResponse]
+    facetas: PaqueteTuristicoFacetas
+
+class PaqueteTuristicoTarjeta(TypedDict):
+    """Tarjeta compacta de un paquete para las rejillas del catálogo.
+
+    Es un TypedDict y no un BaseModel: las filas de paquetes_tarjetas se
+    serializan tal cual, sin construir un modelo por fila.
+    """
+    id: int
+    titulo: str
+    ciudad_destino: Optional[str]
+    pais_destino: Optional[str]
+    precio_por_persona: Optional[float]
+    duracion_dias: Optional[int]
+    calificacion_promedio: Optional[float]
+    total_reviews: int
+    imagen_principal: Optional[str]
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Optional, Dict
 from datetime import datetime
 
 class ReviewBase(BaseModel):
@@ -53,4 +53,21 @@ class ReviewFiltros(BaseModel):
     calificacion_min: Optional[int] = Field(None, ge=1, le=5)
     calificacion_max: Optional[int] = Field(None, ge=1, le=5)
     fecha_desde: Optional[datetime] = None
-    fecha_hasta: Optional[datetime] = None 
\ No newline at end of file
+    fecha_hasta: Optional[datetime] = None 
+
+class ReviewCategoriasPromedio(BaseModel):
+    organizacion: Optional[float] = None
+    comunicacion: Optional[float] = None
+    actividades: Optional[float] = None
+    guia: Optional[float] = None
+    seguridad: Optional[float] = None
+    valor: Optional[float] = None
+
+class ReviewSummaryResponse(BaseModel):
+    paquete_id: int
+    total_reviews: int = 0
+    calificacion_promedio: Optional[float] = None
+    calificacion_bayesiana: Optional[float] = None
+    # Cantidad de reviews por número de estrellas ("1" a "5")
+    histograma: Dict[str, int] = Field(default_factory=dict)
+    categorias: ReviewCategoriasPromedio = Field(default_factory=ReviewCategoriasPromedio)
@@ -1,7 +1,13 @@
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from typing import Optional, List
 from datetime import datetime
 
+def validar_avatar_url(valor: Optional[str]) -> Optional[str]:
+    """Solo URLs externas: los avatares propios se suben con PUT /usuarios/me/avatar"""
+    if valor is not None and not valor.startswith(("http://", "https://")):
+        raise ValueError("avatar_url debe ser una URL http(s); para subir un avatar use /usuarios/me/avatar")
+    return valor
+
 class UsuarioBase(BaseModel):
     email: EmailStr
     nombre: str = Field(..., min_length=1, max_length=100)
@@ -23,6 +29,8 @@ class UsuarioBase(BaseModel):
 class UsuarioCreate(UsuarioBase):
     password: str = Field(..., min_length=8, max_length=100)
 
+    _validar_avatar_url = field_validator("avatar_url")(validar_avatar_url)
+
 class UsuarioLogin(BaseModel):
     email: EmailStr
     password: str
@@ -43,6 +51,8 @@ class UsuarioUpdate(BaseModel):
     idiomas: Optional[str] = None
     respuesta_tiempo_horas: Optional[int] = None
 
+    _validar_avatar_url = field_validator("avatar_url")(validar_avatar_url)
+
 class Usuario(UsuarioBase):
     id: int
     fecha_registro: datetime
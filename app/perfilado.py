@@ -0,0 +1,264 @@
+"""Perfilado por muestreo de peticiones HTTP.
+
+Solo se activa con PERFILADO_MUESTREO > 0. En una fracción de las peticiones
+se mide el tiempo total separado en SQLite (cursores de app.sentencias),
+validación (parámetros, cuerpo y response_model de FastAPI, y construcción
+de modelos Pydantic) y serialización (jsonable_encoder y render de
+JSONResponse). Mientras hay peticiones muestreadas en curso, un hilo toma
+cada PERFILADO_INTERVALO_MS la pila del hilo del event loop y la acumula en
+formato colapsado por ruta (compatible con flamegraph.pl / speedscope).
+Solo se registran las pilas en CPU: mientras la petición espera E/S el
+event loop ejecuta otra cosa.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+import asyncio
+import functools
+import inspect
+import random
+import sys
+import threading
+import time
+
+from starlette.routing import Match
+
+CATEGORIAS = ("db", "validacion", "serializacion")
+MAX_STACKS_POR_RUTA = 2000
+STACK_OTRAS = "<otras>"
+
+class PerfilPeticion(object):
+    """Tiempos exclusivos por categoría de una petición muestreada"""
+    __slots__ = ("tiempos", "_pila")
+
+    def __init__(self):
+        self.tiempos = dict.fromkeys(CATEGORIAS, 0.0)
+        self._pila: List[list] = []
+
+    def agregar(self, categoria: str, segundos: float):
+        self.tiempos[categoria] += segundos
+        if self._pila:
+            self._pila[-1][1] += segundos
+
+    def entrar(self):
+        self._pila.append([time.perf_counter(), 0.0])
+
+    def salir(self, categoria: str):
+        inicio, anidado = self._pila.pop()
+        total = time.perf_counter() - inicio
+        self.tiempos[categoria] += total - anidado
+        if self._pila:
+            self._pila[-1][1] += total
+
+# Perfil de la petición en curso; None fuera de las peticiones muestreadas
+perfil_actual: ContextVar[Optional[PerfilPeticion]] = ContextVar("perfil_actual", default=None)
+
+class RegistroPerfiles(object):
+    """Tiempos y pilas colapsadas acumulados por ruta"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rutas: Dict[str, dict] = {}
+        self._stacks: Dict[str, Counter] = {}
+
+    def registrar(self, ruta: str, total: float, tiempos: Dict[str, float], muestras: Counter):
+        with self._lock:
+            datos = self._rutas.setdefault(ruta, {"peticiones": 0, "total": 0.0, **dict.fromkeys(CATEGORIAS, 0.0)})
+            datos["peticiones"] += 1
+            datos["total"] += total
+            for categoria, segundos in tiempos.items():
+                datos[categoria] += segundos
+            stacks = self._stacks.setdefault(ruta, Counter())
+            for stack, cantidad in muestras.items():
+                if stack not in stacks and len(stacks) >= MAX_STACKS_POR_RUTA:
+                    stack = STACK_OTRAS
+                stacks[stack] += cantidad
+
+    def resumen(self) -> List[dict]:
+        """Tiempos medios por ruta, ordenados por tiempo total acumulado"""
+        with self._lock:
+            filas = [(ruta, dict(datos), sum(self._stacks.get(ruta, {}).values())) for ruta, datos in self._rutas.items()]
+        filas.sort(key=lambda fila: fila[1]["total"], reverse=True)
+        resumen = []
+        for ruta, datos, muestras in filas:
+            peticiones = datos["peticiones"]
+            medias = {f"{categoria}_ms": round(datos[categoria] * 1000 / peticiones, 3) for categoria in CATEGORIAS}
+            otros = datos["total"] - sum(datos[categoria] for categoria in CATEGORIAS)
+            resumen.append({
+                "ruta": ruta,
+                "peticiones": peticiones,
+                "total_ms": round(datos["total"] * 1000 / peticiones, 3),
+                **medias,
+                "otros_ms": round(otros * 1000 / peticiones, 3),
+                "muestras_pila": muestras,
+            })
+        return resumen
+
+    def stacks(self, ruta: Optional[str] = None) -> str:
+        """Pilas colapsadas ('ruta;marco;marco N' por línea)"""
+        with self._lock:
+            lineas = [
+                f"{nombre};{stack} {cantidad}"
+                for nombre, stacks in self._stacks.items()
+                if ruta is None or nombre == ruta
+                for stack, cantidad in stacks.items()
+            ]
+        return "\n".join(sorted(lineas)) + ("\n" if lineas else "")
+
+    def reiniciar(self):
+        with self._lock:
+            self._rutas.clear()
+            self._stacks.clear()
+
+registro_perfiles = RegistroPerfiles()
+
+class MuestreadorPilas(threading.Thread):
+    """Toma la pila del hilo del event loop mientras hay peticiones muestreadas en curso"""
+
+    def __init__(self, intervalo: float):
+        super().__init__(name="muestreador-pilas", daemon=True)
+        self.intervalo = intervalo
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.hilo_loop: Optional[int] = None
+        self._tareas: Dict[asyncio.Task, Counter] = {}
+        self._lock = threading.Lock()
+        self._activo = threading.Event()
+
+    def seguir(self, tarea: asyncio.Task) -> Counter:
+        if self.loop is None:
+            self.loop = asyncio.get_running_loop()
+            self.hilo_loop = threading.get_ident()
+            self.start()
+        muestras = Counter()
+        with self._lock:
+            self._tareas[tarea] = muestras
+            self._activo.set()
+        return muestras
+
+    def dejar(self, tarea: asyncio.Task):
+        with self._lock:
+            self._tareas.pop(tarea, None)
+            if not self._tareas:
+                self._activo.clear()
+
+    def run(self):
+        while True:
+            self._activo.wait()
+            time.sleep(self.intervalo)
+            frame = sys._current_frames().get(self.hilo_loop)
+            tarea = asyncio.current_task(self.loop)
+            with self._lock:
+                muestras = self._tareas.get(tarea)
+            if frame is None or muestras is None:
+                continue
+            stack = _colapsar(frame)
+            if stack:
+                muestras[stack] += 1
+
+def _colapsar(frame) -> Optional[str]:
+    """Pila desde el middleware hasta el marco actual, de la raíz a la hoja"""
+    marcos = []
+    while frame is not None:
+        if frame.f_code is MiddlewarePerfilado.__call__.__code__:
+            marcos.reverse()
+            return ";".join(marcos)
+        marcos.append(f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}")
+        frame = frame.f_back
+    return None
+
+def _medido(funcion, categoria: str):
+    """Envuelve `funcion` para acumular su tiempo en `categoria` si la petición está muestreada"""
+    if inspect.iscoroutinefunction(funcion):
+        @functools.wraps(funcion)
+        async def envoltura_async(*args, **kwargs):
+            perfil = perfil_actual.get()
+            if perfil is None:
+                return await funcion(*args, **kwargs)
+            perfil.entrar()
+            try:
+                return await funcion(*args, **kwargs)
+            finally:
+                perfil.salir(categoria)
+        return envoltura_async
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        perfil = perfil_actual.get()
+        if perfil is None:
+            return funcion(*args, **kwargs)
+        perfil.entrar()
+        try:
+            return funcion(*args, **kwargs)
+        finally:
+            perfil.salir(categoria)
+    return envoltura
+
+_instrumentado = False
+
+def instrumentar_fastapi():
+    """Mide validación y serialización envolviendo las funciones internas de FastAPI y Pydantic"""
+    global _instrumentado
+    if _instrumentado:
+        return
+    import fastapi.dependencies.utils as dependencias
+    import fastapi.routing as routing
+    from pydantic import BaseModel
+    from starlette.responses import JSONResponse
+
+    for modulo, nombre, categoria in (
+        (BaseModel, "__init__", "validacion"),
+        (dependencias, "request_params_to_args", "validacion"),
+        (dependencias, "request_body_to_args", "validacion"),
+        (routing, "serialize_response", "validacion"),
+        (routing, "_prepare_response_content", "serializacion"),
+        (routing, "jsonable_encoder", "serializacion"),
+        (JSONResponse, "render", "serializacion"),
+    ):
+        setattr(modulo, nombre, _medido(getattr(modulo, nombre), categoria))
+    _instrumentado = True
+
+_rutas_por_endpoint: Dict[tuple, str] = {}
+
+def ruta_plantilla(scope) -> str:
+    """Plantilla de la ruta atendida ('/paquetes-turisticos/{paquete_id}'), o '<sin ruta>'"""
+    clave = (scope.get("endpoint"), scope["method"])
+    ruta = _rutas_por_endpoint.get(clave)
+    if ruta is not None:
+        return ruta
+    ruta = "<sin ruta>"
+    router = getattr(scope.get("app"), "router", None)
+    for route in getattr(router, "routes", ()):
+        coincidencia, _ = route.matches(scope)
+        if coincidencia == Match.FULL:
+            ruta = route.path
+            break
+    if clave[0] is not None:
+        _rutas_por_endpoint[clave] = ruta
+    return ruta
+
+class MiddlewarePerfilado(object):
+    """Middleware ASGI que perfila una fracción `muestreo` de las peticiones HTTP"""
+
+    def __init__(self, app, muestreo: float, intervalo_ms: int = 5):
+        self.app = app
+        self.muestreo = muestreo
+        self.muestreador = MuestreadorPilas(intervalo_ms / 1000)
+        instrumentar_fastapi()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or random.random() >= self.muestreo:
+            await self.app(scope, receive, send)
+            return
+
+        perfil = PerfilPeticion()
+        token = perfil_actual.set(perfil)
+        tarea = asyncio.current_task()
+        muestras = self.muestreador.seguir(tarea)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            total = time.perf_counter() - inicio
+            self.muestreador.dejar(tarea)
+            perfil_actual.reset(token)
+            registro_perfiles.registrar(f"{scope['method']} {ruta_plantilla(scope)}", total, perfil.tiempos, muestras)
@@ -0,0 +1,53 @@
+"""Proyección de campos (sparse fieldsets) para los endpoints de lectura.
+
+Con `?fields=id,titulo,precio_por_persona` el endpoint solo selecciona en SQL
+las columnas pedidas (más las claves que necesita el enriquecimiento), omite
+las consultas de enriquecimiento cuyos campos no se pidieron y responde con
+un modelo recortado que contiene únicamente esos campos. Sin `fields` la
+respuesta es la completa de siempre.
+"""
+from functools import lru_cache
+from typing import FrozenSet, Iterable, Optional, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+
+DESCRIPCION_FIELDS = "Campos a devolver separados por comas (p. ej. id,titulo,precio_por_persona); por defecto todos"
+
+def parsear_campos(fields: Optional[str], modelo: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """Valida `fields` contra los campos de `modelo`; None si no se pidió proyección"""
+    if not fields:
+        return None
+    campos = {campo.strip() for campo in fields.split(",") if campo.strip()}
+    desconocidos = campos - set(modelo.model_fields)
+    if desconocidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconocidos en fields: {', '.join(sorted(desconocidos))}"
+        )
+    return frozenset(campos | {"id"})
+
+def pide(campos: Optional[FrozenSet[str]], *nombres: str) -> bool:
+    """Indica si la proyección incluye alguno de `nombres` (sin proyección, todos)"""
+    return campos is None or not campos.isdisjoint(nombres)
+
+def columnas(campos: Optional[FrozenSet[str]], tabla: Iterable[str], necesarias: Iterable[str] = (), prefijo: str = "") -> str:
+    """Lista de columnas del SELECT: las de `tabla` pedidas más las `necesarias`"""
+    if campos is None:
+        return f"{prefijo}*"
+    seleccion = campos | set(necesarias)
+    return ", ".join(f"{prefijo}{columna}" for columna in tabla if columna in seleccion)
+
+@lru_cache(maxsize=256)
+def modelo_parcial(modelo: Type[BaseModel], campos: FrozenSet[str]) -> Type[BaseModel]:
+    """Modelo con solo `campos` de `modelo`, todos opcionales y con sus tipos originales"""
+    definiciones = {
+        nombre: (Optional[info.annotation], None)
+        for nombre, info in modelo.model_fields.items()
+        if nombre in campos
+    }
+    return create_model(f"{modelo.__name__}Parcial", **definiciones)
+
+def modelo_respuesta(modelo: Type[BaseModel], campos: Optional[FrozenSet[str]]) -> Type[BaseModel]:
+    """`modelo` completo sin proyección, o su versión recortada"""
+    return modelo if campos is None else modelo_parcial(modelo, campos)
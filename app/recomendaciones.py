@@ -0,0 +1,178 @@
+from typing import Dict, List, Sequence, Tuple
+import math
+import re
+import zlib
+
+import numpy as np
+
+TIPOS_PAQUETE = (
+    "aventura", "cultural", "gastronomico", "playa", "montaña",
+    "ciudad", "ecoturismo", "romantico", "familiar", "negocios"
+)
+NIVELES_DIFICULTAD = ("facil", "moderado", "dificil", "extremo")
+SERVICIOS_INCLUIDOS = ("incluye_transporte", "incluye_alojamiento", "incluye_comidas", "incluye_guia")
+
+# Peso de cada bloque de características en la similitud
+PESO_TIPO = 1.0
+PESO_DIFICULTAD = 0.5
+PESO_PRECIO = 1.0
+PESO_DURACION = 0.5
+PESO_SERVICIO = 0.25
+PESO_UBICACION = 0.75
+PESO_DESCRIPCION = 1.0
+
+# Dimensiones del vector hash usado para el TF-IDF de la descripción
+DIMENSIONES_DESCRIPCION = 256
+# Filas por bloque al multiplicar matrices, para acotar la memoria usada
+FILAS_POR_BLOQUE = 256
+
+_TOKEN_RE = re.compile(r"[a-záéíóúñü]{3,}")
+
+def _tokenizar(texto: str) -> List[int]:
+    """Convierte un texto en índices de columnas estables entre procesos"""
+    return [
+        zlib.crc32(token.encode("utf-8")) % DIMENSIONES_DESCRIPCION
+        for token in _TOKEN_RE.findall(texto.lower())
+    ]
+
+def _normalizar_rango(valores: np.ndarray) -> np.ndarray:
+    """Escala los valores al rango [0, 1]"""
+    minimo, maximo = float(valores.min()), float(valores.max())
+    if maximo - minimo <= 0:
+        return np.zeros_like(valores)
+    return (valores - minimo) / (maximo - minimo)
+
+def vectorizar_paquetes(paquetes: Sequence[dict], usar_descripcion: bool = True) -> np.ndarray:
+    """Construye la matriz de características normalizada (una fila por paquete)"""
+    n = len(paquetes)
+    bloques = []
+
+    tipos = np.zeros((n, len(TIPOS_PAQUETE)), dtype=np.float32)
+    niveles = np.zeros((n, len(NIVELES_DIFICULTAD)), dtype=np.float32)
+    servicios = np.zeros((n, len(SERVICIOS_INCLUIDOS)), dtype=np.float32)
+    ubicacion = np.zeros((n, 2), dtype=np.float32)
+    precios = np.zeros(n, dtype=np.float32)
+    duraciones = np.zeros(n, dtype=np.float32)
+
+    for i, paquete in enumerate(paquetes):
+        if paquete["tipo_paquete"] in TIPOS_PAQUETE:
+            tipos[i, TIPOS_PAQUETE.index(paquete["tipo_paquete"])] = 1
+        if paquete["nivel_dificultad"] in NIVELES_DIFICULTAD:
+            niveles[i, NIVELES_DIFICULTAD.index(paquete["nivel_dificultad"])] = 1
+        for j, servicio in enumerate(SERVICIOS_INCLUIDOS):
+            servicios[i, j] = 1 if paquete.get(servicio) else 0
+        if paquete.get("latitud") is not None and paquete.get("longitud") is not None:
+            ubicacion[i, 0] = float(paquete["latitud"]) / 90
+            ubicacion[i, 1] = float(paquete["longitud"]) / 180
+        precios[i] = math.log1p(float(paquete["precio_por_persona"] or 0))
+        duraciones[i] = float(paquete["duracion_dias"] or 0)
+
+    bloques.append(tipos * PESO_TIPO)
+    bloques.append(niveles * PESO_DIFICULTAD)
+    bloques.append(_normalizar_rango(precios)[:, None] * PESO_PRECIO)
+    bloques.append(_normalizar_rango(duraciones)[:, None] * PESO_DURACION)
+    bloques.append(servicios * PESO_SERVICIO)
+    bloques.append(ubicacion * PESO_UBICACION)
+
+    if usar_descripcion:
+        frecuencias = np.zeros((n, DIMENSIONES_DESCRIPCION), dtype=np.float32)
+        for i, paquete in enumerate(paquetes):
+            for columna in _tokenizar(f"{paquete.get('titulo') or ''} {paquete.get('descripcion') or ''}"):
+                frecuencias[i, columna] += 1
+        documentos = np.count_nonzero(frecuencias, axis=0)
+        idf = np.log((1 + n) / (1 + documentos)).astype(np.float32) + 1
+        tfidf = np.log1p(frecuencias) * idf
+        normas = np.linalg.norm(tfidf, axis=1, keepdims=True)
+        normas[normas == 0] = 1
+        bloques.append(tfidf / normas * PESO_DESCRIPCION)
+
+    matriz = np.hstack(bloques).astype(np.float32)
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1
+    return matriz / normas
+
+def top_k_similares(matriz: np.ndarray, filas: Sequence[int], k: int) -> Dict[int, List[Tuple[int, float]]]:
+    """Obtiene los k vecinos más similares (coseno) de cada fila indicada"""
+    resultado = {}
+    n = matriz.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return {fila: [] for fila in filas}
+
+    filas = np.asarray(filas, dtype=np.int64)
+    for inicio in range(0, len(filas), FILAS_POR_BLOQUE):
+        bloque = filas[inicio:inicio + FILAS_POR_BLOQUE]
+        similitudes = matriz[bloque] @ matriz.T
+        similitudes[np.arange(len(bloque)), bloque] = -np.inf
+        candidatos = np.argpartition(-similitudes, k - 1, axis=1)[:, :k]
+        puntuaciones = np.take_along_axis(similitudes, candidatos, axis=1)
+        orden = np.argsort(-puntuaciones, axis=1)
+        candidatos = np.take_along_axis(candidatos, orden, axis=1)
+        puntuaciones = np.take_along_axis(puntuaciones, orden, axis=1)
+        for fila, vecinos, valores in zip(bloque, candidatos, puntuaciones):
+            resultado[int(fila)] = [(int(v), float(s)) for v, s in zip(vecinos, valores)]
+    return resultado
+
+def filas_afectadas(matriz: np.ndarray, cambiadas: Sequence[int], umbrales: np.ndarray) -> np.ndarray:
+    """Filas cuya lista de vecinos puede cambiar porque alguna fila cambiada la supera.
+
+    `umbrales` contiene la similitud del último vecino guardado de cada fila
+    (-inf si la lista está incompleta).
+    """
+    if len(cambiadas) == 0:
+        return np.array([], dtype=np.int64)
+    afectadas = []
+    cambiadas = np.asarray(cambiadas, dtype=np.int64)
+    for inicio in range(0, matriz.shape[0], FILAS_POR_BLOQUE):
+        fin = min(inicio + FILAS_POR_BLOQUE, matriz.shape[0])
+        similitudes = matriz[inicio:fin] @ matriz[cambiadas].T
+        maximos = similitudes.max(axis=1)
+        afectadas.append(np.nonzero(maximos > umbrales[inicio:fin])[0] + inicio)
+    return np.concatenate(afectadas)
+
+def coocurrencias_top_n(usuarios: np.ndarray, paquetes: np.ndarray, filas: Sequence[int],
+                        n: int, max_historial: int = 100) -> Dict[int, List[Tuple[int, float]]]:
+    """Vecinos por coocurrencia (usuarios que interactuaron con ambos paquetes).
+
+    `usuarios` y `paquetes` son pares de interacción sin duplicados ordenados
+    por usuario. La matriz dispersa paquete x paquete se construye como claves
+    `a * M + b` con np.unique; la puntuación es la similitud coseno
+    c(a, b) / sqrt(n(a) * n(b)). Solo se calculan las filas indicadas.
+    """
+    resultado = {int(fila): [] for fila in filas}
+    if len(paquetes) == 0 or not resultado:
+        return resultado
+
+    m = int(paquetes.max()) + 1
+    totales = np.bincount(paquetes, minlength=m).astype(np.float64)
+    es_fila = np.zeros(m, dtype=bool)
+    es_fila[[fila for fila in resultado if fila < m]] = True
+
+    # Solo interesan los usuarios que interactuaron con alguna fila pedida
+    _, inicios = np.unique(usuarios, return_index=True)
+    limites = np.append(inicios, len(usuarios))
+    claves = []
+    for inicio, fin in zip(limites[:-1], limites[1:]):
+        historial = paquetes[inicio:min(fin, inicio + max_historial)]
+        if len(historial) < 2 or not es_fila[historial].any():
+            continue
+        origen = historial[es_fila[historial]]
+        a = np.repeat(origen, len(historial))
+        b = np.tile(historial, len(origen))
+        distintos = a != b
+        claves.append(a[distintos] * m + b[distintos])
+    if not claves:
+        return resultado
+
+    claves, conteos = np.unique(np.concatenate(claves), return_counts=True)
+    a, b = claves // m, claves % m
+    puntuaciones = conteos / np.sqrt(totales[a] * totales[b])
+
+    orden = np.lexsort((-puntuaciones, a))
+    a, b, puntuaciones = a[orden], b[orden], puntuaciones[orden]
+    _, inicios = np.unique(a, return_index=True)
+    rango = np.arange(len(a)) - np.repeat(inicios, np.diff(np.append(inicios, len(a))))
+    seleccion = rango < n
+    for fila, vecino, puntuacion in zip(a[seleccion], b[seleccion], puntuaciones[seleccion]):
+        resultado[int(fila)].append((int(vecino), float(puntuacion)))
+    return resultado
@@ -3,6 +3,9 @@ from .paqueteturistico_repository import PaqueteTuristicoRepository
 from .reserva_repository import ReservaRepository
 from .review_repository import ReviewRepository
 from .favorito_repository import FavoritoRepository
+from .ranking_repository import RankingRepository
+from .recomendacion_repository import RecomendacionRepository
+from .catalogo_repository import CatalogoRepository
 
 # Instancias
 from .instances import (
@@ -10,7 +13,10 @@ from .instances import (
     paquete_turistico_repository,
     reserva_repository,
     review_repository,
-    favorito_repository
+    favorito_repository,
+    ranking_repository,
+    recomendacion_repository,
+    catalogo_repository
 )
 
 __all__ = [
@@ -19,9 +25,15 @@ __all__ = [
     "ReservaRepository",
     "ReviewRepository",
     "FavoritoRepository",
+    "RankingRepository",
+    "RecomendacionRepository",
+    "CatalogoRepository",
     "usuario_repository",
     "paquete_turistico_repository",
     "reserva_repository",
     "review_repository",
-    "favorito_repository"
+    "favorito_repository",
+    "ranking_repository",
+    "recomendacion_repository",
+    "catalogo_repository"
 ] 
\ No newline at end of file
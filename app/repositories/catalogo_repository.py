@@ -0,0 +1,123 @@
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from app.config import settings
+from app.database import db, UsaConexion
+from app.metricas import metricas
+from app.models.paqueteturistico import PaqueteTuristicoFiltros
+import logging
+import time
+
+if TYPE_CHECKING:
+    from app.catalogo import CatalogoColumnar
+
+logger = logging.getLogger(__name__)
+
+# Paquetes cambiados que se aplican en línea; con más se usa SQL hasta reconstruir
+MAX_CAMBIOS_INCREMENTALES = 500
+
+CATALOGO_SQL = """
+    SELECT p.id, p.tipo_paquete, p.nivel_dificultad, p.pais_destino, p.ciudad_destino,
+           p.precio_por_persona, p.duracion_dias, p.capacidad_maxima, p.edad_minima,
+           p.incluye_transporte, p.incluye_alojamiento, p.incluye_comidas, p.incluye_guia,
+           p.fecha_creacion, p.esta_activo,
+           r.puntuacion_popularidad, r.puntuacion_calificacion
+    FROM paquetes_turisticos p
+    LEFT JOIN paquete_rankings r ON r.paquete_id = p.id
+"""
+
+class CatalogoRepository(UsaConexion):
+    """Mantiene la instantánea en memoria usada por la búsqueda de paquetes.
+
+    La instantánea se reconstruye periódicamente y, entre reconstrucciones,
+    se pone al día con los eventos paquete.* del outbox (tabla `eventos`,
+    alimentada por triggers, por lo que también recoge escrituras de otros
+    procesos): en segundo plano como suscriptor por proceso de app.eventos y
+    antes de cada búsqueda, para que una búsqueda vea las escrituras previas.
+    """
+
+    def __init__(self):
+        self.catalogo: Optional["CatalogoColumnar"] = None
+        self.version = 0
+        self.fecha_construccion = 0.0
+
+    def calcular_catalogo(self) -> Tuple["CatalogoColumnar", int]:
+        """Construye la instantánea con una conexión propia (para ejecutarse en un hilo)"""
+        # NumPy solo se carga si el catálogo en memoria está activado
+        from app.catalogo import CatalogoColumnar
+
+        connection = db.create_connection()
+        try:
+            cursor = connection.cursor()
+            # La versión se lee antes que las filas: los cambios posteriores se reaplican
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM eventos")
+            version = cursor.fetchone()[0]
+            cursor.execute(CATALOGO_SQL + " WHERE p.esta_activo = 1")
+            filas = [dict(row) for row in cursor.fetchall()]
+        finally:
+            connection.close()
+        return CatalogoColumnar(filas), version
+
+    def guardar_catalogo(self, resultado: Tuple["CatalogoColumnar", int]) -> int:
+        """Publica la instantánea construida"""
+        self.catalogo, self.version = resultado
+        self.fecha_construccion = time.monotonic()
+        logger.info(f"Catálogo en memoria construido con {len(self.catalogo)} paquetes turísticos")
+        return len(self.catalogo)
+
+    def sincronizar(self) -> bool:
+        """Aplica los eventos de paquetes posteriores a la instantánea; False si no es utilizable"""
+        if self.catalogo is None:
+            return False
+        # Sin reconstrucciones recientes el orden por ranking puede estar desfasado
+        if time.monotonic() - self.fecha_construccion > 2 * settings.catalogo_refresh_seconds:
+            return False
+
+        # Se recorren todos los eventos para poder avanzar la versión sobre los que no son de paquetes
+        cursor = self.connection.cursor()
+        version = self.version
+        paquete_ids = set()
+        while True:
+            cursor.execute(
+                "SELECT id, tipo, entidad_id FROM eventos WHERE id > ? ORDER BY id LIMIT ?",
+                (version, settings.eventos_lote)
+            )
+            eventos = cursor.fetchall()
+            if not eventos:
+                break
+            paquete_ids.update(row['entidad_id'] for row in eventos if row['tipo'].startswith("paquete."))
+            if len(paquete_ids) > MAX_CAMBIOS_INCREMENTALES:
+                return False
+            version = eventos[-1]['id']
+            if len(eventos) < settings.eventos_lote:
+                break
+
+        if paquete_ids:
+            paquete_ids = list(paquete_ids)
+            cursor.execute(
+                CATALOGO_SQL + f" WHERE p.id IN ({', '.join('?' * len(paquete_ids))})",
+                paquete_ids
+            )
+            filas = [dict(row) for row in cursor.fetchall()]
+            activos = [fila for fila in filas if fila['esta_activo'] == 1]
+            activos_ids = {fila['id'] for fila in activos}
+            self.catalogo.actualizar(activos, [paquete_id for paquete_id in paquete_ids if paquete_id not in activos_ids])
+        self.version = version
+        return True
+
+    def buscar(self, filtros: PaqueteTuristicoFiltros, skip: int = 0, limit: int = 100, sort: str = "recent") -> Optional[List[int]]:
+        """IDs de la página de resultados, o None si hay que buscar con SQL"""
+        try:
+            if not self.sincronizar():
+                metricas.incrementar("cache_fallos_total", (("cache", "catalogo"),))
+                return None
+            resultado = self.catalogo.buscar(filtros, skip, limit, sort)
+            metricas.incrementar("cache_aciertos_total", (("cache", "catalogo"),))
+            return resultado
+        except Exception as e:
+            logger.error(f"Error en búsqueda sobre el catálogo en memoria: {e}")
+            metricas.incrementar("cache_fallos_total", (("cache", "catalogo"),))
+            # Descartar la instantánea: puede haber quedado a medio actualizar
+            self.catalogo = None
+            return None
+
+# Instancia global del repository del catálogo en memoria
+catalogo_repository = CatalogoRepository()
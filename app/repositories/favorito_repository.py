@@ -1,15 +1,12 @@
 from typing import Optional
-from app.database import db
+from app.database import UsaConexion
 from app.models.favorito import FavoritoResponse, FavoritoCreate
 from fastapi import HTTPException, status
 import logging
 
 logger = logging.getLogger(__name__)
 
-class FavoritoRepository(object):
-    def __init__(self):
-        self.connection = db.get_client()
-    
+class FavoritoRepository(UsaConexion):
     async def add_favorito(self, favorito_data: FavoritoCreate) -> Optional[FavoritoResponse]:
         """Agrega un paquete turístico a favoritos"""
         try:
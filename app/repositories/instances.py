@@ -1,12 +1,14 @@
-from .usuario_repository import UsuarioRepository
-from .paqueteturistico_repository import PaqueteTuristicoRepository
-from .reserva_repository import ReservaRepository
-from .review_repository import ReviewRepository
-from .favorito_repository import FavoritoRepository
+"""Instancias compartidas de los repositories.
 
-# Instancias de repositories
-usuario_repository = UsuarioRepository()
-paquete_turistico_repository = PaqueteTuristicoRepository()
-reserva_repository = ReservaRepository()
-review_repository = ReviewRepository()
-favorito_repository = FavoritoRepository() 
\ No newline at end of file
+Cada módulo *_repository.py crea su instancia global; aquí solo se reexportan
+para que toda la aplicación use la misma (sin instanciarlas dos veces).
+"""
+from .usuario_repository import usuario_repository
+from .paqueteturistico_repository import paquete_turistico_repository
+from .reserva_repository import reserva_repository
+from .review_repository import review_repository
+from .favorito_repository import favorito_repository
+from .ranking_repository import ranking_repository
+from .recomendacion_repository import recomendacion_repository
+# El catálogo guarda estado en memoria: se comparte la instancia del módulo
+from .catalogo_repository import catalogo_repository
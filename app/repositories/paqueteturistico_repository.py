@@ -1,6 +1,12 @@
-from typing import Optional, List
-from app.database import db
-from app.models.paqueteturistico import PaqueteTuristicoResponse, PaqueteTuristicoCreate, PaqueteTuristicoUpdate, PaqueteTuristicoFiltros
+from typing import Dict, Optional, List, FrozenSet
+from app.database import UsaConexion
+from app.models.paqueteturistico import PaqueteTuristico, PaqueteTuristicoResponse, PaqueteTuristicoCreate, PaqueteTuristicoUpdate, PaqueteTuristicoFiltros, PaqueteTuristicoFacetas, PaqueteTuristicoTarjeta
+from app.repositories.ranking_repository import ORDENAMIENTOS_PAQUETE
+from app.repositories.catalogo_repository import catalogo_repository
+from app.config import settings
+from app.sentencias import ConsultaFiltrada, construir_update
+from app.proyecciones import columnas, modelo_respuesta, pide
+from app.imagenes import es_url
 from fastapi import HTTPException, status
 import logging
 import json
@@ -12,19 +18,34 @@ router = APIRouter()
 
 logger = logging.getLogger(__name__)
 
-class PaqueteTuristicoRepository(object):
+# Límites de los rangos de precio por persona usados como faceta
+LIMITES_PRECIO = (100, 250, 500, 1000)
+SERVICIOS = ("incluye_transporte", "incluye_alojamiento", "incluye_comidas", "incluye_guia")
+# Dimensiones de faceta: cada una cuenta con todos los filtros salvo el suyo
+DIMENSIONES_FACETA = ("tipo_paquete", "nivel_dificultad", "pais_destino") + SERVICIOS
+COLUMNAS_PAQUETE = tuple(PaqueteTuristico.model_fields)
+CAMPOS_OPERADOR = ("operador_nombre", "operador_apellido", "operador_avatar")
+COLUMNAS_TARJETA = tuple(PaqueteTuristicoTarjeta.__annotations__)
+
+def columnas_paquete(campos: Optional[FrozenSet[str]], prefijo: str = "") -> str:
+    """Columnas del SELECT de paquetes para la proyección `campos`"""
+    necesarias = ("id", "operador_id") if pide(campos, *CAMPOS_OPERADOR) else ("id",)
+    return columnas(campos, COLUMNAS_PAQUETE, necesarias, prefijo)
+
+class PaqueteTuristicoRepository(UsaConexion):
     def __init__(self):
-        self.connection = db.get_client()
-    
+        # Siguiente `orden` ya asignado a imágenes que se están procesando, por paquete
+        self._ordenes_reservados: Dict[int, int] = {}
+
     async def create_paquete_turistico(self, paquete_data: PaqueteTuristicoCreate) -> PaqueteTuristicoResponse:
         """Crea un nuevo paquete turístico"""
         try:
-            # Validar campos obligatorios y loguear datos recibidos
-            logger.info(f"Datos recibidos para crear paquete: {paquete_data}")
+            # Validar campos obligatorios
+            logger.debug("Creando paquete turístico '%s' del operador %s", paquete_data.titulo, paquete_data.operador_id)
             if not paquete_data.titulo or not paquete_data.tipo_paquete or not paquete_data.duracion_dias or not paquete_data.capacidad_maxima or not paquete_data.nivel_dificultad or not paquete_data.precio_por_persona or not paquete_data.pais_destino or not paquete_data.ciudad_destino or not paquete_data.punto_encuentro:
                 logger.error("Faltan campos obligatorios para crear el paquete turístico")
                 raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Faltan campos obligatorios para crear el paquete turístico")
-            logger.info(f"Imágenes recibidas: {paquete_data.imagenes}")
+            logger.debug("Imágenes recibidas: %d", len(paquete_data.imagenes or ()))
             cursor = self.connection.cursor()
             cursor.execute("""
     INSERT INTO paquetes_turisticos (
@@ -53,17 +74,21 @@ class PaqueteTuristicoRepository(object):
             )
             paquete_row = dict(cursor.fetchone())
 
-            # Guardar imágenes en la tabla imagenes_paquetes
-            if paquete_data.imagenes:
-                for idx, img_base64 in enumerate(paquete_data.imagenes):
+            # Guardar las imágenes que ya son URLs; las de base64 las procesa la API en segundo plano
+            urls = [(idx, imagen) for idx, imagen in enumerate(paquete_data.imagenes or ()) if es_url(imagen)]
+            if urls:
+                for idx, url_imagen in urls:
                     cursor.execute(
                         """
                         INSERT INTO imagenes_paquetes (paquete_id, url_imagen, es_principal, orden)
                         VALUES (?, ?, ?, ?)
                         """,
-                        (paquete_id, img_base64, 1 if idx == 0 else 0, idx)
+                        (paquete_id, url_imagen, 1 if idx == 0 else 0, idx)
                     )
                 self.connection.commit()
+            # Las posiciones de las imágenes en base64 quedan reservadas hasta que se registren
+            if len(urls) < len(paquete_data.imagenes or ()):
+                self._ordenes_reservados[paquete_id] = len(paquete_data.imagenes)
 
             return await self._enrich_paquete_response(paquete_row)
         except HTTPException:
@@ -75,12 +100,39 @@ class PaqueteTuristicoRepository(object):
                 detail="Error interno del servidor"
             )
     
-    async def get_paquete_by_id(self, paquete_id: int, user_id: Optional[int] = None) -> Optional[PaqueteTuristicoResponse]:
+    def reservar_orden_imagenes(self, paquete_id: int, cantidad: int) -> int:
+        """Reserva `cantidad` posiciones al final de las imágenes del paquete y devuelve la primera.
+
+        Las imágenes se registran cuando termina su procesado, en cualquier
+        orden; reservar la posición al recibirlas conserva el orden de subida.
+        """
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "SELECT COALESCE(MAX(orden) + 1, 0) FROM imagenes_paquetes WHERE paquete_id = ?",
+            (paquete_id,)
+        )
+        primero = max(cursor.fetchone()[0], self._ordenes_reservados.get(paquete_id, 0))
+        self._ordenes_reservados[paquete_id] = primero + cantidad
+        return primero
+
+    async def agregar_imagen(self, paquete_id: int, url_imagen: str, orden: int) -> None:
+        """Registra una imagen ya procesada del paquete en la posición `orden`"""
+        cursor = self.connection.cursor()
+        cursor.execute(
+            """
+            INSERT INTO imagenes_paquetes (paquete_id, url_imagen, es_principal, orden)
+            VALUES (?, ?, ?, ?)
+            """,
+            (paquete_id, url_imagen, 1 if orden == 0 else 0, orden)
+        )
+        self.connection.commit()
+    
+    async def get_paquete_by_id(self, paquete_id: int, user_id: Optional[int] = None, campos: Optional[FrozenSet[str]] = None) -> Optional[PaqueteTuristicoResponse]:
         """Obtiene un paquete turístico por ID"""
         try:
             cursor = self.connection.cursor()
             cursor.execute(
-                "SELECT * FROM paquetes_turisticos WHERE id = ?",
+                f"SELECT {columnas_paquete(campos)} FROM paquetes_turisticos WHERE id = ?",
                 (paquete_id,)
             )
             paquete = cursor.fetchone()
@@ -89,26 +141,27 @@ class PaqueteTuristicoRepository(object):
                 return None
             
             return await self._enrich_paquete_response(
-                dict(paquete), user_id
+                dict(paquete), user_id, campos
             )
         except Exception as e:
             logger.error(f"Error al obtener paquete por ID: {e}")
             return None
     
-    async def get_all_paquetes(self, skip: int = 0, limit: int = 100, user_id: Optional[int] = None) -> List[PaqueteTuristicoResponse]:
-        """Obtiene todos los paquetes turísticos activos"""
+    async def get_all_paquetes(self, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, sort: str = "recent", campos: Optional[FrozenSet[str]] = None) -> List[PaqueteTuristicoResponse]:
+        """Obtiene todos los paquetes turísticos activos en el orden indicado"""
         try:
+            tabla, filtro_activo, orden = ORDENAMIENTOS_PAQUETE[sort]
             cursor = self.connection.cursor()
-            cursor.execute("""
-                SELECT * FROM paquetes_turisticos WHERE esta_activo = 1
-                ORDER BY fecha_creacion DESC
+            cursor.execute(f"""
+                SELECT {columnas_paquete(campos, "p.")} FROM {tabla} WHERE {filtro_activo}
+                ORDER BY {orden}
                 LIMIT ? OFFSET ?
             """, (limit, skip))
             
             paquetes = []
             for paquete in cursor.fetchall():
                 enriched_paquete = await self._enrich_paquete_response(
-                    dict(paquete), user_id
+                    dict(paquete), user_id, campos
                 )
                 paquetes.append(enriched_paquete)
             
@@ -117,19 +170,19 @@ class PaqueteTuristicoRepository(object):
             logger.error(f"Error al obtener paquetes: {e}")
             return []
     
-    async def get_paquetes_by_operador(self, operador_id: int, skip: int = 0, limit: int = 100) -> List[PaqueteTuristicoResponse]:
+    async def get_paquetes_by_operador(self, operador_id: int, skip: int = 0, limit: int = 100, campos: Optional[FrozenSet[str]] = None) -> List[PaqueteTuristicoResponse]:
         """Obtiene los paquetes de un operador turístico"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute("""
-                SELECT * FROM paquetes_turisticos WHERE operador_id = ? AND esta_activo = 1
+            cursor.execute(f"""
+                SELECT {columnas_paquete(campos)} FROM paquetes_turisticos WHERE operador_id = ? AND esta_activo = 1
                 ORDER BY fecha_creacion DESC
                 LIMIT ? OFFSET ?
             """, (operador_id, limit, skip))
             paquetes = []
             for paquete in cursor.fetchall():
                 enriched_paquete = await self._enrich_paquete_response(
-                    dict(paquete)
+                    dict(paquete), campos=campos
                 )
                 paquetes.append(enriched_paquete)
             return paquetes
@@ -137,9 +190,69 @@ class PaqueteTuristicoRepository(object):
             logger.error(f"Error al obtener paquetes del operador: {e}")
             return []
     
-    async def get_paquete_turistico_by_id(self, paquete_id: int, user_id: Optional[int] = None) -> Optional[PaqueteTuristicoResponse]:
+    async def get_paquetes_similares(self, paquete_id: int, limit: int = 10, user_id: Optional[int] = None, campos: Optional[FrozenSet[str]] = None) -> List[PaqueteTuristicoResponse]:
+        """Obtiene los paquetes activos más similares a uno dado (precalculados)"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f"""
+                SELECT {columnas_paquete(campos, "p.")} FROM paquetes_similares s
+                CROSS JOIN paquetes_turisticos p ON p.id = s.similar_id
+                WHERE s.paquete_id = ? AND p.esta_activo = 1
+                ORDER BY s.posicion
+                LIMIT ?
+            """, (paquete_id, limit))
+            paquetes = []
+            for paquete in cursor.fetchall():
+                enriched_paquete = await self._enrich_paquete_response(
+                    dict(paquete), user_id, campos
+                )
+                paquetes.append(enriched_paquete)
+            return paquetes
+        except Exception as e:
+            logger.error(f"Error al obtener paquetes similares: {e}")
+            return []
+    
+    async def get_paquetes_by_ids(self, paquete_ids: List[int], user_id: Optional[int] = None, campos: Optional[FrozenSet[str]] = None) -> List[PaqueteTuristicoResponse]:
+        """Obtiene varios paquetes activos conservando el orden de los IDs recibidos"""
+        try:
+            if not paquete_ids:
+                return []
+            cursor = self.connection.cursor()
+            cursor.execute(
+                f"SELECT {columnas_paquete(campos)} FROM paquetes_turisticos WHERE id IN ({', '.join('?' * len(paquete_ids))}) "
+                "AND esta_activo = 1",
+                paquete_ids
+            )
+            filas = {row['id']: dict(row) for row in cursor.fetchall()}
+            paquetes = []
+            for paquete_id in paquete_ids:
+                if paquete_id in filas:
+                    paquetes.append(await self._enrich_paquete_response(filas[paquete_id], user_id, campos))
+            return paquetes
+        except Exception as e:
+            logger.error(f"Error al obtener paquetes por IDs: {e}")
+            return []
+    
+    def get_tarjetas(self, skip: int = 0, limit: int = 100) -> List[dict]:
+        """Tarjetas de los paquetes activos más recientes, leídas solo del índice idx_tarjetas_activas"""
+        try:
+            cursor = self.connection.cursor()
+            # Tuplas en lugar de sqlite3.Row: el dict se arma directamente con COLUMNAS_TARJETA
+            cursor.row_factory = None
+            cursor.execute(f"""
+                SELECT paquete_id, {', '.join(COLUMNAS_TARJETA[1:])}
+                FROM paquetes_tarjetas WHERE esta_activo = 1
+                ORDER BY fecha_creacion DESC, paquete_id
+                LIMIT ? OFFSET ?
+            """, (limit, skip))
+            return [dict(zip(COLUMNAS_TARJETA, fila)) for fila in cursor.fetchall()]
+        except Exception as e:
+            logger.error(f"Error al obtener tarjetas de paquetes: {e}")
+            return []
+    
+    async def get_paquete_turistico_by_id(self, paquete_id: int, user_id: Optional[int] = None, campos: Optional[FrozenSet[str]] = None) -> Optional[PaqueteTuristicoResponse]:
         """Alias para obtener paquete turístico por ID"""
-        return await self.get_paquete_by_id(paquete_id, user_id)
+        return await self.get_paquete_by_id(paquete_id, user_id, campos)
 
     async def update_paquete(self, paquete_id: int, paquete_update: PaqueteTuristicoUpdate) -> Optional[PaqueteTuristicoResponse]:
         """Actualiza un paquete turístico"""
@@ -157,15 +270,13 @@ class PaqueteTuristicoRepository(object):
                 update_data['precio_grupal'] = float(update_data['precio_grupal'])
             
             # Construir query de actualización
-            set_clause = ", ".join([f"{k} = ?" for k in update_data.keys()])
-            values = list(update_data.values()) + [paquete_id]
+            query, values = construir_update(
+                "paquetes_turisticos", update_data, paquete_id,
+                extras=("fecha_actualizacion = CURRENT_TIMESTAMP",)
+            )
             
             cursor = self.connection.cursor()
-            cursor.execute(
-                f"UPDATE paquetes_turisticos SET {set_clause}, "
-                f"fecha_actualizacion = CURRENT_TIMESTAMP WHERE id = ?",
-                values
-            )
+            cursor.execute(query, values)
             
             if cursor.rowcount == 0:
                 raise HTTPException(
@@ -288,98 +399,219 @@ class PaqueteTuristicoRepository(object):
             logger.error(f"Error al buscar paquetes turísticos: {e}")
             return []
     
-    async def search_paquetes_turisticos(self, filtros: PaqueteTuristicoFiltros, skip: int = 0, limit: int = 100, user_id: Optional[int] = None) -> List[PaqueteTuristicoResponse]:
-        """Busca paquetes turísticos según filtros avanzados"""
+    async def search_paquetes_turisticos(self, filtros: PaqueteTuristicoFiltros, skip: int = 0, limit: int = 100, user_id: Optional[int] = None, sort: str = "recent", campos: Optional[FrozenSet[str]] = None) -> List[PaqueteTuristicoResponse]:
+        """Busca paquetes turísticos activos según filtros avanzados"""
         try:
-            cursor = self.connection.cursor()
-            query = "SELECT * FROM paquetes_turisticos WHERE 1=1"
-            params = []
+            if settings.catalogo_en_memoria:
+                paquete_ids = catalogo_repository.buscar(filtros, skip, limit, sort)
+                if paquete_ids is not None:
+                    return await self.get_paquetes_by_ids(paquete_ids, campos=campos)
+
+            tabla, filtro_activo, orden = ORDENAMIENTOS_PAQUETE[sort]
+            consulta = ConsultaFiltrada(f"SELECT {columnas_paquete(campos, 'p.')} FROM {tabla} WHERE {filtro_activo}")
 
             if filtros.tipo_paquete:
-                query += " AND tipo_paquete = ?"
-                params.append(filtros.tipo_paquete)
+                consulta.donde("p.tipo_paquete = ?", filtros.tipo_paquete)
             if filtros.pais_destino:
-                query += " AND pais_destino = ?"
-                params.append(filtros.pais_destino)
+                consulta.donde("p.pais_destino = ?", filtros.pais_destino)
             if filtros.ciudad_destino:
-                query += " AND ciudad_destino = ?"
-                params.append(filtros.ciudad_destino)
+                consulta.donde("p.ciudad_destino = ?", filtros.ciudad_destino)
             if filtros.nivel_dificultad:
-                query += " AND nivel_dificultad = ?"
-                params.append(filtros.nivel_dificultad)
+                consulta.donde("p.nivel_dificultad = ?", filtros.nivel_dificultad)
             if filtros.precio_min is not None:
-                query += " AND precio_por_persona >= ?"
-                params.append(float(filtros.precio_min))
+                consulta.donde("p.precio_por_persona >= ?", float(filtros.precio_min))
             if filtros.precio_max is not None:
-                query += " AND precio_por_persona <= ?"
-                params.append(float(filtros.precio_max))
+                consulta.donde("p.precio_por_persona <= ?", float(filtros.precio_max))
             if filtros.duracion_min is not None:
-                query += " AND duracion_dias >= ?"
-                params.append(filtros.duracion_min)
+                consulta.donde("p.duracion_dias >= ?", filtros.duracion_min)
             if filtros.duracion_max is not None:
-                query += " AND duracion_dias <= ?"
-                params.append(filtros.duracion_max)
-
-            query += " LIMIT ? OFFSET ?"
-            params.extend([limit, skip])
+                consulta.donde("p.duracion_dias <= ?", filtros.duracion_max)
+            if filtros.capacidad_minima is not None:
+                consulta.donde("p.capacidad_maxima >= ?", filtros.capacidad_minima)
+            if filtros.edad_minima_max is not None:
+                consulta.donde("p.edad_minima <= ?", filtros.edad_minima_max)
+            for servicio in SERVICIOS:
+                if getattr(filtros, servicio) is not None:
+                    consulta.donde(f"p.{servicio} = ?", getattr(filtros, servicio))
 
-            cursor.execute(query, params)
+            cursor = self.connection.cursor()
+            cursor.execute(consulta.sql(f"ORDER BY {orden} LIMIT ? OFFSET ?"), consulta.params + [limit, skip])
             rows = cursor.fetchall()
             paquetes = []
             for row in rows:
                 paquete_row = dict(row)
-                paquete = await self._enrich_paquete_response(paquete_row)
+                paquete = await self._enrich_paquete_response(paquete_row, campos=campos)
                 paquetes.append(paquete)
             return paquetes
         except Exception as e:
             logger.error(f"Error en búsqueda de paquetes turísticos: {e}")
             raise HTTPException(status_code=500, detail="Error interno en búsqueda de paquetes turísticos")
     
-    async def _enrich_paquete_response(self, paquete_data: dict, user_id: Optional[int] = None) -> PaqueteTuristicoResponse:
-        """Enriquece la respuesta de paquete turístico con datos adicionales"""
+    def get_facetas(self, filtros: PaqueteTuristicoFiltros) -> PaqueteTuristicoFacetas:
+        """Cuenta los paquetes activos por faceta para los filtros de búsqueda.
+
+        Una sola consulta agrupa por todas las dimensiones de faceta sobre el
+        índice de cobertura idx_paquetes_facetas; los filtros de esas dimensiones
+        y el de precio (como columna en_precio) se aplican después sobre los
+        grupos, de modo que cada faceta se cuenta con todos los filtros excepto
+        el suyo.
+        """
         try:
-            # Obtener datos del operador turístico
+            rango_sql = " ".join(
+                f"WHEN precio_por_persona < {limite} THEN {i}" for i, limite in enumerate(LIMITES_PRECIO)
+            )
+            precio_sql, precio_params = [], []
+            if filtros.precio_min is not None:
+                precio_sql.append("precio_por_persona >= ?")
+                precio_params.append(float(filtros.precio_min))
+            if filtros.precio_max is not None:
+                precio_sql.append("precio_por_persona <= ?")
+                precio_params.append(float(filtros.precio_max))
+            consulta = ConsultaFiltrada(f"""
+                SELECT tipo_paquete, nivel_dificultad, pais_destino,
+                       {', '.join(SERVICIOS)},
+                       CASE {rango_sql} ELSE {len(LIMITES_PRECIO)} END AS rango_precio,
+                       ({' AND '.join(precio_sql) or '1'}) AS en_precio,
+                       COUNT(*) AS total
+                FROM paquetes_turisticos WHERE esta_activo = 1
+            """)
+            consulta.params.extend(precio_params)
+            if filtros.ciudad_destino:
+                consulta.donde("ciudad_destino = ?", filtros.ciudad_destino)
+            if filtros.duracion_min is not None:
+                consulta.donde("duracion_dias >= ?", filtros.duracion_min)
+            if filtros.duracion_max is not None:
+                consulta.donde("duracion_dias <= ?", filtros.duracion_max)
+            if filtros.capacidad_minima is not None:
+                consulta.donde("capacidad_maxima >= ?", filtros.capacidad_minima)
+            if filtros.edad_minima_max is not None:
+                consulta.donde("edad_minima <= ?", filtros.edad_minima_max)
+
             cursor = self.connection.cursor()
             cursor.execute(
-                "SELECT nombre, apellido, avatar_url FROM usuarios WHERE id = ?",
-                (paquete_data['operador_id'],)
+                consulta.sql(f"GROUP BY tipo_paquete, nivel_dificultad, pais_destino, {', '.join(SERVICIOS)}, rango_precio, en_precio"),
+                consulta.params
             )
-            operador = cursor.fetchone()
-            
-            if operador:
-                operador_dict = dict(operador)
-                paquete_data['operador_nombre'] = operador_dict['nombre']
-                paquete_data['operador_apellido'] = operador_dict['apellido']
-                paquete_data['operador_avatar'] = operador_dict['avatar_url']
+            grupos = cursor.fetchall()
+
+            # Filtros de las dimensiones de faceta, comparados con cada grupo
+            activos = {
+                dimension: getattr(filtros, dimension)
+                for dimension in DIMENSIONES_FACETA
+                if getattr(filtros, dimension) not in (None, "")
+            }
+            conteos = {dimension: {} for dimension in ("tipo_paquete", "nivel_dificultad", "pais_destino", "rango_precio")}
+            servicios = {servicio: 0 for servicio in SERVICIOS}
+            total = 0
+            for grupo in grupos:
+                fallos = [
+                    dimension for dimension, valor in activos.items()
+                    if (bool(grupo[dimension]) if dimension in SERVICIOS else grupo[dimension]) != valor
+                ]
+                if not grupo['en_precio']:
+                    fallos.append("rango_precio")
+                if len(fallos) > 1:
+                    continue
+                fallo = fallos[0] if fallos else None
+                if fallo is None:
+                    total += grupo['total']
+                if fallo in (None, "rango_precio"):
+                    conteos['rango_precio'][grupo['rango_precio']] = (
+                        conteos['rango_precio'].get(grupo['rango_precio'], 0) + grupo['total']
+                    )
+                for dimension in ("tipo_paquete", "nivel_dificultad", "pais_destino"):
+                    if fallo in (None, dimension):
+                        conteos[dimension][grupo[dimension]] = conteos[dimension].get(grupo[dimension], 0) + grupo['total']
+                for servicio in SERVICIOS:
+                    if fallo in (None, servicio) and grupo[servicio]:
+                        servicios[servicio] += grupo['total']
+
+            limites = (0,) + LIMITES_PRECIO
+            return PaqueteTuristicoFacetas(
+                total=total,
+                tipo_paquete=self._ordenar_faceta(conteos['tipo_paquete']),
+                nivel_dificultad=self._ordenar_faceta(conteos['nivel_dificultad']),
+                pais_destino=self._ordenar_faceta(conteos['pais_destino']),
+                rango_precio=[
+                    {
+                        "desde": limites[i],
+                        "hasta": LIMITES_PRECIO[i] if i < len(LIMITES_PRECIO) else None,
+                        "total": conteos['rango_precio'].get(i, 0)
+                    }
+                    for i in range(len(limites))
+                ],
+                servicios=servicios
+            )
+        except Exception as e:
+            logger.error(f"Error al calcular facetas de paquetes turísticos: {e}")
+            raise HTTPException(status_code=500, detail="Error interno en búsqueda de paquetes turísticos")
+    
+    @staticmethod
+    def _ordenar_faceta(conteos: dict) -> List[dict]:
+        """Ordena los valores de una faceta por cantidad de paquetes"""
+        return [
+            {"valor": valor, "total": total}
+            for valor, total in sorted(conteos.items(), key=lambda item: (-item[1], item[0]))
+        ]
+    
+    async def _enrich_paquete_response(self, paquete_data: dict, user_id: Optional[int] = None, campos: Optional[FrozenSet[str]] = None) -> PaqueteTuristicoResponse:
+        """Enriquece la respuesta de paquete turístico con datos adicionales (solo los pedidos en `campos`)"""
+        modelo = modelo_respuesta(PaqueteTuristicoResponse, campos)
+        try:
+            cursor = self.connection.cursor()
+            # Obtener datos del operador turístico
+            if pide(campos, *CAMPOS_OPERADOR):
+                cursor.execute(
+                    "SELECT nombre, apellido, avatar_url FROM usuarios WHERE id = ?",
+                    (paquete_data['operador_id'],)
+                )
+                operador = cursor.fetchone()
+                
+                if operador:
+                    operador_dict = dict(operador)
+                    paquete_data['operador_nombre'] = operador_dict['nombre']
+                    paquete_data['operador_apellido'] = operador_dict['apellido']
+                    paquete_data['operador_avatar'] = operador_dict['avatar_url']
             
             # Obtener calificación promedio y total de reviews
             # Nota: Necesitaremos actualizar las reviews para que trabajen con paquetes
-            cursor.execute("""
-                SELECT AVG(calificacion) as promedio, COUNT(*) as total
-                FROM reviews WHERE paquete_id = ?
-            """, (paquete_data['id'],))
-            
-            review_stats = cursor.fetchone()
-            if review_stats:
-                review_dict = dict(review_stats)
-                paquete_data['calificacion_promedio'] = (
-                    float(review_dict['promedio']) if review_dict['promedio'] else None
-                )
-                paquete_data['total_reviews'] = review_dict['total']
+            if pide(campos, 'calificacion_promedio', 'total_reviews'):
+                cursor.execute("""
+                    SELECT AVG(calificacion) as promedio, COUNT(*) as total
+                    FROM reviews WHERE paquete_id = ?
+                """, (paquete_data['id'],))
+                
+                review_stats = cursor.fetchone()
+                if review_stats:
+                    review_dict = dict(review_stats)
+                    paquete_data['calificacion_promedio'] = (
+                        float(review_dict['promedio']) if review_dict['promedio'] else None
+                    )
+                    paquete_data['total_reviews'] = review_dict['total']
             
             # Obtener imágenes del paquete
-            cursor.execute(
-                "SELECT url_imagen FROM imagenes_paquetes WHERE paquete_id = ? "
-                "ORDER BY orden, es_principal DESC",
-                (paquete_data['id'],)
-            )
-            
-            imagenes_result = cursor.fetchall()
-            imagenes = [dict(row)['url_imagen'] for row in imagenes_result]
-            paquete_data['imagenes'] = imagenes
+            if pide(campos, 'imagenes'):
+                cursor.execute(
+                    "SELECT url_imagen FROM imagenes_paquetes WHERE paquete_id = ? "
+                    "ORDER BY orden, es_principal DESC",
+                    (paquete_data['id'],)
+                )
+                
+                imagenes_result = cursor.fetchall()
+                imagenes = [dict(row)['url_imagen'] for row in imagenes_result]
+                paquete_data['imagenes'] = imagenes
+                paquete_data['imagen_principal'] = imagenes[0] if imagenes else None
+            elif 'imagen_principal' in campos:
+                cursor.execute(
+                    "SELECT url_imagen FROM imagenes_paquetes WHERE paquete_id = ? "
+                    "ORDER BY orden, es_principal DESC LIMIT 1",
+                    (paquete_data['id'],)
+                )
+                principal = cursor.fetchone()
+                paquete_data['imagen_principal'] = principal['url_imagen'] if principal else None
             
             # Verificar si es favorito del usuario
-            if user_id:
+            if user_id and pide(campos, 'es_favorito'):
                 cursor.execute(
                     "SELECT id FROM favoritos WHERE usuario_id = ? AND paquete_id = ?",
                     (user_id, paquete_data['id'])
@@ -387,12 +619,10 @@ class PaqueteTuristicoRepository(object):
                 favorito = cursor.fetchone()
                 paquete_data['es_favorito'] = favorito is not None
             
-
-            
-            return PaqueteTuristicoResponse(**paquete_data)
+            return modelo(**paquete_data)
         except Exception as e:
             logger.error(f"Error al enriquecer respuesta de paquete turístico: {e}")
-            return PaqueteTuristicoResponse(**paquete_data)
+            return modelo(**paquete_data)
     
 
         # Alias para compatibilidad con el API
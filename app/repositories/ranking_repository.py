@@ -0,0 +1,148 @@
+from typing import List, Optional
+from datetime import datetime
+from app.config import settings
+from app.database import db, UsaConexion
+from app.repositories.review_repository import calcular_calificacion_bayesiana
+import logging
+import math
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+# Pesos de cada señal en la puntuación de popularidad
+PESO_RESERVAS = 1.0
+PESO_RESERVAS_RECIENTES = 2.0
+PESO_FAVORITOS = 0.5
+PESO_CALIFICACION = 1.5
+PESO_NOVEDAD = 1.0
+# Días en los que la bonificación por novedad cae a la mitad
+VIDA_MEDIA_NOVEDAD_DIAS = 30
+DIAS_RESERVAS_RECIENTES = 30
+
+# Ordenamientos soportados por los listados: tabla base, filtro de activos y ORDER BY.
+# Cada ordenamiento coincide con un índice compuesto (esta_activo, columna) para
+# que SQLite recorra el índice en lugar de ordenar en una tabla temporal.
+ORDENAMIENTOS_PAQUETE = {
+    "recent": (
+        "paquetes_turisticos p",
+        "p.esta_activo = 1",
+        "p.fecha_creacion DESC, p.id"
+    ),
+    "price": (
+        "paquetes_turisticos p",
+        "p.esta_activo = 1",
+        "p.precio_por_persona, p.id"
+    ),
+    "popular": (
+        "paquete_rankings r CROSS JOIN paquetes_turisticos p ON p.id = r.paquete_id",
+        "r.esta_activo = 1",
+        "r.puntuacion_popularidad DESC, r.paquete_id"
+    ),
+    "rating": (
+        "paquete_rankings r CROSS JOIN paquetes_turisticos p ON p.id = r.paquete_id",
+        "r.esta_activo = 1",
+        "r.puntuacion_calificacion DESC, r.paquete_id"
+    ),
+}
+
+ORDENAMIENTO_PATTERN = "^(" + "|".join(ORDENAMIENTOS_PAQUETE) + ")$"
+
+def _parse_timestamp(valor) -> Optional[datetime]:
+    """Convierte un TIMESTAMP de SQLite en datetime"""
+    if not valor:
+        return None
+    try:
+        return datetime.fromisoformat(str(valor))
+    except ValueError:
+        return None
+
+class RankingRepository(UsaConexion):
+    def calcular_rankings(self) -> List[tuple]:
+        """Calcula las puntuaciones de todos los paquetes activos.
+
+        Solo lee, con una conexión propia, para poder ejecutarse en un hilo
+        aparte sin compartir cursores con las peticiones en curso.
+        """
+        connection = db.create_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT paquete_id, COUNT(*) AS total,
+                       TOTAL(fecha_creacion >= datetime('now', ?)) AS recientes
+                FROM reservas WHERE estado != 'cancelada'
+                GROUP BY paquete_id
+            """, (f"-{DIAS_RESERVAS_RECIENTES} days",))
+            reservas = {row['paquete_id']: (row['total'], int(row['recientes'])) for row in cursor.fetchall()}
+
+            cursor.execute("SELECT paquete_id, COUNT(*) AS total FROM favoritos GROUP BY paquete_id")
+            favoritos = {row['paquete_id']: row['total'] for row in cursor.fetchall()}
+
+            cursor.execute("SELECT paquete_id, total, suma_calificacion FROM review_stats")
+            review_stats = {row['paquete_id']: (row['total'], row['suma_calificacion']) for row in cursor.fetchall()}
+            total_global, suma_global = review_stats.pop(0, (0, 0))
+            media_global = suma_global / total_global if total_global else 3.0
+
+            cursor.execute("SELECT id, fecha_creacion FROM paquetes_turisticos WHERE esta_activo = 1")
+            paquetes = cursor.fetchall()
+        finally:
+            connection.close()
+
+        ahora = datetime.utcnow()
+        filas = []
+        for paquete in paquetes:
+            paquete_id = paquete['id']
+            total_reservas, reservas_recientes = reservas.get(paquete_id, (0, 0))
+            total_favoritos = favoritos.get(paquete_id, 0)
+            total_reviews, suma_calificacion = review_stats.get(paquete_id, (0, 0))
+
+            calificacion = calcular_calificacion_bayesiana(
+                suma_calificacion, total_reviews, media_global, settings.review_prior_weight
+            ) or media_global
+
+            fecha_creacion = _parse_timestamp(paquete['fecha_creacion'])
+            edad_dias = max((ahora - fecha_creacion).total_seconds() / 86400, 0) if fecha_creacion else 0
+            novedad = math.pow(0.5, edad_dias / VIDA_MEDIA_NOVEDAD_DIAS)
+
+            popularidad = (
+                PESO_RESERVAS * math.log1p(total_reservas)
+                + PESO_RESERVAS_RECIENTES * math.log1p(reservas_recientes)
+                + PESO_FAVORITOS * math.log1p(total_favoritos)
+                + PESO_CALIFICACION * (calificacion / 5)
+                + PESO_NOVEDAD * novedad
+            )
+            filas.append((
+                total_reservas, reservas_recientes, total_favoritos,
+                calificacion if total_reviews else None,
+                popularidad, calificacion, paquete_id
+            ))
+        return filas
+
+    def guardar_rankings(self, filas: List[tuple]) -> int:
+        """Guarda las puntuaciones calculadas en paquete_rankings"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.executemany("""
+                UPDATE paquete_rankings SET
+                    total_reservas = ?,
+                    reservas_recientes = ?,
+                    total_favoritos = ?,
+                    calificacion_bayesiana = ?,
+                    puntuacion_popularidad = ?,
+                    puntuacion_calificacion = ?,
+                    fecha_calculo = CURRENT_TIMESTAMP
+                WHERE paquete_id = ?
+            """, filas)
+            self.connection.commit()
+            logger.info(f"Rankings recalculados para {len(filas)} paquetes turísticos")
+            return len(filas)
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            logger.error(f"Error al guardar rankings: {e}")
+            raise
+
+    def recalcular_rankings(self) -> int:
+        """Calcula y guarda los rankings en una sola llamada"""
+        return self.guardar_rankings(self.calcular_rankings())
+
+# Instancia global del repository de rankings
+ranking_repository = RankingRepository()
@@ -0,0 +1,340 @@
+from typing import List, Set
+from app.config import settings
+from app.database import db, UsaConexion
+import json
+import logging
+import sqlite3
+
+
+logger = logging.getLogger(__name__)
+
+# Si cambia más de esta fracción del catálogo se recalcula todo
+FRACCION_RECALCULO_COMPLETO = 0.2
+# Recálculo completo periódico, para absorber cambios en la normalización de precios y duraciones
+# y las interacciones eliminadas (reservas canceladas, favoritos quitados)
+HORAS_RECALCULO_COMPLETO = 24
+# Interacciones de un usuario consideradas al construir y mezclar coocurrencias
+MAX_HISTORIAL = 100
+
+# Interacciones usuario-paquete: reservas no canceladas y favoritos
+INTERACCIONES_SQL = """
+    SELECT turista_id AS usuario_id, paquete_id FROM reservas WHERE estado != 'cancelada'
+    UNION
+    SELECT usuario_id, paquete_id FROM favoritos
+"""
+
+class RecomendacionRepository(UsaConexion):
+    def calcular_similares(self) -> dict:
+        """Calcula los vecinos similares de los paquetes que cambiaron desde la última ejecución.
+
+        Solo lee, con una conexión propia, para poder ejecutarse en un hilo
+        aparte. Devuelve las filas a reemplazar para `guardar_similares`.
+        """
+        # NumPy se carga con el primer cálculo, no al arrancar la aplicación
+        import numpy as np
+        from app.recomendaciones import vectorizar_paquetes, top_k_similares, filas_afectadas
+
+        connection = db.create_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT CURRENT_TIMESTAMP AS ahora, datetime('now', ?) AS limite_completa",
+                (f"-{HORAS_RECALCULO_COMPLETO} hours",)
+            )
+            tiempos = cursor.fetchone()
+            marca = tiempos['ahora']
+
+            cursor.execute(
+                "SELECT ultima_ejecucion, ultima_completa FROM trabajos_estado WHERE nombre = 'similares'"
+            )
+            estado = cursor.fetchone()
+            ultima_ejecucion = estado['ultima_ejecucion'] if estado else None
+            ultima_completa = estado['ultima_completa'] if estado else None
+
+            cursor.execute("""
+                SELECT id, titulo, descripcion, tipo_paquete, nivel_dificultad,
+                       precio_por_persona, duracion_dias, latitud, longitud,
+                       incluye_transporte, incluye_alojamiento, incluye_comidas, incluye_guia,
+                       fecha_actualizacion
+                FROM paquetes_turisticos WHERE esta_activo = 1
+                ORDER BY id
+            """)
+            paquetes = [dict(row) for row in cursor.fetchall()]
+            ids = np.array([paquete['id'] for paquete in paquetes], dtype=np.int64)
+            posiciones = {int(paquete_id): i for i, paquete_id in enumerate(ids)}
+
+            cursor.execute("SELECT DISTINCT paquete_id FROM paquetes_similares")
+            retirados = [row['paquete_id'] for row in cursor.fetchall() if row['paquete_id'] not in posiciones]
+
+            cambiadas = [
+                i for i, paquete in enumerate(paquetes)
+                if ultima_ejecucion is None or (paquete['fecha_actualizacion'] or '') >= ultima_ejecucion
+            ]
+            completo = (
+                ultima_ejecucion is None
+                or ultima_completa is None
+                or ultima_completa < tiempos['limite_completa']
+                or len(cambiadas) > FRACCION_RECALCULO_COMPLETO * max(len(paquetes), 1)
+            )
+
+            matriz = vectorizar_paquetes(paquetes, settings.similares_usar_descripcion) if paquetes else None
+            k = settings.similares_k
+
+            if completo:
+                filas = list(range(len(paquetes)))
+            else:
+                # Filas cuyo último vecino guardado es superado por un paquete cambiado
+                umbrales = np.full(len(paquetes), -np.inf, dtype=np.float32)
+                cursor.execute(
+                    "SELECT paquete_id, similitud FROM paquetes_similares WHERE posicion = ?",
+                    (k - 1,)
+                )
+                for row in cursor.fetchall():
+                    if row['paquete_id'] in posiciones:
+                        umbrales[posiciones[row['paquete_id']]] = row['similitud']
+                afectadas = set(cambiadas)
+                if matriz is not None:
+                    afectadas.update(int(i) for i in filas_afectadas(matriz, cambiadas, umbrales))
+
+                # Filas que tenían como vecino a un paquete cambiado o retirado
+                referenciados = [int(ids[i]) for i in cambiadas] + retirados
+                for inicio in range(0, len(referenciados), 500):
+                    bloque = referenciados[inicio:inicio + 500]
+                    cursor.execute(
+                        "SELECT DISTINCT paquete_id FROM paquetes_similares "
+                        f"WHERE similar_id IN ({', '.join('?' * len(bloque))})",
+                        bloque
+                    )
+                    afectadas.update(
+                        posiciones[row['paquete_id']] for row in cursor.fetchall()
+                        if row['paquete_id'] in posiciones
+                    )
+                filas = sorted(afectadas)
+        finally:
+            connection.close()
+
+        vecinos = top_k_similares(matriz, filas, k) if matriz is not None else {}
+        return {
+            "completo": completo,
+            "marca": marca,
+            "reemplazar": [int(ids[fila]) for fila in filas] + retirados,
+            "filas": [
+                (int(ids[fila]), posicion, int(ids[vecino]), similitud)
+                for fila, lista in vecinos.items()
+                for posicion, (vecino, similitud) in enumerate(lista)
+            ]
+        }
+
+    def guardar_similares(self, resultado: dict) -> int:
+        """Reemplaza las listas de vecinos calculadas por `calcular_similares`"""
+        try:
+            cursor = self.connection.cursor()
+            if resultado['completo']:
+                cursor.execute("DELETE FROM paquetes_similares")
+            else:
+                cursor.executemany(
+                    "DELETE FROM paquetes_similares WHERE paquete_id = ?",
+                    [(paquete_id,) for paquete_id in resultado['reemplazar']]
+                )
+            cursor.executemany("""
+                INSERT INTO paquetes_similares (paquete_id, posicion, similar_id, similitud)
+                VALUES (?, ?, ?, ?)
+            """, resultado['filas'])
+            cursor.execute("""
+                INSERT INTO trabajos_estado (nombre, ultima_ejecucion, ultima_completa) VALUES ('similares', ?, ?)
+                ON CONFLICT(nombre) DO UPDATE SET
+                    ultima_ejecucion = excluded.ultima_ejecucion,
+                    ultima_completa = COALESCE(excluded.ultima_completa, ultima_completa)
+            """, (resultado['marca'], resultado['marca'] if resultado['completo'] else None))
+            self.connection.commit()
+            logger.info(
+                f"Paquetes similares actualizados ({'completo' if resultado['completo'] else 'incremental'}): "
+                f"{len(resultado['reemplazar'])} paquetes"
+            )
+            return len(resultado['reemplazar'])
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            logger.error(f"Error al guardar paquetes similares: {e}")
+            raise
+
+    def recalcular_similares(self) -> int:
+        """Calcula y guarda los paquetes similares en una sola llamada"""
+        return self.guardar_similares(self.calcular_similares())
+
+    def calcular_coocurrencias(self) -> dict:
+        """Calcula los paquetes relacionados por coocurrencia en reservas y favoritos.
+
+        En modo incremental solo se recalculan los paquetes del historial de los
+        usuarios con reservas o favoritos nuevos desde la última ejecución.
+        Solo lee, con una conexión propia, para poder ejecutarse en un hilo aparte.
+        """
+        import numpy as np
+        from app.recomendaciones import coocurrencias_top_n
+
+        connection = db.create_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(
+                "SELECT CURRENT_TIMESTAMP AS ahora, datetime('now', ?) AS limite_completa, "
+                "(SELECT MAX(id) FROM reservas) AS max_reserva, "
+                "(SELECT MAX(id) FROM favoritos) AS max_favorito",
+                (f"-{HORAS_RECALCULO_COMPLETO} hours",)
+            )
+            tiempos = cursor.fetchone()
+            progreso = {
+                "reservas": tiempos['max_reserva'] or 0,
+                "favoritos": tiempos['max_favorito'] or 0
+            }
+
+            cursor.execute(
+                "SELECT ultima_completa, progreso FROM trabajos_estado WHERE nombre = 'coocurrencias'"
+            )
+            estado = cursor.fetchone()
+            anterior = json.loads(estado['progreso']) if estado and estado['progreso'] else None
+            completo = (
+                anterior is None
+                or estado['ultima_completa'] is None
+                or estado['ultima_completa'] < tiempos['limite_completa']
+            )
+
+            cursor.execute(f"SELECT usuario_id, paquete_id FROM ({INTERACCIONES_SQL}) ORDER BY usuario_id")
+            pares = cursor.fetchall()
+            usuarios = np.array([par['usuario_id'] for par in pares], dtype=np.int64)
+            paquetes = np.array([par['paquete_id'] for par in pares], dtype=np.int64)
+
+            if completo:
+                filas = np.unique(paquetes).tolist()
+            else:
+                # Usuarios con interacciones nuevas desde la última ejecución
+                cursor.execute("""
+                    SELECT turista_id AS usuario_id FROM reservas WHERE id > ? AND id <= ?
+                    UNION
+                    SELECT usuario_id FROM favoritos WHERE id > ? AND id <= ?
+                """, (
+                    anterior['reservas'], progreso['reservas'],
+                    anterior['favoritos'], progreso['favoritos']
+                ))
+                nuevos = np.array([row['usuario_id'] for row in cursor.fetchall()], dtype=np.int64)
+                cambiados = np.unique(paquetes[np.isin(usuarios, nuevos)]).tolist()
+
+                # Al cambiar el total de un paquete cambia su puntuación en las listas que lo incluyen
+                afectados = set(cambiados)
+                for inicio in range(0, len(cambiados), 500):
+                    bloque = cambiados[inicio:inicio + 500]
+                    cursor.execute(
+                        "SELECT DISTINCT paquete_id FROM paquetes_coocurrencia "
+                        f"WHERE relacionado_id IN ({', '.join('?' * len(bloque))})",
+                        bloque
+                    )
+                    afectados.update(row['paquete_id'] for row in cursor.fetchall())
+                filas = sorted(afectados)
+        finally:
+            connection.close()
+
+        vecinos = coocurrencias_top_n(usuarios, paquetes, filas, settings.coocurrencias_n, MAX_HISTORIAL)
+        return {
+            "completo": completo,
+            "marca": tiempos['ahora'],
+            "progreso": progreso,
+            "reemplazar": filas,
+            "filas": [
+                (paquete_id, posicion, relacionado_id, puntuacion)
+                for paquete_id, lista in vecinos.items()
+                for posicion, (relacionado_id, puntuacion) in enumerate(lista)
+            ]
+        }
+
+    def guardar_coocurrencias(self, resultado: dict) -> int:
+        """Reemplaza las listas de paquetes relacionados calculadas por `calcular_coocurrencias`"""
+        try:
+            cursor = self.connection.cursor()
+            if resultado['completo']:
+                cursor.execute("DELETE FROM paquetes_coocurrencia")
+            else:
+                cursor.executemany(
+                    "DELETE FROM paquetes_coocurrencia WHERE paquete_id = ?",
+                    [(paquete_id,) for paquete_id in resultado['reemplazar']]
+                )
+            cursor.executemany("""
+                INSERT INTO paquetes_coocurrencia (paquete_id, posicion, relacionado_id, puntuacion)
+                VALUES (?, ?, ?, ?)
+            """, resultado['filas'])
+            cursor.execute("""
+                INSERT INTO trabajos_estado (nombre, ultima_ejecucion, ultima_completa, progreso)
+                VALUES ('coocurrencias', ?, ?, ?)
+                ON CONFLICT(nombre) DO UPDATE SET
+                    ultima_ejecucion = excluded.ultima_ejecucion,
+                    ultima_completa = COALESCE(excluded.ultima_completa, ultima_completa),
+                    progreso = excluded.progreso
+            """, (
+                resultado['marca'],
+                resultado['marca'] if resultado['completo'] else None,
+                json.dumps(resultado['progreso'])
+            ))
+            self.connection.commit()
+            logger.info(
+                f"Coocurrencias actualizadas ({'completo' if resultado['completo'] else 'incremental'}): "
+                f"{len(resultado['reemplazar'])} paquetes"
+            )
+            return len(resultado['reemplazar'])
+        except sqlite3.Error as e:
+            self.connection.rollback()
+            logger.error(f"Error al guardar coocurrencias: {e}")
+            raise
+
+    def recalcular_coocurrencias(self) -> int:
+        """Calcula y guarda las coocurrencias en una sola llamada"""
+        return self.guardar_coocurrencias(self.calcular_coocurrencias())
+
+    def get_historial_usuario(self, user_id: int) -> Set[int]:
+        """IDs de los paquetes que el usuario reservó (sin cancelar) o marcó como favoritos"""
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT paquete_id FROM reservas WHERE turista_id = ? AND estado != 'cancelada'
+                UNION
+                SELECT paquete_id FROM favoritos WHERE usuario_id = ?
+            """, (user_id, user_id))
+            return {row['paquete_id'] for row in cursor.fetchall()}
+        except Exception as e:
+            logger.error(f"Error al obtener el historial del usuario: {e}")
+            return set()
+
+    def get_recomendaciones_usuario(self, user_id: int, limit: int = 10) -> List[int]:
+        """Mezcla los paquetes relacionados con el historial del usuario.
+
+        Devuelve los IDs de paquetes activos ordenados por puntuación acumulada,
+        sin incluir los que el usuario ya reservó o marcó como favoritos.
+        """
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute("""
+                SELECT paquete_id FROM reservas WHERE turista_id = ? AND estado != 'cancelada'
+                UNION
+                SELECT paquete_id FROM favoritos WHERE usuario_id = ?
+                LIMIT ?
+            """, (user_id, user_id, MAX_HISTORIAL))
+            historial = [row['paquete_id'] for row in cursor.fetchall()]
+            if not historial:
+                return []
+
+            cursor.execute(f"""
+                SELECT c.relacionado_id, SUM(c.puntuacion) AS puntuacion
+                FROM paquetes_coocurrencia c
+                JOIN paquetes_turisticos p ON p.id = c.relacionado_id
+                WHERE c.paquete_id IN ({', '.join('?' * len(historial))})
+                  AND p.esta_activo = 1
+                GROUP BY c.relacionado_id
+                ORDER BY puntuacion DESC
+            """, historial)
+            vistos = set(historial)
+            return [
+                row['relacionado_id'] for row in cursor.fetchall()
+                if row['relacionado_id'] not in vistos
+            ][:limit]
+        except Exception as e:
+            logger.error(f"Error al obtener recomendaciones del usuario: {e}")
+            return []
+
+# Instancia global del repository de recomendaciones
+recomendacion_repository = RecomendacionRepository()
@@ -1,16 +1,17 @@
-from typing import List, Optional
-from app.database import db
-from app.models.reserva import ReservaResponse, ReservaCreate, ReservaUpdate
+from typing import List, Optional, FrozenSet
+from app.database import UsaConexion
+from app.sentencias import construir_update
+from app.proyecciones import columnas, modelo_respuesta, pide
+from app.models.reserva import Reserva, ReservaResponse, ReservaCreate, ReservaUpdate
 from fastapi import HTTPException, status
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-class ReservaRepository(object):
-    def __init__(self):
-        self.connection = db.get_client()
-    
+COLUMNAS_RESERVA = tuple(Reserva.model_fields)
+
+class ReservaRepository(UsaConexion):
     async def create_reserva(self, reserva_data: ReservaCreate) -> ReservaResponse:
         """Crea una nueva reserva"""
         try:
@@ -58,12 +59,12 @@ INSERT INTO reservas (
                 detail="Error interno del servidor"
             )
     
-    async def get_reserva_by_id(self, reserva_id: str, user_id: str) -> Optional[ReservaResponse]:
+    async def get_reserva_by_id(self, reserva_id: str, user_id: str, campos: Optional[FrozenSet[str]] = None) -> Optional[ReservaResponse]:
         """Obtiene una reserva por ID"""
         try:
             cursor = self.connection.cursor()
             cursor.execute(
-                "SELECT * FROM reservas WHERE id = ?",
+                f"SELECT {columnas(campos, COLUMNAS_RESERVA)} FROM reservas WHERE id = ?",
                 (reserva_id,)
             )
             reserva = cursor.fetchone()
@@ -76,24 +77,24 @@ INSERT INTO reservas (
             # Verificar que el usuario tenga acceso a esta reserva
             # (Solo lógica de operador si es necesario, huesped eliminado)
             
-            return self._enrich_reserva_response(reserva_dict)
+            return self._enrich_reserva_response(reserva_dict, campos)
         except Exception as e:
             logger.error(f"Error al obtener reserva por ID: {e}")
             return None
     
-    async def get_reservas_by_user(self, user_id: str, skip: int = 0, limit: int = 100) -> list[ReservaResponse]:
+    async def get_reservas_by_user(self, user_id: str, skip: int = 0, limit: int = 100, campos: Optional[FrozenSet[str]] = None) -> list[ReservaResponse]:
         """Obtiene las reservas de un usuario"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute("""
-                SELECT * FROM reservas WHERE turista_id = ?
+            cursor.execute(f"""
+                SELECT {columnas(campos, COLUMNAS_RESERVA)} FROM reservas WHERE turista_id = ?
                 ORDER BY fecha_creacion DESC
                 LIMIT ? OFFSET ?
             """, (user_id, limit, skip))
             
             reservas = []
             for reserva in cursor.fetchall():
-                enriched_reserva = self._enrich_reserva_response(dict(reserva))
+                enriched_reserva = self._enrich_reserva_response(dict(reserva), campos)
                 reservas.append(enriched_reserva)
             
             return reservas
@@ -120,14 +121,10 @@ INSERT INTO reservas (
                 return reserva
             
             # Construir query de actualización
-            set_clause = ", ".join([f"{k} = ?" for k in update_data.keys()])
-            values = list(update_data.values()) + [reserva_id]
+            query, values = construir_update("reservas", update_data, reserva_id)
             
             cursor = self.connection.cursor()
-            cursor.execute(
-                f"UPDATE reservas SET {set_clause} WHERE id = ?",
-                values
-            )
+            cursor.execute(query, values)
             
             if cursor.rowcount == 0:
                 raise HTTPException(
@@ -155,23 +152,19 @@ INSERT INTO reservas (
             if not reserva:
                 return False
             
-            update_data = {
-                'estado': 'cancelada',
-                'fecha_cancelacion': 'CURRENT_TIMESTAMP'
-            }
+            update_data = {'estado': 'cancelada'}
             
             if motivo:
                 update_data['motivo_cancelacion'] = motivo
             
             # Construir query de actualización
-            set_clause = ", ".join([f"{k} = ?" for k in update_data.keys()])
-            values = list(update_data.values()) + [reserva_id]
+            query, values = construir_update(
+                "reservas", update_data, reserva_id,
+                extras=("fecha_cancelacion = CURRENT_TIMESTAMP",)
+            )
             
             cursor = self.connection.cursor()
-            cursor.execute(
-                f"UPDATE reservas SET {set_clause} WHERE id = ?",
-                values
-            )
+            cursor.execute(query, values)
             
             self.connection.commit()
             return cursor.rowcount > 0
@@ -179,24 +172,27 @@ INSERT INTO reservas (
             logger.error(f"Error al cancelar reserva: {e}")
             return False
     
-    async def get_reservas_by_operador(self, operador_id: str, skip: int = 0, limit: int = 100) -> list[ReservaResponse]:
+    async def get_reservas_by_operador(self, operador_id: str, skip: int = 0, limit: int = 100, campos: Optional[FrozenSet[str]] = None) -> list[ReservaResponse]:
         """Obtiene las reservas asociadas a los paquetes de un operador"""
         try:
+            # Los JOIN con usuarios solo se hacen si se piden sus campos
+            seleccion = [columnas(campos, COLUMNAS_RESERVA, prefijo="r.")]
+            joins = []
+            if pide(campos, "paquete_titulo"):
+                seleccion.append("p.titulo AS paquete_titulo")
+            if pide(campos, "operador_nombre", "operador_apellido"):
+                seleccion += ["u.nombre AS operador_nombre", "u.apellido AS operador_apellido"]
+                joins.append("JOIN usuarios u ON p.operador_id = u.id")
+            if pide(campos, "turista_nombre", "turista_apellido"):
+                seleccion += ["tu.nombre AS turista_nombre", "tu.apellido AS turista_apellido"]
+                joins.append("JOIN usuarios tu ON r.turista_id = tu.id")
             cursor = self.connection.cursor()
             cursor.execute(
-                """
-                SELECT
-                    r.*, -- todos los campos de reservas
-                    p.titulo AS paquete_titulo,
-                    
-                    u.nombre AS operador_nombre,
-                    u.apellido AS operador_apellido,
-                    tu.nombre AS turista_nombre,
-                    tu.apellido AS turista_apellido
+                f"""
+                SELECT {', '.join(seleccion)}
                 FROM reservas r
                 JOIN paquetes_turisticos p ON r.paquete_id = p.id
-                JOIN usuarios u ON p.operador_id = u.id
-                JOIN usuarios tu ON r.turista_id = tu.id
+                {' '.join(joins)}
                 WHERE p.operador_id = ?
                 ORDER BY r.fecha_creacion DESC
                 LIMIT ? OFFSET ?
@@ -204,15 +200,15 @@ INSERT INTO reservas (
             )
             reservas = []
             for reserva in cursor.fetchall():
-                reservas.append(self._enrich_reserva_response(dict(reserva)))
+                reservas.append(self._enrich_reserva_response(dict(reserva), campos))
             return reservas
         except Exception as e:
             logger.error(f"Error al obtener reservas del operador: {e}")
             return []
     
-    def _enrich_reserva_response(self, reserva_data: dict) -> ReservaResponse:
+    def _enrich_reserva_response(self, reserva_data: dict, campos: Optional[FrozenSet[str]] = None) -> ReservaResponse:
         """Retorna la reserva sin enriquecimiento adicional"""
-        return ReservaResponse(**reserva_data)
+        return modelo_respuesta(ReservaResponse, campos)(**reserva_data)
 
 
 # Instancia global del repository de reservas
@@ -1,32 +1,54 @@
-from typing import Optional
-from app.database import db
-from app.models.review import ReviewResponse, ReviewCreate
+from typing import Optional, FrozenSet
+from app.config import settings
+from app.database import UsaConexion
+from app.models.review import Review, ReviewResponse, ReviewCreate, ReviewSummaryResponse, ReviewCategoriasPromedio
+from app.proyecciones import columnas, modelo_respuesta, pide
 from fastapi import HTTPException, status
 import logging
 
 logger = logging.getLogger(__name__)
 
-class ReviewRepository(object):
-    def get_reviews_by_autor(self, autor_id: int, skip: int = 0, limit: int = 100) -> list[ReviewResponse]:
+CATEGORIAS_REVIEW = ("organizacion", "comunicacion", "actividades", "guia", "seguridad", "valor")
+COLUMNAS_REVIEW = tuple(Review.model_fields)
+CAMPOS_AUTOR = ("autor_nombre", "autor_apellido", "autor_avatar")
+CAMPOS_PAQUETE = ("paquete_titulo", "paquete_tipo")
+CAMPOS_RESERVA = ("reserva_fecha_inicio", "reserva_fecha_fin")
+
+def columnas_review(campos: Optional[FrozenSet[str]]) -> str:
+    """Columnas del SELECT de reviews para la proyección `campos`"""
+    necesarias = ["id"]
+    if pide(campos, *CAMPOS_AUTOR):
+        necesarias.append("autor_id")
+    if pide(campos, *CAMPOS_PAQUETE):
+        necesarias.append("paquete_id")
+    if pide(campos, *CAMPOS_RESERVA):
+        necesarias.append("reserva_id")
+    return columnas(campos, COLUMNAS_REVIEW, necesarias)
+
+def calcular_calificacion_bayesiana(suma: float, total: int, media_global: float, peso: int) -> Optional[float]:
+    """Calificación bayesiana: acerca al promedio global los paquetes con pocas reviews"""
+    if total + peso <= 0:
+        return None
+    return (peso * media_global + suma) / (peso + total)
+
+class ReviewRepository(UsaConexion):
+    def get_reviews_by_autor(self, autor_id: int, skip: int = 0, limit: int = 100, campos: Optional[FrozenSet[str]] = None) -> list[ReviewResponse]:
         """Obtiene las reviews hechas por un usuario"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute("""
-                SELECT * FROM reviews WHERE autor_id = ?
+            cursor.execute(f"""
+                SELECT {columnas_review(campos)} FROM reviews WHERE autor_id = ?
                 ORDER BY fecha_review DESC
                 LIMIT ? OFFSET ?
             """, (autor_id, limit, skip))
             reviews = []
             for review in cursor.fetchall():
-                enriched_review = self._enrich_review_response(dict(review))
+                enriched_review = self._enrich_review_response(dict(review), campos)
                 reviews.append(enriched_review)
             return reviews
         except Exception as e:
             logger.error(f"Error al obtener reviews de usuario: {e}")
             return []
-    def __init__(self):
-        self.connection = db.get_client()
-    
     def create_review(self, review_data: ReviewCreate) -> ReviewResponse:
         """Crea una nueva review para un paquete turístico"""
         try:
@@ -64,109 +86,149 @@ class ReviewRepository(object):
                 detail="Error interno del servidor"
             )
     
-    def get_review_by_id(self, review_id: int) -> Optional[ReviewResponse]:
+    def get_review_by_id(self, review_id: int, campos: Optional[FrozenSet[str]] = None) -> Optional[ReviewResponse]:
         """Obtiene una review por ID"""
         try:
             cursor = self.connection.cursor()
             cursor.execute(
-                "SELECT * FROM reviews WHERE id = ?",
+                f"SELECT {columnas_review(campos)} FROM reviews WHERE id = ?",
                 (review_id,)
             )
             review = cursor.fetchone()
             if not review:
                 return None
-            return self._enrich_review_response(dict(review))
+            return self._enrich_review_response(dict(review), campos)
         except Exception as e:
             logger.error(f"Error al obtener review por ID: {e}")
             return None
     
-    def get_reviews_by_paquete(self, paquete_id: int, skip: int = 0, limit: int = 100) -> list[ReviewResponse]:
+    def get_reviews_by_paquete(self, paquete_id: int, skip: int = 0, limit: int = 100, campos: Optional[FrozenSet[str]] = None) -> list[ReviewResponse]:
         """Obtiene las reviews de un paquete turístico"""
         try:
             cursor = self.connection.cursor()
-            cursor.execute("""
-                SELECT * FROM reviews WHERE paquete_id = ?
+            cursor.execute(f"""
+                SELECT {columnas_review(campos)} FROM reviews WHERE paquete_id = ?
                 ORDER BY fecha_review DESC
                 LIMIT ? OFFSET ?
             """, (paquete_id, limit, skip))
             reviews = []
             for review in cursor.fetchall():
-                enriched_review = self._enrich_review_response(dict(review))
+                enriched_review = self._enrich_review_response(dict(review), campos)
                 reviews.append(enriched_review)
             return reviews
         except Exception as e:
             logger.error(f"Error al obtener reviews de paquete turístico: {e}")
             return []
     
-    def _enrich_review_response(self, review_data: dict[str, any]) -> ReviewResponse:
-        """Enriquece la respuesta de review con datos adicionales"""
-        from datetime import datetime
+    def get_review_summary(self, paquete_id: int) -> ReviewSummaryResponse:
+        """Obtiene el resumen de reviews de un paquete desde los agregados de review_stats"""
         try:
-            # Obtener datos del autor
             cursor = self.connection.cursor()
             cursor.execute(
-                "SELECT nombre, apellido, avatar_url FROM usuarios WHERE id = ?",
-                (review_data['autor_id'],)
+                "SELECT * FROM review_stats WHERE paquete_id IN (?, 0)",
+                (paquete_id,)
             )
-            autor = cursor.fetchone()
-            if autor:
-                autor_dict = dict(autor)
-                review_data['autor_nombre'] = autor_dict['nombre']
-                review_data['autor_apellido'] = autor_dict['apellido']
-                review_data['autor_avatar'] = autor_dict['avatar_url']
-            # Obtener datos del paquete turístico
-            cursor.execute(
-                "SELECT titulo, tipo_paquete FROM paquetes_turisticos WHERE id = ?",
-                (review_data['paquete_id'],)
+            stats = {row['paquete_id']: dict(row) for row in cursor.fetchall()}
+            paquete_stats = stats.get(int(paquete_id))
+            global_stats = stats.get(0)
+            
+            if not paquete_stats or not paquete_stats['total']:
+                return ReviewSummaryResponse(
+                    paquete_id=paquete_id,
+                    histograma={str(i): 0 for i in range(1, 6)}
+                )
+            
+            total = paquete_stats['total']
+            media_global = (
+                global_stats['suma_calificacion'] / global_stats['total']
+                if global_stats and global_stats['total'] else 3.0
             )
-            paquete = cursor.fetchone()
-            if paquete:
-                paquete_dict = dict(paquete)
-                review_data['paquete_titulo'] = paquete_dict['titulo']
-                review_data['paquete_tipo'] = paquete_dict['tipo_paquete']
-            # Obtener datos de la reserva
-            cursor.execute(
-                "SELECT fecha_inicio, fecha_fin FROM reservas WHERE id = ?",
-                (review_data['reserva_id'],)
+            categorias = {
+                categoria: (
+                    paquete_stats[f'suma_{categoria}'] / paquete_stats[f'total_{categoria}']
+                    if paquete_stats[f'total_{categoria}'] else None
+                )
+                for categoria in CATEGORIAS_REVIEW
+            }
+            
+            return ReviewSummaryResponse(
+                paquete_id=paquete_id,
+                total_reviews=total,
+                calificacion_promedio=paquete_stats['suma_calificacion'] / total,
+                calificacion_bayesiana=calcular_calificacion_bayesiana(
+                    paquete_stats['suma_calificacion'], total, media_global, settings.review_prior_weight
+                ),
+                histograma={str(i): paquete_stats[f'estrellas_{i}'] for i in range(1, 6)},
+                categorias=ReviewCategoriasPromedio(**categorias)
             )
-            reserva = cursor.fetchone()
-            if reserva:
-                reserva_dict = dict(reserva)
-                for campo in ['fecha_inicio', 'fecha_fin']:
-                    valor = reserva_dict.get(campo)
-                    dt_val = None
-                    if valor is None:
+        except Exception as e:
+            logger.error(f"Error al obtener resumen de reviews: {e}")
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Error interno del servidor"
+            )
+    
+    def _enrich_review_response(self, review_data: dict[str, any], campos: Optional[FrozenSet[str]] = None) -> ReviewResponse:
+        """Enriquece la respuesta de review con datos adicionales (solo los pedidos en `campos`)"""
+        from datetime import datetime
+        modelo = modelo_respuesta(ReviewResponse, campos)
+        try:
+            cursor = self.connection.cursor()
+            # Obtener datos del autor
+            if pide(campos, *CAMPOS_AUTOR):
+                cursor.execute(
+                    "SELECT nombre, apellido, avatar_url FROM usuarios WHERE id = ?",
+                    (review_data['autor_id'],)
+                )
+                autor = cursor.fetchone()
+                if autor:
+                    autor_dict = dict(autor)
+                    review_data['autor_nombre'] = autor_dict['nombre']
+                    review_data['autor_apellido'] = autor_dict['apellido']
+                    review_data['autor_avatar'] = autor_dict['avatar_url']
+            # Obtener datos del paquete turístico
+            if pide(campos, *CAMPOS_PAQUETE):
+                cursor.execute(
+                    "SELECT titulo, tipo_paquete FROM paquetes_turisticos WHERE id = ?",
+                    (review_data['paquete_id'],)
+                )
+                paquete = cursor.fetchone()
+                if paquete:
+                    paquete_dict = dict(paquete)
+                    review_data['paquete_titulo'] = paquete_dict['titulo']
+                    review_data['paquete_tipo'] = paquete_dict['tipo_paquete']
+            # Obtener datos de la reserva
+            if pide(campos, *CAMPOS_RESERVA):
+                cursor.execute(
+                    "SELECT fecha_inicio, fecha_fin FROM reservas WHERE id = ?",
+                    (review_data['reserva_id'],)
+                )
+                reserva = cursor.fetchone()
+                if reserva:
+                    reserva_dict = dict(reserva)
+                    for campo in ['fecha_inicio', 'fecha_fin']:
+                        valor = reserva_dict.get(campo)
                         dt_val = None
-                    elif isinstance(valor, datetime):
-                        dt_val = valor
-                    elif isinstance(valor, str):
-                        try:
-                            # Si el string es solo fecha, agrega hora por defecto
-                            if len(valor) == 10 and valor.count('-') == 2:
-                                dt_val = datetime.strptime(valor, "%Y-%m-%d")
-                            else:
-                                dt_val = datetime.fromisoformat(valor)
-                        except Exception:
+                        if valor is None:
                             dt_val = None
-                    else:
-                        dt_val = None
-                    review_data[f'reserva_{campo}'] = dt_val
-            # Calcular calificación promedio del paquete turístico
-            cursor.execute("""
-                SELECT AVG(calificacion) as promedio, COUNT(*) as total
-                FROM reviews WHERE paquete_id = ?
-            """, (review_data['paquete_id'],))
-            review_stats = cursor.fetchone()
-            if review_stats:
-                stats_dict = dict(review_stats)
-                review_data['calificacion_promedio_paquete'] = (
-                    float(stats_dict['promedio']) if stats_dict['promedio'] else None
-                )
-                review_data['total_reviews_paquete'] = stats_dict['total']
-            return ReviewResponse(**review_data)
+                        elif isinstance(valor, datetime):
+                            dt_val = valor
+                        elif isinstance(valor, str):
+                            try:
+                                # Si el string es solo fecha, agrega hora por defecto
+                                if len(valor) == 10 and valor.count('-') == 2:
+                                    dt_val = datetime.strptime(valor, "%Y-%m-%d")
+                                else:
+                                    dt_val = datetime.fromisoformat(valor)
+                            except Exception:
+                                dt_val = None
+                        else:
+                            dt_val = None
+                        review_data[f'reserva_{campo}'] = dt_val
+            return modelo(**review_data)
         except Exception as e:
             logger.error(f"Error al enriquecer respuesta de review: {e}")
-            return ReviewResponse(**review_data)
+            return modelo(**review_data)
 
 # Instancia global del repository de reviews
 review_repository = ReviewRepository() 
\ No newline at end of file
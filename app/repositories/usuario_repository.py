@@ -1,5 +1,6 @@
 from typing import List, Optional
-from app.database import db
+from app.database import UsaConexion
+from app.sentencias import construir_update
 from app.models.usuario import UsuarioResponse, UsuarioUpdate
 from app.auth.jwt_handler import jwt_handler
 from fastapi import HTTPException, status
@@ -7,10 +8,7 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-class UsuarioRepository(object):
-    def __init__(self):
-        self.connection = db.get_client()
-    
+class UsuarioRepository(UsaConexion):
     async def get_user_by_id(self, user_id: str) -> Optional[UsuarioResponse]:
         """Obtiene un usuario por ID"""
         try:
@@ -72,14 +70,10 @@ class UsuarioRepository(object):
                 return await self.get_user_by_id(user_id)
             
             # Construir query de actualización
-            set_clause = ", ".join([f"{k} = ?" for k in update_data.keys()])
-            values = list(update_data.values()) + [user_id]
+            query, values = construir_update("usuarios", update_data, user_id)
             
             cursor = self.connection.cursor()
-            cursor.execute(
-                f"UPDATE usuarios SET {set_clause} WHERE id = ?",
-                values
-            )
+            cursor.execute(query, values)
             
             if cursor.rowcount == 0:
                 raise HTTPException(
@@ -0,0 +1,26 @@
+"""Serialización directa a JSON de las respuestas de listado.
+
+Los repositories ya devuelven modelos Pydantic validados. Si el endpoint los
+devuelve tal cual, FastAPI los vuelve a validar contra `response_model`, los
+convierte con jsonable_encoder y después json.dumps recorre el resultado otra
+vez. `respuesta_json` serializa los modelos a bytes en una sola pasada con el
+serializador de Pydantic (pydantic-core), que trata Decimal y datetime de
+forma nativa y con el mismo formato que el camino estándar. El endpoint
+conserva `response_model` para el esquema OpenAPI.
+"""
+from functools import lru_cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+class RespuestaJSON(Response):
+    media_type = "application/json"
+
+@lru_cache(maxsize=512)
+def _adaptador(tipo) -> TypeAdapter:
+    return TypeAdapter(tipo)
+
+def respuesta_json(contenido: Any, tipo, status_code: int = 200) -> RespuestaJSON:
+    """Respuesta con `contenido` serializado como `tipo` (p. ej. List[PaqueteTuristicoResponse])"""
+    return RespuestaJSON(_adaptador(tipo).dump_json(contenido), status_code=status_code)
@@ -0,0 +1,379 @@
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+import weakref
+
+from app.config import settings
+from app.metricas import consultas_peticion, metricas
+from app.perfilado import perfil_actual
+
+logger = logging.getLogger(__name__)
+
+# Huellas distintas que se miden por separado; el resto se agrupa
+MAX_SENTENCIAS_REGISTRADAS = 1000
+SENTENCIAS_OTRAS = "<otras>"
+# Sentencias lentas recientes que se conservan para /admin/sentencias/lentas
+MAX_SENTENCIAS_LENTAS = 200
+
+# Histograma logarítmico para el p99: de 10 µs a ~100 s en saltos del 25%
+BUCKET_MINIMO = 1e-5
+FACTOR_BUCKET = 1.25
+NUM_BUCKETS = 73
+
+_LITERAL_CADENA = re.compile(r"'(?:[^']|'')*'")
+_LITERAL_NUMERO = re.compile(r"(?<![\w.])\d+(?:\.\d+)?(?![\w.])")
+_COMENTARIO = re.compile(r"--[^\n]*")
+_LISTA_IN = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_ESPACIOS = re.compile(r"\s+")
+_EXPLICABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|REPLACE|UPDATE|DELETE)\b", re.IGNORECASE)
+
+@lru_cache(maxsize=4096)
+def huella_sql(sql: str) -> str:
+    """Forma normalizada de una sentencia: literales como ?, listas IN colapsadas, sin comentarios y con espacios simples"""
+    huella = _LITERAL_CADENA.sub("?", sql)
+    huella = _COMENTARIO.sub(" ", huella)
+    huella = _LITERAL_NUMERO.sub("?", huella)
+    huella = _LISTA_IN.sub("IN (?, ...)", huella)
+    return _ESPACIOS.sub(" ", huella).strip()
+
+def _bucket(segundos: float) -> int:
+    if segundos <= BUCKET_MINIMO:
+        return 0
+    return min(NUM_BUCKETS - 1, math.ceil(math.log(segundos / BUCKET_MINIMO, FACTOR_BUCKET)))
+
+def _percentil(buckets: List[int], ejecuciones: int, maximo: float, percentil: float) -> float:
+    """Límite superior del bucket que contiene el percentil, acotado por el máximo observado"""
+    objetivo = math.ceil(ejecuciones * percentil)
+    acumulado = 0
+    for indice, cantidad in enumerate(buckets):
+        acumulado += cantidad
+        if acumulado >= objetivo:
+            return min(BUCKET_MINIMO * FACTOR_BUCKET ** indice, maximo)
+    return maximo
+
+class RegistroSentencias(object):
+    """Tiempos acumulados por huella SQL de todas las conexiones de la aplicación"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # huella -> [ejecuciones, total, máximo, buckets, sql de ejemplo]
+        self._estadisticas: Dict[str, list] = {}
+        self._lentas = deque(maxlen=MAX_SENTENCIAS_LENTAS)
+        self._planes: Dict[str, List[str]] = {}
+
+    def registrar(self, sql: str, segundos: float):
+        huella = huella_sql(sql)
+        with self._lock:
+            estadistica = self._estadisticas.get(huella)
+            if estadistica is None:
+                if len(self._estadisticas) >= MAX_SENTENCIAS_REGISTRADAS:
+                    huella = sql = SENTENCIAS_OTRAS
+                estadistica = self._estadisticas.setdefault(huella, [0, 0.0, 0.0, [0] * NUM_BUCKETS, sql])
+            estadistica[0] += 1
+            estadistica[1] += segundos
+            if segundos > estadistica[2]:
+                estadistica[2] = segundos
+            estadistica[3][_bucket(segundos)] += 1
+
+    def registrar_lenta(self, sql: str, segundos: float, plan: List[str]):
+        with self._lock:
+            self._lentas.append({
+                "fecha": datetime.now().isoformat(timespec="milliseconds"),
+                "sql": huella_sql(sql),
+                "tiempo_ms": round(segundos * 1000, 3),
+                "plan": plan,
+            })
+
+    def plan(self, sql: str) -> Optional[List[str]]:
+        """Plan ya obtenido para la huella de `sql`, si lo hay"""
+        return self._planes.get(huella_sql(sql))
+
+    def guardar_plan(self, sql: str, plan: List[str]):
+        with self._lock:
+            if len(self._planes) < MAX_SENTENCIAS_REGISTRADAS:
+                self._planes[huella_sql(sql)] = plan
+
+    def resumen(self, limit: int = 20, orden: str = "total") -> List[dict]:
+        """Huellas con mayor tiempo total acumulado (o mayor p99 / más ejecuciones según `orden`)"""
+        with self._lock:
+            filas = [
+                (huella, ejecuciones, total, maximo, _percentil(buckets, ejecuciones, maximo, 0.99))
+                for huella, (ejecuciones, total, maximo, buckets, _) in self._estadisticas.items()
+            ]
+        clave = {"total": 2, "p99": 4, "ejecuciones": 1}[orden]
+        filas.sort(key=lambda fila: fila[clave], reverse=True)
+        return [
+            {
+                "sql": huella,
+                "ejecuciones": ejecuciones,
+                "tiempo_total_ms": round(total * 1000, 3),
+                "tiempo_medio_ms": round(total * 1000 / ejecuciones, 3),
+                "tiempo_p99_ms": round(p99 * 1000, 3),
+                "tiempo_maximo_ms": round(maximo * 1000, 3),
+            }
+            for huella, ejecuciones, total, maximo, p99 in filas[:limit]
+        ]
+
+    def lentas(self, limit: int = 50) -> List[dict]:
+        """Sentencias lentas más recientes, con su plan"""
+        with self._lock:
+            return list(self._lentas)[::-1][:limit]
+
+    def sentencias(self) -> List[str]:
+        """Un texto SQL de ejemplo por huella, tal como se ejecutó"""
+        with self._lock:
+            return [estadistica[4] for huella, estadistica in self._estadisticas.items() if huella != SENTENCIAS_OTRAS]
+
+    def reiniciar(self):
+        with self._lock:
+            self._estadisticas.clear()
+            self._lentas.clear()
+            self._planes.clear()
+
+registro_sentencias = RegistroSentencias()
+
+def explicar(connection: sqlite3.Connection, sql: str, parameters=()) -> List[str]:
+    """Detalle de EXPLAIN QUERY PLAN de `sql`; vacío si la sentencia no se puede explicar"""
+    if not _EXPLICABLE.match(sql):
+        return []
+    try:
+        # Cursor sin medir: el EXPLAIN no es una sentencia de la aplicación
+        cursor = connection.cursor(sqlite3.Cursor).execute(f"EXPLAIN QUERY PLAN {sql}", parameters)
+        return [fila[3] for fila in cursor.fetchall()]
+    except sqlite3.Error as e:
+        return [f"<sin plan: {e}>"]
+
+class CursorMedido(sqlite3.Cursor):
+    """Cursor que registra el tiempo de cada execute/executemany.
+
+    En las peticiones muestreadas por app.perfilado también acumula el tiempo
+    de las lecturas (fetch*) como tiempo de base de datos.
+    """
+
+    def execute(self, sql, parameters=()):
+        metricas.incrementar("db_sentencias_en_curso")
+        inicio = time.perf_counter()
+        try:
+            return _midiendo_bloqueos(self.connection, super().execute, sql, parameters)
+        finally:
+            metricas.incrementar("db_sentencias_en_curso", valor=-1)
+            segundos = time.perf_counter() - inicio
+            self._registrar(sql, segundos)
+            if settings.sql_lento_ms and segundos * 1000 >= settings.sql_lento_ms:
+                self._registrar_lenta(sql, parameters, segundos)
+
+    def executemany(self, sql, seq_of_parameters):
+        metricas.incrementar("db_sentencias_en_curso")
+        inicio = time.perf_counter()
+        try:
+            return _midiendo_bloqueos(self.connection, super().executemany, sql, seq_of_parameters)
+        finally:
+            metricas.incrementar("db_sentencias_en_curso", valor=-1)
+            segundos = time.perf_counter() - inicio
+            self._registrar(sql, segundos)
+            if settings.sql_lento_ms and segundos * 1000 >= settings.sql_lento_ms:
+                # Sin plan: los parámetros son un lote
+                registro_sentencias.registrar_lenta(sql, segundos, [])
+                logger.warning(f"Sentencia lenta (executemany, {segundos * 1000:.1f} ms): {huella_sql(sql)}")
+
+    def fetchone(self):
+        perfil = perfil_actual.get()
+        if perfil is None:
+            return super().fetchone()
+        inicio = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            perfil.agregar("db", time.perf_counter() - inicio)
+
+    def fetchmany(self, size=None):
+        perfil = perfil_actual.get()
+        tamano = self.arraysize if size is None else size
+        if perfil is None:
+            return super().fetchmany(tamano)
+        inicio = time.perf_counter()
+        try:
+            return super().fetchmany(tamano)
+        finally:
+            perfil.agregar("db", time.perf_counter() - inicio)
+
+    def fetchall(self):
+        perfil = perfil_actual.get()
+        if perfil is None:
+            return super().fetchall()
+        inicio = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            perfil.agregar("db", time.perf_counter() - inicio)
+
+    def _registrar_lenta(self, sql: str, parameters, segundos: float):
+        # El plan se obtiene una vez por huella; los parámetros no se registran (pueden ser datos personales)
+        plan = registro_sentencias.plan(sql)
+        if plan is None:
+            plan = explicar(self.connection, sql, parameters)
+            registro_sentencias.guardar_plan(sql, plan)
+        registro_sentencias.registrar_lenta(sql, segundos, plan)
+        logger.warning(f"Sentencia lenta ({segundos * 1000:.1f} ms): {huella_sql(sql)} | plan: {' / '.join(plan) or '-'}")
+
+    @staticmethod
+    def _registrar(sql: str, segundos: float):
+        if settings.sql_registro_habilitado:
+            registro_sentencias.registrar(sql, segundos)
+        metricas.incrementar("db_consultas_total")
+        metricas.incrementar("db_consultas_segundos_total", valor=segundos)
+        consultas = consultas_peticion.get()
+        if consultas is not None:
+            consultas[0] += 1
+        perfil = perfil_actual.get()
+        if perfil is not None:
+            perfil.agregar("db", segundos)
+
+def _bloqueada(error: sqlite3.OperationalError) -> bool:
+    codigo = getattr(error, "sqlite_errorcode", None)
+    if codigo is None:
+        return "locked" in str(error)
+    return codigo & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+def _midiendo_bloqueos(conexion: "ConexionMedida", operacion, *args):
+    """Ejecuta `operacion` sin esperar y, si la base está bloqueada, la repite con el busy handler de SQLite.
+
+    El primer intento corre con busy_timeout 0; si devuelve SQLITE_BUSY se
+    repite con la espera de la conexión (SQLITE_BUSY_TIMEOUT) y el tiempo del
+    reintento se suma a la espera por bloqueos, termine bien o no. La espera
+    ocurre dentro de sqlite3 en el hilo que ejecuta la sentencia: en el event
+    loop lo detiene hasta que se libera el bloqueo o se agota el timeout.
+    """
+    try:
+        return operacion(*args)
+    except sqlite3.OperationalError as e:
+        if not _bloqueada(e):
+            raise
+    metricas.incrementar("sqlite_bloqueos_total")
+    inicio = time.perf_counter()
+    conexion._esperar_bloqueos(True)
+    try:
+        return operacion(*args)
+    except sqlite3.OperationalError as e:
+        if _bloqueada(e):
+            metricas.incrementar("sqlite_bloqueos_agotados_total")
+        raise
+    finally:
+        conexion._esperar_bloqueos(False)
+        metricas.incrementar("sqlite_espera_bloqueo_segundos_total", valor=time.perf_counter() - inicio)
+
+# Conexiones abiertas, para el gauge de /metrics
+_conexiones: "weakref.WeakSet[ConexionMedida]" = weakref.WeakSet()
+
+class ConexionMedida(sqlite3.Connection):
+    """Conexión cuyos cursores se miden en el registro de sentencias.
+
+    `timeout` es la espera máxima por bloqueo, pero el busy handler solo se
+    activa al reintentar una sentencia bloqueada (ver _midiendo_bloqueos).
+    """
+
+    def __init__(self, *args, timeout: float = 5.0, **kwargs):
+        super().__init__(*args, timeout=0, **kwargs)
+        self._espera_bloqueo_ms = int(timeout * 1000)
+        self._cerrada = False
+        _conexiones.add(self)
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    # Connection.execute de sqlite3 crea un cursor base sin pasar por cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def commit(self):
+        return _midiendo_bloqueos(self, super().commit)
+
+    def executescript(self, sql_script):
+        # Un script fallido puede haber aplicado parte de sus sentencias: no se repite, espera desde el principio
+        self._esperar_bloqueos(True)
+        try:
+            return super().executescript(sql_script)
+        except sqlite3.OperationalError as e:
+            if _bloqueada(e):
+                metricas.incrementar("sqlite_bloqueos_agotados_total")
+            raise
+        finally:
+            self._esperar_bloqueos(False)
+
+    def _esperar_bloqueos(self, esperar: bool):
+        # Cursor base: el PRAGMA no se mide como sentencia
+        sqlite3.Cursor(self).execute(f"PRAGMA busy_timeout = {self._espera_bloqueo_ms if esperar else 0}")
+
+    def close(self):
+        self._cerrada = True
+        super().close()
+
+def _recolectar_conexiones():
+    abiertas = sum(1 for conexion in list(_conexiones) if not conexion._cerrada)
+    return [("sqlite_conexiones_abiertas", (), abiertas)]
+
+metricas.registrar_recolector(_recolectar_conexiones)
+
+@lru_cache(maxsize=1024)
+def _sql_update(tabla: str, columnas: Tuple[str, ...], extras: Tuple[str, ...], clave: str) -> str:
+    asignaciones = [f"{columna} = ?" for columna in columnas] + list(extras)
+    return f"UPDATE {tabla} SET {', '.join(asignaciones)} WHERE {clave} = ?"
+
+def construir_update(tabla: str, datos: dict, clave_valor, extras: Iterable[str] = (), clave: str = "id") -> Tuple[str, list]:
+    """UPDATE canónico para las columnas de `datos`.
+
+    Las columnas se ordenan para que cada combinación produzca siempre el mismo
+    texto SQL y reutilice la sentencia preparada en la caché de sqlite3.
+    `extras` son asignaciones fijas sin parámetros (p. ej. fechas con CURRENT_TIMESTAMP).
+    """
+    columnas = tuple(sorted(datos))
+    sql = _sql_update(tabla, columnas, tuple(extras), clave)
+    return sql, [datos[columna] for columna in columnas] + [clave_valor]
+
+class ConsultaFiltrada(object):
+    """Construye un SELECT con condiciones opcionales y texto SQL canónico.
+
+    Las condiciones se añaden siempre en el mismo orden, por lo que cada
+    combinación de filtros genera un único texto SQL (cacheado aquí y como
+    sentencia preparada en la conexión).
+    """
+
+    def __init__(self, base: str):
+        self.base = base
+        self.condiciones: List[str] = []
+        self.params: list = []
+
+    def donde(self, condicion: str, *valores) -> "ConsultaFiltrada":
+        self.condiciones.append(condicion)
+        self.params.extend(valores)
+        return self
+
+    def sql(self, sufijo: str = "") -> str:
+        return _sql_filtrado(self.base, tuple(self.condiciones), sufijo)
+
+@lru_cache(maxsize=4096)
+def _sql_filtrado(base: str, condiciones: Tuple[str, ...], sufijo: str) -> str:
+    partes = [base] + [f"AND {condicion}" for condicion in condiciones]
+    if sufijo:
+        partes.append(sufijo)
+    return " ".join(partes)
+
+def _estadisticas_lru(funcion):
+    def estadisticas():
+        info = funcion.cache_info()
+        return info.hits, info.misses
+    return estadisticas
+
+metricas.registrar_cache("sql_update", _estadisticas_lru(_sql_update))
+metricas.registrar_cache("sql_filtrado", _estadisticas_lru(_sql_filtrado))
+metricas.registrar_cache("sql_huella", _estadisticas_lru(huella_sql))
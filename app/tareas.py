@@ -0,0 +1,56 @@
+"""Trabajos registrados en la cola de app.trabajos, su programación periódica
+y los suscriptores de los eventos de app.eventos.
+
+Los recálculos en lote leen en un hilo aparte con su propia conexión y
+escriben con la conexión principal, igual que hacían desde el lifespan; como
+trabajos periódicos los encola solo el proceso líder, así que con varios
+workers de uvicorn cada recálculo se hace una vez por intervalo y no una vez
+por worker.
+"""
+import asyncio
+import logging
+
+from app.config import settings
+from app.trabajos import cola_trabajos
+from app.eventos import despachador_eventos
+from app.repositories.instances import catalogo_repository, ranking_repository, recomendacion_repository
+
+logger = logging.getLogger(__name__)
+
+@cola_trabajos.tarea("rankings.recalcular")
+async def recalcular_rankings():
+    ranking_repository.guardar_rankings(await asyncio.to_thread(ranking_repository.calcular_rankings))
+
+@cola_trabajos.tarea("similares.recalcular")
+async def recalcular_similares():
+    recomendacion_repository.guardar_similares(await asyncio.to_thread(recomendacion_repository.calcular_similares))
+
+@cola_trabajos.tarea("coocurrencias.recalcular")
+async def recalcular_coocurrencias():
+    recomendacion_repository.guardar_coocurrencias(await asyncio.to_thread(recomendacion_repository.calcular_coocurrencias))
+
+@cola_trabajos.tarea("trabajos.purgar")
+async def purgar_trabajos():
+    eliminados = cola_trabajos.purgar(settings.trabajos_retencion_dias)
+    if eliminados:
+        logger.info(f"Trabajos terminados eliminados: {eliminados}")
+
+@cola_trabajos.tarea("eventos.purgar")
+async def purgar_eventos():
+    eliminados = despachador_eventos.purgar(settings.eventos_retencion_dias)
+    if eliminados:
+        logger.info(f"Eventos entregados eliminados: {eliminados}")
+
+cola_trabajos.periodico("rankings.recalcular", settings.ranking_refresh_seconds)
+cola_trabajos.periodico("similares.recalcular", settings.similares_refresh_seconds)
+cola_trabajos.periodico("coocurrencias.recalcular", settings.coocurrencias_refresh_seconds)
+cola_trabajos.periodico("trabajos.purgar", 86400)
+cola_trabajos.periodico("eventos.purgar", 86400)
+
+if settings.catalogo_en_memoria:
+    # El catálogo vive en la memoria de cada proceso: un suscriptor por proceso
+    @despachador_eventos.suscribir("catalogo", tipos=("paquete.*",), por_proceso=True)
+    async def sincronizar_catalogo(eventos):
+        # El lote solo avisa: la instantánea avanza desde su propia versión, que tras
+        # una reconstrucción puede ir por detrás de la posición del suscriptor
+        catalogo_repository.sincronizar()
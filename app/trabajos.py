@@ -0,0 +1,290 @@
+"""Cola persistente de trabajos en segundo plano.
+
+Los trabajos se guardan en la tabla `trabajos` de SQLite, así que sobreviven
+a los reinicios, y cualquier proceso de la aplicación puede encolarlos. Cada
+proceso ejecuta TRABAJOS_WORKERS trabajadores que reclaman el siguiente
+trabajo listo con un UPDATE atómico: con varios workers de uvicorn sobre la
+misma base de datos ningún trabajo se ejecuta dos veces a la vez. Un trabajo
+reclamado queda bloqueado TRABAJOS_BLOQUEO_SEGUNDOS y el proceso renueva el
+bloqueo mientras lo ejecuta; si el proceso muere (o su event loop se queda
+bloqueado más de ese tiempo), al vencer el bloqueo vuelve a la cola. Antes
+del UPDATE se comprueba con una lectura si hay algún trabajo listo, para no
+tomar el bloqueo de escritura de SQLite en cada sondeo con la cola vacía.
+
+Los fallos se reintentan con espera exponencial hasta `max_intentos`. Con
+`clave` el encolado es idempotente: la misma clave devuelve el trabajo ya
+existente en lugar de crear otro.
+
+Los trabajos periódicos solo los encola el proceso líder, elegido con un
+arrendamiento en `trabajos_lider`; la clave de cada periodo evita duplicados
+aunque el liderazgo cambie de proceso en mitad de un intervalo.
+
+Los manejadores se registran con `@cola_trabajos.tarea("tipo")` y reciben los
+argumentos como keywords. Los asíncronos se ejecutan en el event loop (y
+pueden usar la conexión principal); los síncronos, en un hilo aparte, por lo
+que deben abrir su propia conexión si usan la base de datos.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import asyncio
+import json
+import logging
+import os
+import random
+import socket
+import time
+import uuid
+
+from app.config import settings
+from app.database import UsaConexion
+
+logger = logging.getLogger(__name__)
+
+Manejador = Callable[..., Union[Awaitable[None], None]]
+
+class ColaTrabajos(UsaConexion):
+    def __init__(self):
+        self.manejadores: Dict[str, Tuple[Manejador, int]] = {}
+        self.periodicos: Dict[str, int] = {}
+        # Identifica a este proceso en los bloqueos y en el arrendamiento de líder
+        self.propietario = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.es_lider = False
+        self._tareas: List[asyncio.Task] = []
+        self._hay_trabajo: Optional[asyncio.Event] = None
+
+    def tarea(self, tipo: str, max_intentos: Optional[int] = None):
+        """Decorador que registra el manejador de los trabajos de `tipo`"""
+        def registrar(manejador: Manejador) -> Manejador:
+            self.manejadores[tipo] = (manejador, max_intentos or settings.trabajos_max_intentos)
+            return manejador
+        return registrar
+
+    def periodico(self, tipo: str, intervalo: int):
+        """Encola `tipo` cada `intervalo` segundos (desde el líder); 0 lo desactiva"""
+        if intervalo > 0:
+            self.periodicos[tipo] = intervalo
+
+    def encolar(self, tipo: str, argumentos: Optional[Dict[str, Any]] = None, clave: Optional[str] = None,
+                retraso: float = 0.0) -> int:
+        """Encola un trabajo y devuelve su id; con `clave` ya usada devuelve el trabajo existente"""
+        if tipo not in self.manejadores:
+            raise ValueError(f"Tipo de trabajo desconocido: {tipo}")
+        ahora = time.time()
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            INSERT INTO trabajos (tipo, argumentos, max_intentos, ejecutar_despues, clave_idempotencia, creado, actualizado)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(clave_idempotencia) DO NOTHING
+        """, (
+            tipo, json.dumps(argumentos or {}, ensure_ascii=False), self.manejadores[tipo][1],
+            ahora + retraso, clave, ahora, ahora
+        ))
+        self.connection.commit()
+        if cursor.rowcount == 0:
+            cursor.execute("SELECT id FROM trabajos WHERE clave_idempotencia = ?", (clave,))
+            return cursor.fetchone()[0]
+        if self._hay_trabajo is not None and retraso <= 0:
+            self._hay_trabajo.set()
+        return cursor.lastrowid
+
+    def _reclamar(self) -> Optional[Tuple[int, str, str, int, int]]:
+        """Marca como en curso el siguiente trabajo listo y lo devuelve"""
+        ahora = time.time()
+        cursor = self.connection.cursor()
+        # Solo lectura: con la cola vacía no se toma el bloqueo de escritura
+        cursor.execute(
+            "SELECT id FROM trabajos WHERE estado = 'pendiente' AND ejecutar_despues <= ? LIMIT 1", (ahora,)
+        )
+        if cursor.fetchone() is None:
+            return None
+        cursor.execute("""
+            UPDATE trabajos
+            SET estado = 'en_curso', intentos = intentos + 1, bloqueado_por = ?, bloqueado_hasta = ?, actualizado = ?
+            WHERE id = (
+                SELECT id FROM trabajos
+                WHERE estado = 'pendiente' AND ejecutar_despues <= ?
+                ORDER BY ejecutar_despues
+                LIMIT 1
+            )
+            RETURNING id, tipo, argumentos, intentos, max_intentos
+        """, (self.propietario, ahora + settings.trabajos_bloqueo_segundos, ahora, ahora))
+        trabajo = cursor.fetchone()
+        self.connection.commit()
+        return tuple(trabajo) if trabajo else None
+
+    def _terminar(self, trabajo_id: int, error: Optional[str] = None, reintentar_en: Optional[float] = None):
+        """Registra el resultado: completado, pendiente de reintento o fallido"""
+        ahora = time.time()
+        if error is None:
+            estado, ejecutar_despues = "completado", None
+        elif reintentar_en is not None:
+            estado, ejecutar_despues = "pendiente", ahora + reintentar_en
+        else:
+            estado, ejecutar_despues = "fallido", None
+        self.connection.execute("""
+            UPDATE trabajos
+            SET estado = ?, error = ?, ejecutar_despues = COALESCE(?, ejecutar_despues),
+                bloqueado_por = NULL, bloqueado_hasta = NULL, actualizado = ?
+            WHERE id = ? AND bloqueado_por = ?
+        """, (estado, error, ejecutar_despues, ahora, trabajo_id, self.propietario))
+        self.connection.commit()
+
+    def _renovar_bloqueo(self, trabajo_id: int):
+        """Extiende el bloqueo de un trabajo que este proceso sigue ejecutando"""
+        self.connection.execute("""
+            UPDATE trabajos SET bloqueado_hasta = ?
+            WHERE id = ? AND estado = 'en_curso' AND bloqueado_por = ?
+        """, (time.time() + settings.trabajos_bloqueo_segundos, trabajo_id, self.propietario))
+        self.connection.commit()
+
+    async def _mantener_bloqueo(self, trabajo_id: int):
+        """Renueva el bloqueo cada tercio de TRABAJOS_BLOQUEO_SEGUNDOS hasta que se cancela"""
+        while True:
+            await asyncio.sleep(settings.trabajos_bloqueo_segundos / 3)
+            try:
+                self._renovar_bloqueo(trabajo_id)
+            except Exception as e:
+                logger.error(f"Error al renovar el bloqueo del trabajo {trabajo_id}: {e}")
+
+    async def _ejecutar(self, trabajo: Tuple[int, str, str, int, int]):
+        trabajo_id, tipo, argumentos, intentos, max_intentos = trabajo
+        registrado = self.manejadores.get(tipo)
+        if registrado is None:
+            # Encolado por una versión con otros manejadores: se deja para quien lo conozca
+            logger.error(f"Trabajo {trabajo_id} de tipo desconocido {tipo}")
+            self._terminar(trabajo_id, f"Tipo desconocido: {tipo}", reintentar_en=settings.trabajos_reintento_maximo_segundos)
+            return
+        manejador = registrado[0]
+        renovacion = asyncio.create_task(self._mantener_bloqueo(trabajo_id))
+        try:
+            if asyncio.iscoroutinefunction(manejador):
+                await manejador(**json.loads(argumentos))
+            else:
+                await asyncio.to_thread(manejador, **json.loads(argumentos))
+        except Exception as e:
+            reintentar_en = None
+            if intentos < max_intentos:
+                espera = settings.trabajos_reintento_base_segundos * 2 ** (intentos - 1)
+                # Con variación aleatoria para no reintentar a la vez los que fallaron juntos
+                reintentar_en = min(espera, settings.trabajos_reintento_maximo_segundos) * random.uniform(0.75, 1.25)
+            logger.error(f"Error en el trabajo {trabajo_id} ({tipo}), intento {intentos}/{max_intentos}: {e}")
+            self._terminar(trabajo_id, f"{type(e).__name__}: {e}", reintentar_en)
+            return
+        finally:
+            renovacion.cancel()
+        self._terminar(trabajo_id)
+
+    async def _trabajador(self):
+        """Ejecuta trabajos mientras haya listos; si no, espera un aviso o el siguiente sondeo"""
+        while True:
+            try:
+                trabajo = self._reclamar()
+            except Exception as e:
+                logger.error(f"Error al reclamar trabajo: {e}")
+                trabajo = None
+            if trabajo is not None:
+                await self._ejecutar(trabajo)
+                continue
+            self._hay_trabajo.clear()
+            try:
+                await asyncio.wait_for(self._hay_trabajo.wait(), settings.trabajos_sondeo_segundos)
+            except asyncio.TimeoutError:
+                pass
+
+    def _renovar_liderazgo(self) -> bool:
+        """Toma o renueva el arrendamiento de líder; True si este proceso lo tiene"""
+        ahora = time.time()
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            INSERT INTO trabajos_lider (id, propietario, expira) VALUES (1, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET propietario = excluded.propietario, expira = excluded.expira
+            WHERE trabajos_lider.propietario = excluded.propietario OR trabajos_lider.expira < ?
+        """, (self.propietario, ahora + settings.trabajos_lider_segundos, ahora))
+        self.connection.commit()
+        return cursor.rowcount == 1
+
+    def _liberar_vencidos(self) -> int:
+        """Devuelve a la cola los trabajos cuyo proceso dejó vencer el bloqueo"""
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            UPDATE trabajos SET estado = 'pendiente', bloqueado_por = NULL, bloqueado_hasta = NULL, actualizado = ?
+            WHERE estado = 'en_curso' AND bloqueado_hasta < ?
+        """, (time.time(), time.time()))
+        self.connection.commit()
+        return cursor.rowcount
+
+    def _encolar_periodicos(self):
+        ahora = time.time()
+        for tipo, intervalo in self.periodicos.items():
+            # Una clave por periodo: un solo trabajo por intervalo aunque cambie el líder
+            self.encolar(tipo, clave=f"periodico:{tipo}:{int(ahora // intervalo)}")
+
+    async def _liderar(self):
+        """Mantiene el arrendamiento de líder y, mientras lo tiene, encola los periódicos"""
+        while True:
+            try:
+                es_lider = self._renovar_liderazgo()
+                if es_lider != self.es_lider:
+                    logger.info(f"Proceso {self.propietario} {'es ahora' if es_lider else 'deja de ser'} líder de trabajos")
+                self.es_lider = es_lider
+                if es_lider:
+                    liberados = self._liberar_vencidos()
+                    if liberados:
+                        logger.info(f"{liberados} trabajos con bloqueo vencido vuelven a la cola")
+                    self._encolar_periodicos()
+            except Exception as e:
+                logger.error(f"Error en el líder de trabajos: {e}")
+            await asyncio.sleep(settings.trabajos_lider_segundos / 3)
+
+    async def iniciar(self):
+        """Arranca el líder y los trabajadores de este proceso"""
+        self._hay_trabajo = asyncio.Event()
+        self._tareas = [asyncio.create_task(self._liderar())]
+        self._tareas.extend(asyncio.create_task(self._trabajador()) for _ in range(settings.trabajos_workers))
+
+    async def detener(self):
+        """Detiene los trabajadores, devuelve a la cola lo que quedó a medias y cede el liderazgo"""
+        for tarea in self._tareas:
+            tarea.cancel()
+        await asyncio.gather(*self._tareas, return_exceptions=True)
+        self._tareas = []
+        try:
+            self.connection.execute("""
+                UPDATE trabajos SET estado = 'pendiente', bloqueado_por = NULL, bloqueado_hasta = NULL, actualizado = ?
+                WHERE estado = 'en_curso' AND bloqueado_por = ?
+            """, (time.time(), self.propietario))
+            self.connection.execute("DELETE FROM trabajos_lider WHERE propietario = ?", (self.propietario,))
+            self.connection.commit()
+        except Exception as e:
+            logger.error(f"Error al detener la cola de trabajos: {e}")
+        self.es_lider = False
+
+    def purgar(self, dias: int) -> int:
+        """Elimina los trabajos completados o fallidos hace más de `dias` días"""
+        cursor = self.connection.cursor()
+        cursor.execute(
+            "DELETE FROM trabajos WHERE estado IN ('completado', 'fallido') AND actualizado < ?",
+            (time.time() - dias * 86400,)
+        )
+        self.connection.commit()
+        return cursor.rowcount
+
+    def resumen(self) -> Dict[str, Any]:
+        """Trabajos por tipo y estado, y los últimos fallidos"""
+        cursor = self.connection.cursor()
+        cursor.execute("SELECT tipo, estado, COUNT(*) AS total FROM trabajos GROUP BY tipo, estado")
+        por_tipo: Dict[str, Dict[str, int]] = {}
+        for fila in cursor.fetchall():
+            por_tipo.setdefault(fila["tipo"], {})[fila["estado"]] = fila["total"]
+        cursor.execute("""
+            SELECT id, tipo, intentos, error, actualizado FROM trabajos
+            WHERE estado = 'fallido' ORDER BY actualizado DESC LIMIT 20
+        """)
+        return {
+            "propietario": self.propietario,
+            "es_lider": self.es_lider,
+            "trabajos": por_tipo,
+            "fallidos": [dict(fila) for fila in cursor.fetchall()],
+        }
+
+# Instancia global de la cola
+cola_trabajos = ColaTrabajos()
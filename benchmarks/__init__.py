@@ -0,0 +1,7 @@
+"""Herramientas de medición: datos sintéticos, pruebas de carga y micro-benchmarks.
+
+Uso:
+    python -m benchmarks.generar_datos --db bench.sqlite
+    python -m benchmarks.carga --db bench.sqlite --salida base.json
+    python -m benchmarks.micro ejecutar --salida micro.json
+"""
@@ -0,0 +1,138 @@
+"""Benchmark del tiempo de arranque en frío (importar `main`).
+
+Cada ronda lanza un intérprete nuevo con `python -X importtime -c "import main"`
+contra una base de datos temporal vacía y analiza el informe de importtime:
+tiempo acumulado de `main`, tiempo propio de cada módulo y qué módulos de la
+aplicación se cargan. Es el coste que se paga en cada arranque de un
+contenedor serverless o de una réplica nueva del autoescalado (y en cada
+recarga con DEBUG). `comparar` contrasta dos resultados por mediana.
+
+Uso:
+    python -m benchmarks.arranque ejecutar --salida base.json [--rondas 7]
+    python -m benchmarks.arranque comparar base.json nuevo.json [--umbral 10]
+"""
+from pathlib import Path
+from typing import Dict, List, Tuple
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+
+RONDAS = 7
+UMBRAL_REGRESION = 10.0
+MODULOS_MOSTRADOS = 15
+
+RAIZ = Path(__file__).resolve().parent.parent
+
+def importar_main(directorio: Path) -> Dict[str, Tuple[int, int]]:
+    """Importa `main` en un intérprete nuevo; devuelve {módulo: (propio_us, acumulado_us)}"""
+    entorno = dict(os.environ)
+    entorno.update({
+        "DATABASE_PATH": str(directorio / "arranque.sqlite"),
+        "UPLOAD_DIR": str(directorio / "uploads"),
+        "LOG_NIVEL": "ERROR",
+    })
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"Error al importar main:\n{proceso.stderr[-2000:]}")
+    modulos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|", 2)
+        # La sangría del nombre indica la profundidad en el árbol de importaciones
+        modulos[nombre.strip()] = (int(propio), int(acumulado))
+    return modulos
+
+def ejecutar(rondas: int = RONDAS) -> dict:
+    directorio = Path(tempfile.mkdtemp())
+    # Una ronda previa calienta la caché de bytecode (__pycache__) y del sistema de archivos
+    importar_main(directorio)
+    medidas = [importar_main(directorio) for _ in range(rondas)]
+
+    totales = [medida["main"][1] for medida in medidas]
+    propios: Dict[str, List[int]] = {}
+    for medida in medidas:
+        for nombre, (propio, _) in medida.items():
+            propios.setdefault(nombre, []).append(propio)
+    mas_lentos = sorted(
+        ((nombre, statistics.median(tiempos)) for nombre, tiempos in propios.items()),
+        key=lambda par: par[1], reverse=True
+    )[:MODULOS_MOSTRADOS]
+    aplicacion = sorted(nombre for nombre in medidas[-1] if nombre.startswith("app.") or nombre == "main")
+
+    total_ms = statistics.median(totales) / 1000
+    print(f"{'import main':<36} {total_ms:>10.1f} ms  (mín {min(totales) / 1000:.1f}, máx {max(totales) / 1000:.1f})")
+    print(f"{'módulos cargados':<36} {len(medidas[-1]):>10}")
+    print(f"{'módulos de la aplicación':<36} {len(aplicacion):>10}")
+    print("\nMódulos con más tiempo propio:")
+    for nombre, tiempo in mas_lentos:
+        print(f"  {nombre:<50} {tiempo / 1000:>8.1f} ms")
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "rondas": rondas,
+        "total_ms": round(total_ms, 1),
+        "minimo_ms": round(min(totales) / 1000, 1),
+        "modulos": len(medidas[-1]),
+        "modulos_aplicacion": aplicacion,
+        "mas_lentos": [{"modulo": nombre, "propio_ms": round(tiempo / 1000, 2)} for nombre, tiempo in mas_lentos],
+    }
+
+def comparar(base: dict, nuevo: dict, umbral: float) -> bool:
+    """Imprime la comparación y devuelve si el arranque empeora más que `umbral` %"""
+    cambio = 100 * (nuevo["total_ms"] - base["total_ms"]) / base["total_ms"]
+    print(f"{'':<24}{'base':>12}{'nuevo':>12}{'cambio':>10}")
+    print(f"{'import main (ms)':<24}{base['total_ms']:>12.1f}{nuevo['total_ms']:>12.1f}{cambio:>+9.1f}%")
+    print(f"{'módulos cargados':<24}{base['modulos']:>12}{nuevo['modulos']:>12}")
+    nuevos = sorted(set(nuevo["modulos_aplicacion"]) - set(base["modulos_aplicacion"]))
+    retirados = sorted(set(base["modulos_aplicacion"]) - set(nuevo["modulos_aplicacion"]))
+    if nuevos:
+        print(f"\nMódulos de la aplicación que ahora se cargan al arrancar: {', '.join(nuevos)}")
+    if retirados:
+        print(f"\nMódulos de la aplicación que ya no se cargan al arrancar: {', '.join(retirados)}")
+    return cambio > umbral
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del tiempo de arranque en frío")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    parser_ejecutar = subparsers.add_parser("ejecutar", help="Mide el tiempo de importar main")
+    parser_ejecutar.add_argument("--salida", default=None, help="Guarda el resultado en JSON")
+    parser_ejecutar.add_argument("--rondas", type=int, default=RONDAS, help="Intérpretes nuevos a lanzar")
+
+    parser_comparar = subparsers.add_parser("comparar", help="Compara dos resultados y marca regresiones")
+    parser_comparar.add_argument("base")
+    parser_comparar.add_argument("nuevo")
+    parser_comparar.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="Porcentaje de empeoramiento tolerado")
+
+    args = parser.parse_args()
+    if args.comando == "ejecutar":
+        resultado = ejecutar(args.rondas)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, indent=2, ensure_ascii=False)
+            print(f"✅ Resultado guardado en {args.salida}")
+        return 0
+
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.nuevo, "r", encoding="utf-8") as f:
+        nuevo = json.load(f)
+    if comparar(base, nuevo, args.umbral):
+        print(f"\n❌ El arranque empeora más del {args.umbral:.0f}%")
+        return 1
+    print(f"\n✅ Sin regresión por encima del {args.umbral:.0f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
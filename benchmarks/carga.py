@@ -0,0 +1,285 @@
+"""Prueba de carga de la API sobre una base de datos generada con benchmarks.generar_datos.
+
+Arranca uvicorn con la base de datos indicada (o usa un servidor ya levantado
+con --url), inicia sesión con varios turistas y reproduce en paralelo los
+flujos de navegación del catálogo, búsqueda, reserva, review y favoritos
+durante un tiempo fijo. Informa del rendimiento y de los percentiles de
+latencia por endpoint, y puede guardar el resultado en JSON y compararlo con
+una ejecución anterior.
+
+Uso:
+    python -m benchmarks.carga --db bench.sqlite --duracion 60 --salida base.json
+    python -m benchmarks.carga --db bench.sqlite --comparar base.json
+"""
+from typing import Dict, List, Optional
+import argparse
+import asyncio
+import json
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+
+import httpx
+
+from benchmarks.generar_datos import CADA_OPERADOR, CONTRASENA, Muestreador
+
+ORDENAMIENTOS = ("recent", "price", "popular", "rating")
+TIPOS = ('aventura', 'cultural', 'gastronomico', 'playa', 'montaña', 'ciudad', 'ecoturismo', 'romantico', 'familiar', 'negocios')
+PAISES = ('Peru', 'Chile', 'Mexico', 'Colombia', 'Argentina', 'España')
+# Peso relativo de cada flujo en la mezcla de tráfico
+FLUJOS = {
+    "catalogo": 40,
+    "busqueda": 25,
+    "favorito": 15,
+    "reserva": 10,
+    "review": 10,
+}
+
+class Resultados(object):
+    """Latencias y errores por endpoint"""
+
+    def __init__(self):
+        self.latencias: Dict[str, List[float]] = {}
+        self.errores: Dict[str, int] = {}
+        self.activo = False
+
+    def registrar(self, endpoint: str, segundos: float, error: bool):
+        if not self.activo:
+            return
+        self.latencias.setdefault(endpoint, []).append(segundos)
+        if error:
+            self.errores[endpoint] = self.errores.get(endpoint, 0) + 1
+
+    def resumen(self, duracion: float) -> dict:
+        endpoints = {}
+        todas = []
+        for endpoint, latencias in sorted(self.latencias.items()):
+            todas.extend(latencias)
+            endpoints[endpoint] = _estadisticas(latencias, self.errores.get(endpoint, 0), duracion)
+        return {
+            "endpoints": endpoints,
+            "total": _estadisticas(todas, sum(self.errores.values()), duracion),
+        }
+
+def _percentil(ordenadas: List[float], p: float) -> float:
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(p / 100 * len(ordenadas)))]
+
+def _estadisticas(latencias: List[float], errores: int, duracion: float) -> dict:
+    ordenadas = sorted(latencias)
+    return {
+        "peticiones": len(ordenadas),
+        "errores": errores,
+        "rps": round(len(ordenadas) / duracion, 2),
+        "p50_ms": round(_percentil(ordenadas, 50) * 1000, 2),
+        "p90_ms": round(_percentil(ordenadas, 90) * 1000, 2),
+        "p99_ms": round(_percentil(ordenadas, 99) * 1000, 2),
+        "max_ms": round(ordenadas[-1] * 1000, 2) if ordenadas else 0.0,
+    }
+
+class Sesion(object):
+    """Un turista con su token que ejecuta flujos contra la API"""
+
+    def __init__(self, cliente: httpx.AsyncClient, resultados: Resultados, rnd: random.Random,
+                 elegir_paquete, token: str):
+        self.cliente = cliente
+        self.resultados = resultados
+        self.rnd = rnd
+        self.elegir_paquete = elegir_paquete
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def peticion(self, metodo: str, ruta: str, endpoint: str, **kwargs) -> Optional[httpx.Response]:
+        inicio = time.perf_counter()
+        try:
+            respuesta = await self.cliente.request(metodo, ruta, headers=self.headers, **kwargs)
+        except httpx.HTTPError:
+            self.resultados.registrar(f"{metodo} {endpoint}", time.perf_counter() - inicio, True)
+            return None
+        self.resultados.registrar(f"{metodo} {endpoint}", time.perf_counter() - inicio, respuesta.status_code >= 400)
+        return respuesta
+
+    async def catalogo(self):
+        sort = self.rnd.choice(ORDENAMIENTOS)
+        await self.peticion("GET", "/paquetes-turisticos/", f"/paquetes-turisticos/?sort={sort}",
+                            params={"skip": 20 * min(int(self.rnd.expovariate(0.5)), 50), "limit": 20, "sort": sort})
+        paquete_id = self.elegir_paquete()
+        await self.peticion("GET", f"/paquetes-turisticos/{paquete_id}", "/paquetes-turisticos/{id}")
+        await self.peticion("GET", f"/reviews/paquete/{paquete_id}/summary", "/reviews/paquete/{id}/summary")
+        await self.peticion("GET", f"/reviews/paquete/{paquete_id}", "/reviews/paquete/{id}", params={"limit": 20})
+        await self.peticion("GET", f"/paquetes-turisticos/{paquete_id}/similares", "/paquetes-turisticos/{id}/similares")
+
+    async def busqueda(self):
+        filtros = {"pais_destino": self.rnd.choice(PAISES)}
+        if self.rnd.random() < 0.5:
+            filtros["tipo_paquete"] = self.rnd.choice(TIPOS)
+        if self.rnd.random() < 0.4:
+            filtros["precio_max"] = self.rnd.choice((100, 250, 500, 1000))
+        if self.rnd.random() < 0.2:
+            filtros["incluye_guia"] = True
+        facetas = self.rnd.random() < 0.3
+        await self.peticion("POST", "/paquetes-turisticos/search",
+                            "/paquetes-turisticos/search" + ("?facetas=true" if facetas else ""),
+                            params={"limit": 20, "sort": self.rnd.choice(ORDENAMIENTOS), "facetas": facetas},
+                            json=filtros)
+
+    async def reserva(self):
+        paquete_id = self.elegir_paquete()
+        respuesta = await self.peticion("GET", f"/paquetes-turisticos/{paquete_id}", "/paquetes-turisticos/{id}")
+        precio = respuesta.json().get("precio_por_persona", 100) if respuesta is not None and respuesta.status_code == 200 else 100
+        personas = self.rnd.randint(1, 4)
+        await self.peticion("POST", "/reservas/", "/reservas/", json={
+            "paquete_id": paquete_id,
+            "fecha_inicio": "2026-12-01",
+            "fecha_fin": "2026-12-05",
+            "numero_personas": personas,
+            "numero_adultos": personas,
+            "precio_total": round(float(precio) * personas, 2),
+            "precio_por_persona": float(precio),
+        })
+        await self.peticion("GET", "/reservas/", "/reservas/", params={"limit": 20})
+
+    async def review(self):
+        calificacion = self.rnd.randint(1, 5)
+        await self.peticion("POST", "/reviews/", "/reviews/", json={
+            "paquete_id": self.elegir_paquete(),
+            "calificacion": calificacion,
+            "comentario": f"Prueba de carga: {calificacion} de 5",
+            "guia": calificacion,
+        })
+        await self.peticion("GET", "/reviews/mias", "/reviews/mias", params={"limit": 20})
+
+    async def favorito(self):
+        # El router de favoritos se monta con prefijo /favoritos sobre su propio /favoritos
+        paquete_id = self.elegir_paquete()
+        await self.peticion("POST", "/favoritos/favoritos/", "/favoritos/favoritos/", json={"paquete_id": paquete_id})
+        await self.peticion("GET", "/favoritos/favoritos/", "/favoritos/favoritos/", params={"limit": 20})
+        await self.peticion("GET", f"/favoritos/favoritos/check/{paquete_id}", "/favoritos/favoritos/check/{id}")
+        await self.peticion("DELETE", f"/favoritos/favoritos/{paquete_id}", "/favoritos/favoritos/{id}")
+
+async def _trabajador(sesion: Sesion, fin: float):
+    flujos = list(FLUJOS)
+    pesos = list(FLUJOS.values())
+    while time.monotonic() < fin:
+        flujo = sesion.rnd.choices(flujos, pesos)[0]
+        await getattr(sesion, flujo)()
+
+async def _iniciar_sesiones(cliente: httpx.AsyncClient, usuarios: int, cantidad: int) -> List[str]:
+    """Inicia sesión con `cantidad` turistas distintos (el login no se mide)"""
+    turistas = [i for i in range(1, usuarios + 1) if i % CADA_OPERADOR != 0][:cantidad]
+    tokens = []
+    for usuario in turistas:
+        respuesta = await cliente.post("/auth/login", json={"email": f"usuario{usuario}@ejemplo.com", "password": CONTRASENA})
+        respuesta.raise_for_status()
+        tokens.append(respuesta.json()["access_token"])
+    return tokens
+
+async def ejecutar(url: str, usuarios: int, paquetes: int, concurrencia: int, duracion: float,
+                   calentamiento: float, semilla: int) -> dict:
+    rnd = random.Random(semilla)
+    elegir = Muestreador(rnd, paquetes, 1.0).elegir
+    resultados = Resultados()
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=url, timeout=30.0, limits=limites) as cliente:
+        tokens = await _iniciar_sesiones(cliente, usuarios, concurrencia)
+        sesiones = [
+            Sesion(cliente, resultados, random.Random(semilla + i), lambda: elegir() + 1, tokens[i % len(tokens)])
+            for i in range(concurrencia)
+        ]
+        if calentamiento > 0:
+            fin = time.monotonic() + calentamiento
+            await asyncio.gather(*[_trabajador(sesion, fin) for sesion in sesiones])
+        resultados.activo = True
+        inicio = time.monotonic()
+        await asyncio.gather(*[_trabajador(sesion, inicio + duracion) for sesion in sesiones])
+        transcurrido = time.monotonic() - inicio
+    resumen = resultados.resumen(transcurrido)
+    resumen["configuracion"] = {
+        "concurrencia": concurrencia,
+        "duracion_s": round(transcurrido, 1),
+        "usuarios": usuarios,
+        "paquetes": paquetes,
+        "semilla": semilla,
+    }
+    return resumen
+
+def _iniciar_servidor(db: str, puerto: int) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_PATH=os.path.abspath(db))
+    proceso = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(puerto), "--log-level", "warning"],
+        env=env
+    )
+    limite = time.monotonic() + 120
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError("uvicorn terminó durante el arranque")
+        try:
+            if httpx.get(f"http://127.0.0.1:{puerto}/health", timeout=1.0).status_code == 200:
+                return proceso
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    proceso.terminate()
+    raise RuntimeError("uvicorn no respondió a /health")
+
+def imprimir(resumen: dict, base: Optional[dict] = None):
+    columnas = ("peticiones", "errores", "rps", "p50_ms", "p90_ms", "p99_ms", "max_ms")
+    print(f"{'endpoint':<48}" + "".join(f"{columna:>12}" for columna in columnas))
+    filas = list(resumen["endpoints"].items()) + [("TOTAL", resumen["total"])]
+    for endpoint, datos in filas:
+        print(f"{endpoint:<48}" + "".join(f"{datos[columna]:>12}" for columna in columnas))
+        anterior = (base or {}).get("endpoints", {}).get(endpoint) if endpoint != "TOTAL" else (base or {}).get("total")
+        if anterior:
+            deltas = []
+            for columna in ("rps", "p50_ms", "p99_ms"):
+                if anterior[columna]:
+                    deltas.append(f"{columna} {100 * (datos[columna] - anterior[columna]) / anterior[columna]:+.1f}%")
+            print(f"{'':<48}  vs base: {', '.join(deltas)}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de paquetes turísticos")
+    parser.add_argument("--db", required=True, help="Base de datos generada con benchmarks.generar_datos")
+    parser.add_argument("--url", default=None, help="Servidor ya levantado sobre --db (por defecto se arranca uvicorn)")
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--concurrencia", type=int, default=20, help="Sesiones simultáneas")
+    parser.add_argument("--duracion", type=float, default=30.0, help="Segundos medidos")
+    parser.add_argument("--calentamiento", type=float, default=5.0, help="Segundos previos sin medir")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default=None, help="Guarda el resultado en JSON")
+    parser.add_argument("--comparar", default=None, help="JSON de una ejecución anterior")
+    args = parser.parse_args()
+
+    connection = sqlite3.connect(args.db)
+    usuarios = connection.execute("SELECT COALESCE(MAX(id), 0) FROM usuarios").fetchone()[0]
+    paquetes = connection.execute("SELECT COALESCE(MAX(id), 0) FROM paquetes_turisticos").fetchone()[0]
+    connection.close()
+    if not usuarios or not paquetes:
+        print(f"❌ {args.db} no tiene datos; genera antes con python -m benchmarks.generar_datos")
+        return 1
+
+    proceso = None if args.url else _iniciar_servidor(args.db, args.puerto)
+    url = args.url or f"http://127.0.0.1:{args.puerto}"
+    try:
+        resumen = asyncio.run(ejecutar(url, usuarios, paquetes, args.concurrencia, args.duracion,
+                                       args.calentamiento, args.semilla))
+    finally:
+        if proceso:
+            proceso.terminate()
+            proceso.wait()
+
+    base = None
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            base = json.load(f)
+    imprimir(resumen, base)
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resumen, f, indent=2, ensure_ascii=False)
+        print(f"✅ Resultado guardado en {args.salida}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
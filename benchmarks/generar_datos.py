@@ -0,0 +1,288 @@
+"""Genera una base de datos SQLite con volúmenes realistas para pruebas de rendimiento.
+
+Con `--escala 1` crea 100k usuarios, 50k paquetes, 1M reservas, 500k reviews y
+2M favoritos (los favoritos repetidos se descartan). La popularidad de los
+paquetes y la actividad de los usuarios siguen distribuciones de tipo Zipf,
+de modo que unos pocos paquetes concentran la mayoría de reservas, reviews y
+favoritos, como en producción. Con la misma semilla el resultado es idéntico.
+
+Todos los usuarios tienen la contraseña CONTRASENA; uno de cada
+CADA_OPERADOR es operador turístico.
+
+Uso: python -m benchmarks.generar_datos --db bench.sqlite [--escala 0.1]
+"""
+from bisect import bisect_left
+from itertools import accumulate
+from pathlib import Path
+from typing import Iterable, Iterator, List, Sequence
+import argparse
+import logging
+import random
+import sqlite3
+import sys
+import time
+
+from passlib.context import CryptContext
+
+from app.migraciones import aplicar_migraciones
+
+logger = logging.getLogger(__name__)
+
+CONTRASENA = "benchmark123"
+CADA_OPERADOR = 20
+TAMANO_LOTE = 50000
+
+# Volúmenes con --escala 1
+VOLUMENES = {
+    "usuarios": 100_000,
+    "paquetes": 50_000,
+    "reservas": 1_000_000,
+    "reviews": 500_000,
+    "favoritos": 2_000_000,
+}
+
+TIPOS = ('aventura', 'cultural', 'gastronomico', 'playa', 'montaña', 'ciudad', 'ecoturismo', 'romantico', 'familiar', 'negocios')
+NIVELES = ('facil', 'moderado', 'dificil', 'extremo')
+DESTINOS = {
+    'Peru': ('Lima', 'Cusco', 'Arequipa', 'Puno', 'Iquitos', 'Trujillo'),
+    'Chile': ('Santiago', 'Valparaíso', 'Puerto Natales', 'San Pedro de Atacama'),
+    'Mexico': ('Ciudad de México', 'Cancún', 'Oaxaca', 'Guadalajara', 'Mérida'),
+    'Colombia': ('Bogotá', 'Medellín', 'Cartagena', 'Santa Marta'),
+    'Argentina': ('Buenos Aires', 'Mendoza', 'Bariloche', 'Salta', 'Ushuaia'),
+    'España': ('Madrid', 'Barcelona', 'Sevilla', 'Granada', 'Valencia'),
+}
+# El primer país y ciudad de cada lista son los más frecuentes
+PAISES = tuple(DESTINOS)
+ESTADOS_RESERVA = (('completada', 55), ('confirmada', 20), ('pendiente', 15), ('cancelada', 10))
+CALIFICACIONES = ((5, 40), (4, 33), (3, 15), (2, 7), (1, 5))
+NOMBRES = ('Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Jorge', 'Sofía', 'Diego', 'Valeria', 'Pedro')
+APELLIDOS = ('García', 'Rodríguez', 'López', 'Martínez', 'Quispe', 'Torres', 'Flores', 'Rojas', 'Vargas', 'Díaz')
+
+class Muestreador(object):
+    """Elige índices 0..n-1 con probabilidad proporcional a 1 / rango^exponente.
+
+    Los rangos se barajan para que la popularidad no dependa del id.
+    """
+
+    def __init__(self, rnd: random.Random, n: int, exponente: float):
+        self.rnd = rnd
+        orden = list(range(n))
+        rnd.shuffle(orden)
+        pesos = [0.0] * n
+        for rango, indice in enumerate(orden, start=1):
+            pesos[indice] = 1.0 / rango ** exponente
+        self.acumulados = list(accumulate(pesos))
+        self.total = self.acumulados[-1]
+
+    def elegir(self) -> int:
+        return bisect_left(self.acumulados, self.rnd.random() * self.total)
+
+def _eleccion_ponderada(rnd: random.Random, opciones: Sequence[tuple]):
+    valores = [valor for valor, _ in opciones]
+    acumulados = list(accumulate(peso for _, peso in opciones))
+    return lambda: valores[bisect_left(acumulados, rnd.random() * acumulados[-1])]
+
+def _fecha(rnd: random.Random, max_dias: int) -> str:
+    return f"-{rnd.randint(0, max_dias)} days"
+
+def _insertar(connection: sqlite3.Connection, nombre: str, sql: str, filas: Iterable[tuple], total: int) -> int:
+    """Inserta por lotes con un commit por lote y registra el progreso"""
+    insertadas, lote = 0, []
+    inicio = time.monotonic()
+
+    def volcar():
+        nonlocal insertadas
+        cursor = connection.executemany(sql, lote)
+        connection.commit()
+        insertadas += max(cursor.rowcount, 0)
+        lote.clear()
+        logger.info(f"{nombre}: {insertadas}/{total} ({time.monotonic() - inicio:.1f}s)")
+
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= TAMANO_LOTE:
+            volcar()
+    if lote:
+        volcar()
+    return insertadas
+
+def _usuarios(rnd: random.Random, n: int, password_hash: str) -> Iterator[tuple]:
+    for i in range(1, n + 1):
+        pais = rnd.choice(PAISES)
+        yield (
+            f"usuario{i}@ejemplo.com", password_hash, rnd.choice(NOMBRES), rnd.choice(APELLIDOS),
+            pais, rnd.choice(DESTINOS[pais]), int(i % CADA_OPERADOR == 0), int(rnd.random() < 0.8),
+            _fecha(rnd, 1095)
+        )
+
+def _paquetes(rnd: random.Random, n: int, operadores: List[int], precios: List[float]) -> Iterator[tuple]:
+    elegir_operador = Muestreador(rnd, len(operadores), 1.0).elegir
+    paises = _eleccion_ponderada(rnd, [(pais, 1.0 / rango) for rango, pais in enumerate(PAISES, start=1)])
+    for i in range(1, n + 1):
+        pais = paises()
+        ciudades = DESTINOS[pais]
+        ciudad = ciudades[min(int(rnd.expovariate(0.7)), len(ciudades) - 1)]
+        tipo = rnd.choice(TIPOS)
+        # Precios log-normales: muchos baratos y una cola de paquetes caros
+        precio = round(min(max(rnd.lognormvariate(5.5, 0.8), 20), 20000), 2)
+        precios.append(precio)
+        yield (
+            operadores[elegir_operador()], f"Paquete {tipo} en {ciudad} #{i}",
+            f"Experiencia de {tipo} en {ciudad}, {pais}.", tipo, rnd.randint(1, 15), rnd.randint(2, 40),
+            rnd.choice(NIVELES), precio, round(precio * 0.6, 2),
+            int(rnd.random() < 0.5), int(rnd.random() < 0.4), int(rnd.random() < 0.5), int(rnd.random() < 0.7),
+            pais, ciudad, f"Plaza principal de {ciudad}", int(rnd.random() < 0.95),
+            rnd.choice((0, 0, 0, 12, 16, 18)), _fecha(rnd, 730)
+        )
+
+def _imagenes(rnd: random.Random, paquetes: int) -> Iterator[tuple]:
+    for paquete_id in range(1, paquetes + 1):
+        for orden in range(rnd.randint(1, 4)):
+            yield (paquete_id, f"https://img.ejemplo.com/paquetes/{paquete_id}/{orden}.jpg", int(orden == 0), orden)
+
+def _reservas(rnd: random.Random, n: int, elegir_paquete, elegir_turista, precios: List[float],
+              reservas_paquete: List[int], reservas_turista: List[int], completadas: List[int]) -> Iterator[tuple]:
+    estado = _eleccion_ponderada(rnd, ESTADOS_RESERVA)
+    for i in range(1, n + 1):
+        paquete_id, turista_id = elegir_paquete() + 1, elegir_turista()
+        adultos = rnd.randint(1, 4)
+        ninos = rnd.choice((0, 0, 0, 1, 2))
+        precio = precios[paquete_id - 1]
+        estado_reserva = estado()
+        reservas_paquete.append(paquete_id)
+        reservas_turista.append(turista_id)
+        if estado_reserva == 'completada':
+            completadas.append(i)
+        inicio = f"2026-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}"
+        yield (
+            paquete_id, turista_id, inicio, inicio, adultos + ninos, adultos, ninos,
+            round(precio * adultos + precio * 0.6 * ninos, 2), precio, estado_reserva,
+            int(estado_reserva in ('confirmada', 'completada')), _fecha(rnd, 730)
+        )
+
+def _reviews(rnd: random.Random, reservas: List[int], reservas_paquete: List[int],
+             reservas_turista: List[int]) -> Iterator[tuple]:
+    calificacion = _eleccion_ponderada(rnd, CALIFICACIONES)
+
+    def categoria(base: int):
+        return None if rnd.random() < 0.3 else max(1, min(5, base + rnd.choice((-1, 0, 0, 1))))
+
+    for reserva_id in reservas:
+        nota = calificacion()
+        yield (
+            reserva_id, reservas_turista[reserva_id - 1], reservas_paquete[reserva_id - 1], nota,
+            f"Valoración {nota} de 5", categoria(nota), categoria(nota), categoria(nota),
+            categoria(nota), categoria(nota), categoria(nota), _fecha(rnd, 700)
+        )
+
+def _favoritos(rnd: random.Random, n: int, elegir_paquete, elegir_usuario) -> Iterator[tuple]:
+    for _ in range(n):
+        yield (elegir_usuario(), elegir_paquete() + 1, _fecha(rnd, 730))
+
+def generar(ruta: Path, escala: float = 1.0, semilla: int = 42, **volumenes) -> dict:
+    """Crea la base de datos en `ruta` y devuelve el número de filas por tabla"""
+    objetivo = {tabla: max(1, int(total * escala)) for tabla, total in VOLUMENES.items()}
+    objetivo.update({tabla: total for tabla, total in volumenes.items() if total is not None})
+    objetivo["reviews"] = min(objetivo["reviews"], objetivo["reservas"])
+    objetivo["usuarios"] = max(objetivo["usuarios"], CADA_OPERADOR)
+
+    # Mismo esquema que jwt_handler, sin importar app.auth (abriría la base de datos configurada)
+    password_hash = CryptContext(schemes=["bcrypt"], deprecated="auto").hash(CONTRASENA)
+
+    rnd = random.Random(semilla)
+    connection = sqlite3.connect(str(ruta))
+    aplicar_migraciones(connection)
+    # Carga masiva: los datos son consistentes por construcción
+    connection.execute("PRAGMA foreign_keys = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA journal_mode = MEMORY")
+    # Sin eventos de dominio durante la carga: serían millones de filas que nadie consume
+    triggers_eventos = connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'trg_eventos_%'"
+    ).fetchall()
+    for nombre, _ in triggers_eventos:
+        connection.execute(f"DROP TRIGGER {nombre}")
+
+    _insertar(connection, "usuarios", """
+        INSERT INTO usuarios (email, password_hash, nombre, apellido, pais, ciudad, es_operador, es_verificado, fecha_registro)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now', ?))
+    """, _usuarios(rnd, objetivo["usuarios"], password_hash), objetivo["usuarios"])
+
+    operadores = list(range(CADA_OPERADOR, objetivo["usuarios"] + 1, CADA_OPERADOR))
+    precios: List[float] = []
+    _insertar(connection, "paquetes", """
+        INSERT INTO paquetes_turisticos (operador_id, titulo, descripcion, tipo_paquete, duracion_dias, capacidad_maxima,
+            nivel_dificultad, precio_por_persona, precio_niño, incluye_transporte, incluye_alojamiento, incluye_comidas,
+            incluye_guia, pais_destino, ciudad_destino, punto_encuentro, esta_activo, edad_minima, fecha_creacion)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', ?))
+    """, _paquetes(rnd, objetivo["paquetes"], operadores, precios), objetivo["paquetes"])
+
+    _insertar(connection, "imagenes", """
+        INSERT INTO imagenes_paquetes (paquete_id, url_imagen, es_principal, orden) VALUES (?, ?, ?, ?)
+    """, _imagenes(rnd, objetivo["paquetes"]), objetivo["paquetes"] * 5 // 2)
+
+    # Pocos paquetes concentran la demanda; algunos usuarios reservan mucho más que el resto
+    elegir_paquete = Muestreador(rnd, objetivo["paquetes"], 1.0).elegir
+    usuarios = Muestreador(rnd, objetivo["usuarios"], 0.8)
+    elegir_usuario = lambda: usuarios.elegir() + 1
+    reservas_paquete: List[int] = []
+    reservas_turista: List[int] = []
+    completadas: List[int] = []
+    _insertar(connection, "reservas", """
+        INSERT INTO reservas (paquete_id, turista_id, fecha_inicio, fecha_fin, numero_personas, numero_adultos,
+            numero_niños, precio_total, precio_por_persona, estado, pagado, fecha_creacion)
+        VALUES (?, ?, ?, date(?, '+3 days'), ?, ?, ?, ?, ?, ?, ?, datetime('now', ?))
+    """, _reservas(rnd, objetivo["reservas"], elegir_paquete, elegir_usuario, precios,
+                   reservas_paquete, reservas_turista, completadas), objetivo["reservas"])
+
+    # Reviews sobre reservas completadas; si no alcanzan, también sobre el resto
+    candidatas = completadas if len(completadas) >= objetivo["reviews"] else range(1, objetivo["reservas"] + 1)
+    con_review = sorted(rnd.sample(candidatas, objetivo["reviews"]))
+    _insertar(connection, "reviews", """
+        INSERT INTO reviews (reserva_id, autor_id, paquete_id, calificacion, comentario, organizacion, comunicacion,
+            actividades, guia, seguridad, valor, fecha_review)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now', ?))
+    """, _reviews(rnd, con_review, reservas_paquete, reservas_turista), objetivo["reviews"])
+
+    _insertar(connection, "favoritos", """
+        INSERT OR IGNORE INTO favoritos (usuario_id, paquete_id, fecha_agregado) VALUES (?, ?, datetime('now', ?))
+    """, _favoritos(rnd, objetivo["favoritos"], elegir_paquete, elegir_usuario), objetivo["favoritos"])
+
+    for _, sql in triggers_eventos:
+        connection.execute(sql)
+
+    logger.info("Actualizando estadísticas del planificador (ANALYZE)")
+    connection.execute("ANALYZE")
+    connection.commit()
+    tablas = ("usuarios", "paquetes_turisticos", "imagenes_paquetes", "reservas", "reviews", "favoritos")
+    conteos = {tabla: connection.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0] for tabla in tablas}
+    connection.close()
+    return conteos
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Genera datos sintéticos para pruebas de rendimiento")
+    parser.add_argument("--db", default="bench.sqlite", help="Ruta de la base de datos a crear")
+    parser.add_argument("--escala", type=float, default=1.0, help="Factor sobre los volúmenes por defecto")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--reemplazar", action="store_true", help="Borra la base de datos si ya existe")
+    for tabla in VOLUMENES:
+        parser.add_argument(f"--{tabla}", type=int, default=None, help=f"Filas de {tabla} (ignora --escala)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    ruta = Path(args.db)
+    if ruta.exists():
+        if not args.reemplazar:
+            print(f"❌ {ruta} ya existe (usa --reemplazar)")
+            return 1
+        ruta.unlink()
+
+    inicio = time.monotonic()
+    conteos = generar(ruta, args.escala, args.semilla, **{tabla: getattr(args, tabla) for tabla in VOLUMENES})
+    print(f"✅ Base de datos generada en {ruta} ({time.monotonic() - inicio:.0f}s)")
+    for tabla, total in conteos.items():
+        print(f"  - {tabla}: {total}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
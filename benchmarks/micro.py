@@ -0,0 +1,199 @@
+"""Micro-benchmarks de las rutas calientes de repositories y serialización.
+
+Cada caso se calibra para que una ronda dure al menos TIEMPO_RONDA y se
+repite RONDAS veces con el recolector de basura desactivado. El resultado
+(tiempo por llamada: mínimo, mediana, media y desviación) se guarda en JSON.
+`comparar` contrasta dos resultados por mediana y falla si algún caso empeora
+más que el umbral.
+
+Los casos usan una base de datos temporal generada con benchmarks.generar_datos.
+
+Uso:
+    python -m benchmarks.micro ejecutar --salida base.json [--filtro jwt]
+    python -m benchmarks.micro comparar base.json nuevo.json [--umbral 10]
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+RONDAS = 15
+TIEMPO_RONDA = 0.02
+# Límite por caso para que las operaciones lentas (bcrypt) no alarguen la suite
+TIEMPO_MAXIMO_CASO = 3.0
+UMBRAL_REGRESION = 10.0
+FILAS_RESPUESTA = 1000
+
+VOLUMENES = {"usuarios": 2000, "paquetes": FILAS_RESPUESTA, "reservas": 10000, "reviews": 5000, "favoritos": 10000}
+
+def _sincrono(coroutine):
+    """Ejecuta una corrutina que no llega a suspenderse, sin pasar por el event loop"""
+    try:
+        coroutine.send(None)
+    except StopIteration as fin:
+        return fin.value
+    coroutine.close()
+    raise RuntimeError("La corrutina se suspendió; no se puede medir de forma síncrona")
+
+def medir(funcion: Callable[[], object]) -> dict:
+    """Tiempo por llamada de `funcion` en segundos"""
+    # Calibración: iteraciones por ronda
+    iteraciones = 1
+    while True:
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            funcion()
+        transcurrido = time.perf_counter() - inicio
+        if transcurrido >= TIEMPO_RONDA:
+            break
+        iteraciones *= 2 if transcurrido == 0 else max(2, min(10, int(TIEMPO_RONDA / transcurrido) + 1))
+
+    rondas = max(3, min(RONDAS, int(TIEMPO_MAXIMO_CASO / max(transcurrido, 1e-9))))
+    tiempos = []
+    gc_activo = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rondas):
+            inicio = time.perf_counter()
+            for _ in range(iteraciones):
+                funcion()
+            tiempos.append((time.perf_counter() - inicio) / iteraciones)
+    finally:
+        if gc_activo:
+            gc.enable()
+
+    mediana = statistics.median(tiempos)
+    return {
+        "rondas": rondas,
+        "iteraciones": iteraciones,
+        "min_us": round(min(tiempos) * 1e6, 3),
+        "mediana_us": round(mediana * 1e6, 3),
+        "media_us": round(statistics.fmean(tiempos) * 1e6, 3),
+        "desviacion_us": round(statistics.pstdev(tiempos) * 1e6, 3),
+        "ops_s": round(1 / mediana, 1) if mediana else None,
+    }
+
+def preparar_casos() -> Dict[str, Callable[[], object]]:
+    """Crea la base de datos temporal y devuelve los casos a medir"""
+    ruta = Path(tempfile.mkdtemp()) / "micro.sqlite"
+    os.environ["DATABASE_PATH"] = str(ruta)
+
+    from benchmarks.generar_datos import CONTRASENA, generar
+    generar(ruta, **VOLUMENES)
+
+    # Importar después de fijar DATABASE_PATH: settings lo lee al importar
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from app.auth.jwt_handler import jwt_handler
+    from app.database import db
+    from app.models.paqueteturistico import PaqueteTuristicoResponse, PaqueteTuristicoTarjeta
+    from app.models.usuario import UsuarioResponse
+    from app.respuestas import respuesta_json
+    from app.repositories.instances import (
+        paquete_turistico_repository,
+        review_repository,
+        favorito_repository
+    )
+
+    connection = db.get_client()
+    paquete = connection.execute("SELECT * FROM paquetes_turisticos WHERE id = 1").fetchone()
+    review = connection.execute("SELECT * FROM reviews ORDER BY id LIMIT 1").fetchone()
+    favorito = connection.execute("SELECT * FROM favoritos ORDER BY id LIMIT 1").fetchone()
+    usuario = connection.execute("SELECT * FROM usuarios WHERE id = 1").fetchone()
+    filas = connection.execute("SELECT * FROM paquetes_turisticos ORDER BY id LIMIT ?", (FILAS_RESPUESTA,)).fetchall()
+
+    paquetes = [_sincrono(paquete_turistico_repository._enrich_paquete_response(dict(fila))) for fila in filas]
+    campo_respuesta = create_response_field(name="Response_paquetes", type_=List[PaqueteTuristicoResponse])
+    token = jwt_handler.create_access_token({"sub": "1", "email": usuario["email"]})
+    password_hash = usuario["password_hash"]
+
+    return {
+        "enrich_paquete_response": lambda: _sincrono(paquete_turistico_repository._enrich_paquete_response(dict(paquete), 1)),
+        "enrich_review_response": lambda: review_repository._enrich_review_response(dict(review)),
+        "enrich_favorito_response": lambda: favorito_repository._enrich_favorito_response(dict(favorito)),
+        "usuario_response": lambda: UsuarioResponse(**dict(usuario)),
+        "jwt_encode": lambda: jwt_handler.create_access_token({"sub": "1", "email": usuario["email"]}),
+        "jwt_decode": lambda: jwt_handler.verify_token(token),
+        "bcrypt_verify": lambda: jwt_handler.verify_password(CONTRASENA, password_hash),
+        f"response_model_paquetes_{FILAS_RESPUESTA}": lambda: _sincrono(
+            serialize_response(field=campo_respuesta, response_content=paquetes)
+        ),
+        f"respuesta_json_paquetes_{FILAS_RESPUESTA}": lambda: respuesta_json(paquetes, List[PaqueteTuristicoResponse]),
+        f"tarjetas_paquetes_{FILAS_RESPUESTA}": lambda: respuesta_json(
+            paquete_turistico_repository.get_tarjetas(0, FILAS_RESPUESTA), List[PaqueteTuristicoTarjeta]
+        ),
+    }
+
+def ejecutar(filtro: Optional[str] = None) -> dict:
+    casos = preparar_casos()
+    resultados = {}
+    for nombre, funcion in casos.items():
+        if filtro and filtro not in nombre:
+            continue
+        resultados[nombre] = medir(funcion)
+        print(f"{nombre:<36} {resultados[nombre]['mediana_us']:>14.3f} µs  (±{resultados[nombre]['desviacion_us']:.3f})")
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+
+def comparar(base: dict, nuevo: dict, umbral: float) -> List[str]:
+    """Imprime la comparación por mediana y devuelve los casos que empeoran más que `umbral` %"""
+    regresiones = []
+    print(f"{'caso':<36}{'base µs':>14}{'nuevo µs':>14}{'cambio':>10}")
+    for nombre, datos in nuevo["resultados"].items():
+        anterior = base["resultados"].get(nombre)
+        if not anterior:
+            print(f"{nombre:<36}{'-':>14}{datos['mediana_us']:>14.3f}{'nuevo':>10}")
+            continue
+        cambio = 100 * (datos["mediana_us"] - anterior["mediana_us"]) / anterior["mediana_us"]
+        marca = ""
+        if cambio > umbral:
+            regresiones.append(nombre)
+            marca = "  ❌"
+        print(f"{nombre:<36}{anterior['mediana_us']:>14.3f}{datos['mediana_us']:>14.3f}{cambio:>+9.1f}%{marca}")
+    return regresiones
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de rutas calientes")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    parser_ejecutar = subparsers.add_parser("ejecutar", help="Ejecuta los micro-benchmarks")
+    parser_ejecutar.add_argument("--salida", default=None, help="Guarda el resultado en JSON")
+    parser_ejecutar.add_argument("--filtro", default=None, help="Solo casos cuyo nombre contenga este texto")
+    parser_comparar = subparsers.add_parser("comparar", help="Compara dos resultados y marca regresiones")
+    parser_comparar.add_argument("base")
+    parser_comparar.add_argument("nuevo")
+    parser_comparar.add_argument("--umbral", type=float, default=UMBRAL_REGRESION, help="Porcentaje de empeoramiento tolerado")
+    args = parser.parse_args()
+
+    if args.comando == "ejecutar":
+        resultado = ejecutar(args.filtro)
+        if args.salida:
+            with open(args.salida, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, indent=2, ensure_ascii=False)
+            print(f"✅ Resultado guardado en {args.salida}")
+        return 0
+
+    with open(args.base, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    with open(args.nuevo, "r", encoding="utf-8") as f:
+        nuevo = json.load(f)
+    regresiones = comparar(base, nuevo, args.umbral)
+    if regresiones:
+        print(f"\n❌ {len(regresiones)} regresiones por encima del {args.umbral:.0f}%: {', '.join(regresiones)}")
+        return 1
+    print(f"\n✅ Sin regresiones por encima del {args.umbral:.0f}%")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,13 @@
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
 
+import asyncio
 import logging
 import os
 
 from app.config import settings
+from app.bitacora import configurar_logging
 from app.database import db
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.auth import router as auth_router
@@ -14,22 +16,44 @@ from app.api.paqueteturistico import router as paquetes_turisticos_router
 from app.api.reservas import router as reservas_router
 from app.api.reviews import router as reviews_router
 from app.api.favoritos import router as favoritos_router
-from app.postman_generator import router as postman_router
+from app.api.lote import router as lote_router
+from app.api.postman import router as postman_router
+from app.perfilado import MiddlewarePerfilado
+from app.metricas import MiddlewareMetricas, metricas
+from app.compresion import MiddlewareCompresion, ArchivosPrecomprimidos
+from app.imagenes import procesador_imagenes
+from app.repositories.instances import catalogo_repository
+from app.trabajos import cola_trabajos
+from app.eventos import despachador_eventos
+from app import tareas  # noqa: F401 (registra los trabajos y su programación)
 
 # Configurar logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+configurar_logging()
 
 logger = logging.getLogger(__name__)
 
+async def ejecutar_periodicamente(nombre: str, calcular, guardar, intervalo: int):
+    """Ejecuta un trabajo en lote cada `intervalo` segundos.
+
+    El cálculo lee en un hilo aparte; la escritura usa la conexión principal.
+    """
+    while True:
+        try:
+            resultado = await asyncio.to_thread(calcular)
+            guardar(resultado)
+        except Exception as e:
+            logger.error(f"Error en el trabajo periódico {nombre}: {e}")
+        await asyncio.sleep(intervalo)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Maneja el ciclo de vida de la aplicación"""
     # Startup
     logger.info("Iniciando aplicación Sistema de Paquetes Turísticos API...")
     
+    # Abrir SQLite y aplicar migraciones pendientes (no se hace al importar)
+    db.inicializar()
+    
     # Verificar conexión a SQLite
     try:
         if db.health_check():
@@ -39,10 +63,29 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error crítico al conectar con SQLite: {e}")
     
+    # Cola de trabajos: recálculos en lote periódicos (solo los encola el proceso líder)
+    await cola_trabajos.iniciar()
+    # Eventos de dominio del outbox hacia sus suscriptores
+    await despachador_eventos.iniciar()
+    
+    # El catálogo vive en la memoria de cada proceso: se refresca en todos
+    tareas_periodicas = []
+    if settings.catalogo_en_memoria and settings.catalogo_refresh_seconds > 0:
+        tareas_periodicas.append(asyncio.create_task(ejecutar_periodicamente(
+            "catalogo", catalogo_repository.calcular_catalogo,
+            catalogo_repository.guardar_catalogo, settings.catalogo_refresh_seconds
+        )))
+    
     yield
     
     # Shutdown
     logger.info("Cerrando aplicación Sistema de Paquetes Turísticos API...")
+    for tarea in tareas_periodicas:
+        tarea.cancel()
+    await despachador_eventos.detener()
+    await cola_trabajos.detener()
+    # Terminar las imágenes en proceso antes de cerrar la conexión en la que se registran
+    await procesador_imagenes.cerrar()
     db.close()
 
 
@@ -65,6 +108,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión gzip/Brotli de las respuestas grandes
+if settings.compresion_habilitada:
+    app.add_middleware(
+        MiddlewareCompresion,
+        minimo=settings.compresion_minimo,
+        nivel_gzip=settings.compresion_nivel_gzip,
+        nivel_brotli=settings.compresion_nivel_brotli
+    )
+
+# Perfilado por muestreo; sin middleware cuando está desactivado
+if settings.perfilado_muestreo > 0:
+    app.add_middleware(
+        MiddlewarePerfilado,
+        muestreo=settings.perfilado_muestreo,
+        intervalo_ms=settings.perfilado_intervalo_ms
+    )
+
+# Métricas por ruta para /metrics
+if settings.metricas_habilitadas:
+    app.add_middleware(MiddlewareMetricas)
+
 # Manejar excepciones globales
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -105,6 +169,14 @@ async def health_check():
             "error": str(e)
         }
 
+# Endpoint de métricas en formato Prometheus
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Métricas de este proceso en formato de exposición de Prometheus"""
+    if not settings.metricas_habilitadas:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(metricas.exportar(), media_type="text/plain; version=0.0.4")
+
 # Endpoint raíz
 @app.get("/")
 async def root():
@@ -126,11 +198,19 @@ app.include_router(paquetes_turisticos_router)
 app.include_router(reservas_router)
 app.include_router(reviews_router)
 app.include_router(favoritos_router, prefix="/favoritos")
+# Los endpoints de administración solo existen con ADMIN_TOKEN configurado
+if settings.admin_token:
+    from app.api.admin import router as admin_router
+    app.include_router(admin_router)
+app.include_router(lote_router)
 app.include_router(postman_router)
 
 # Crear directorio de uploads si no existe
 os.makedirs(settings.upload_dir, exist_ok=True)
 
+# Archivos subidos, con variantes precomprimidas para los tipos comprimibles
+app.mount("/uploads", ArchivosPrecomprimidos(directory=settings.upload_dir), name="uploads")
+
 if __name__ == "__main__":
     import uvicorn
     import socket
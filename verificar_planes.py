@@ -0,0 +1,203 @@
+"""Verifica con EXPLAIN QUERY PLAN que las consultas de los repositories usan índices.
+
+Crea una base de datos temporal con datos sintéticos, ejecuta los métodos de
+los repositories, captura las sentencias emitidas con el registro de
+sentencias y revisa el plan de cada una. Falla (código de salida 1) si alguna
+recorre una tabla completa o necesita un B-tree temporal para ordenar,
+salvo las excepciones documentadas en PERMITIDOS.
+
+Uso: python verificar_planes.py  (desde la raíz del proyecto)
+"""
+import asyncio
+import os
+import random
+import re
+import sys
+import tempfile
+
+os.environ["DATABASE_PATH"] = os.path.join(tempfile.mkdtemp(), "planes.sqlite")
+
+from app.database import db
+from app.sentencias import registro_sentencias
+from app.models.paqueteturistico import PaqueteTuristicoFiltros, PaqueteTuristicoUpdate
+from app.models.usuario import UsuarioUpdate
+from app.repositories.instances import (
+    usuario_repository,
+    paquete_turistico_repository,
+    reserva_repository,
+    review_repository,
+    favorito_repository,
+    ranking_repository,
+    recomendacion_repository,
+    catalogo_repository
+)
+from app.trabajos import cola_trabajos
+from app.eventos import despachador_eventos
+
+USUARIOS = 2000
+PAQUETES = 3000
+RESERVAS = 20000
+FAVORITOS = 10000
+
+TIPOS = ('aventura', 'cultural', 'gastronomico', 'playa', 'montaña', 'ciudad', 'ecoturismo', 'romantico', 'familiar', 'negocios')
+NIVELES = ('facil', 'moderado', 'dificil', 'extremo')
+PAISES = ('Peru', 'Chile', 'Mexico', 'Colombia', 'Argentina', 'España')
+
+# Planes aceptados a propósito: (prefijo del caso, fragmento del plan) -> motivo
+PERMITIDOS = {
+    ("usuarios.get_all_users", "SCAN usuarios"): "paginación sin filtro ni orden",
+    ("usuarios.search_users", "SCAN usuarios"): "LIKE con comodín inicial no puede usar índices",
+    ("reservas.get_reservas_by_operador", "USE TEMP B-TREE FOR ORDER BY"): "orden sobre la tabla unida tras filtrar por operador",
+    ("paquetes.get_facetas", "USE TEMP B-TREE FOR GROUP BY"): "agrupa por el rango de precio calculado",
+    ("paquetes.get_paquetes_by_ids", "USE TEMP B-TREE"): "IN sobre la clave primaria",
+    ("paquetes.search_paquetes_turisticos[filtros 2]", "USE TEMP B-TREE FOR ORDER BY"): "ordena las pocas filas de una ciudad, filtradas por idx_paquetes_ubicacion",
+    ("recomendaciones.get_recomendaciones_usuario", "USE TEMP B-TREE"): "agrega las coocurrencias del historial del usuario",
+    ("rankings.calcular_rankings", "SCAN"): "trabajo en lote sobre todas las filas",
+    ("rankings.calcular_rankings", "USE TEMP B-TREE"): "trabajo en lote sobre todas las filas",
+    ("recomendaciones.calcular_similares", "SCAN"): "trabajo en lote sobre todas las filas",
+    ("recomendaciones.calcular_similares", "USE TEMP B-TREE"): "trabajo en lote sobre todas las filas",
+    ("recomendaciones.calcular_coocurrencias", "SCAN"): "trabajo en lote sobre todas las filas",
+    ("recomendaciones.calcular_coocurrencias", "USE TEMP B-TREE"): "trabajo en lote sobre todas las filas",
+    ("catalogo.calcular_catalogo", "SCAN"): "construcción de la instantánea completa",
+}
+
+PROBLEMAS = (re.compile(r"^SCAN (?!.*USING (COVERING )?INDEX)"), re.compile(r"USE TEMP B-TREE"))
+
+def sembrar_datos():
+    """Inserta datos sintéticos suficientes para que el planificador elija índices"""
+    random.seed(42)
+    cursor = db.get_client().cursor()
+    cursor.executemany(
+        "INSERT INTO usuarios (email, password_hash, nombre, apellido, es_operador, es_verificado) VALUES (?, 'x', ?, ?, ?, 1)",
+        [(f"usuario{i}@ejemplo.com", f"Nombre{i}", f"Apellido{i}", int(i % 20 == 0)) for i in range(1, USUARIOS + 1)]
+    )
+    cursor.executemany(
+        """INSERT INTO paquetes_turisticos (operador_id, titulo, descripcion, tipo_paquete, duracion_dias,
+           capacidad_maxima, nivel_dificultad, precio_por_persona, pais_destino, ciudad_destino, punto_encuentro,
+           incluye_guia, esta_activo, fecha_creacion)
+           VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'Plaza', ?, ?, datetime('now', ?))""",
+        [
+            (20 * random.randint(1, USUARIOS // 20), f"Paquete {i}", "descripcion de prueba",
+             random.choice(TIPOS), random.randint(1, 15), random.randint(2, 40), random.choice(NIVELES),
+             random.randint(50, 3000), random.choice(PAISES), f"Ciudad {random.randint(1, 60)}",
+             random.randint(0, 1), int(random.random() > 0.1), f"-{random.randint(0, 720)} days")
+            for i in range(1, PAQUETES + 1)
+        ]
+    )
+    cursor.executemany(
+        "INSERT INTO imagenes_paquetes (paquete_id, url_imagen, es_principal, orden) VALUES (?, ?, ?, ?)",
+        [(p, f"img{p}-{o}", int(o == 0), o) for p in range(1, PAQUETES + 1) for o in range(3)]
+    )
+    cursor.executemany(
+        """INSERT INTO reservas (paquete_id, turista_id, fecha_inicio, fecha_fin, numero_personas, numero_adultos,
+           precio_total, precio_por_persona, estado, fecha_creacion)
+           VALUES (?, ?, '2026-01-01', '2026-01-05', 2, 2, 200, 100, ?, datetime('now', ?))""",
+        [
+            (random.randint(1, PAQUETES), random.randint(1, USUARIOS),
+             random.choice(('pendiente', 'confirmada', 'cancelada', 'completada')), f"-{random.randint(0, 365)} days")
+            for _ in range(RESERVAS)
+        ]
+    )
+    cursor.executemany(
+        "INSERT INTO reviews (reserva_id, autor_id, paquete_id, calificacion, comentario) SELECT id, turista_id, paquete_id, ?, 'Comentario' FROM reservas WHERE id = ?",
+        [(random.randint(1, 5), r) for r in range(1, RESERVAS + 1, 4)]
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO favoritos (usuario_id, paquete_id, fecha_agregado) VALUES (?, ?, datetime('now', ?))",
+        [(random.randint(1, USUARIOS), random.randint(1, PAQUETES), f"-{random.randint(0, 365)} days") for _ in range(FAVORITOS)]
+    )
+    # Trabajos terminados y algunos pendientes, para que _reclamar llegue al UPDATE
+    cursor.executemany(
+        """INSERT INTO trabajos (tipo, estado, max_intentos, ejecutar_despues, creado, actualizado)
+           VALUES ('prueba', ?, 5, strftime('%s', 'now') - ?, 0, strftime('%s', 'now') - ?)""",
+        [
+            ('pendiente' if i % 100 == 0 else random.choice(('completado', 'fallido')), random.randint(-60, 60), i)
+            for i in range(2000)
+        ]
+    )
+    db.get_client().commit()
+    # Estadísticas para que el planificador se comporte como en producción
+    db.get_client().execute("ANALYZE")
+
+def casos():
+    """Métodos de los repositories a verificar: (nombre, llamada)"""
+    filtros = [
+        PaqueteTuristicoFiltros(),
+        PaqueteTuristicoFiltros(tipo_paquete="playa", precio_max=500),
+        PaqueteTuristicoFiltros(pais_destino="Peru", ciudad_destino="Ciudad 3", incluye_guia=True),
+        PaqueteTuristicoFiltros(nivel_dificultad="moderado"),
+        PaqueteTuristicoFiltros(pais_destino="Chile", duracion_max=7),
+    ]
+    lista = [
+        ("usuarios.get_user_by_id", lambda: usuario_repository.get_user_by_id("20")),
+        ("usuarios.get_user_by_email", lambda: usuario_repository.get_user_by_email("usuario20@ejemplo.com")),
+        ("usuarios.get_all_users", lambda: usuario_repository.get_all_users(0, 50)),
+        ("usuarios.search_users", lambda: usuario_repository.search_users("Nombre1", 0, 20)),
+        ("usuarios.update_user", lambda: usuario_repository.update_user("20", UsuarioUpdate(telefono="123"))),
+        ("paquetes.get_paquete_by_id", lambda: paquete_turistico_repository.get_paquete_by_id(1, 20)),
+        ("paquetes.get_paquetes_by_operador", lambda: paquete_turistico_repository.get_paquetes_by_operador(20, 0, 20)),
+        ("paquetes.get_paquetes_similares", lambda: paquete_turistico_repository.get_paquetes_similares(1, 10)),
+        ("paquetes.get_paquetes_by_ids", lambda: paquete_turistico_repository.get_paquetes_by_ids([3, 1, 2])),
+        ("paquetes.get_tarjetas", lambda: paquete_turistico_repository.get_tarjetas(0, 50)),
+        ("paquetes.update_paquete", lambda: paquete_turistico_repository.update_paquete(1, PaqueteTuristicoUpdate(titulo="Nuevo"))),
+        ("reservas.get_reserva_by_id", lambda: reserva_repository.get_reserva_by_id("1", "1")),
+        ("reservas.get_reservas_by_user", lambda: reserva_repository.get_reservas_by_user("20", 0, 20)),
+        ("reservas.get_reservas_by_operador", lambda: reserva_repository.get_reservas_by_operador("20", 0, 20)),
+        ("reviews.get_reviews_by_autor", lambda: review_repository.get_reviews_by_autor(20, 0, 20)),
+        ("reviews.get_reviews_by_paquete", lambda: review_repository.get_reviews_by_paquete(1, 0, 20)),
+        ("reviews.get_review_summary", lambda: review_repository.get_review_summary(1)),
+        ("favoritos.get_favoritos_by_user", lambda: favorito_repository.get_favoritos_by_user(20, 0, 20)),
+        ("favoritos.is_favorite", lambda: favorito_repository.is_favorite(1, 20)),
+        ("recomendaciones.get_recomendaciones_usuario", lambda: recomendacion_repository.get_recomendaciones_usuario(20, 10)),
+        ("recomendaciones.get_historial_usuario", lambda: recomendacion_repository.get_historial_usuario(20)),
+        ("rankings.calcular_rankings", ranking_repository.calcular_rankings),
+        ("recomendaciones.calcular_similares", recomendacion_repository.calcular_similares),
+        ("recomendaciones.calcular_coocurrencias", recomendacion_repository.calcular_coocurrencias),
+        ("catalogo.calcular_catalogo", catalogo_repository.calcular_catalogo),
+        ("trabajos._reclamar", cola_trabajos._reclamar),
+        ("trabajos._liberar_vencidos", cola_trabajos._liberar_vencidos),
+        ("trabajos.purgar", lambda: cola_trabajos.purgar(7)),
+        ("eventos._leer", lambda: despachador_eventos._leer(0, 500)),
+        ("eventos.purgar", lambda: despachador_eventos.purgar(7)),
+    ]
+    for sort in ("recent", "price", "popular", "rating"):
+        lista.append((f"paquetes.get_all_paquetes[{sort}]", lambda sort=sort: paquete_turistico_repository.get_all_paquetes(0, 20, 20, sort)))
+    for i, filtro in enumerate(filtros):
+        nombre = f"filtros {i}" if i else "sin filtros"
+        lista.append((f"paquetes.search_paquetes_turisticos[{nombre}]", lambda filtro=filtro: paquete_turistico_repository.search_paquetes_turisticos(filtro, 0, 20)))
+        lista.append(("paquetes.get_facetas", lambda filtro=filtro: paquete_turistico_repository.get_facetas(filtro)))
+    return lista
+
+def plan(sql: str) -> list:
+    """Detalle de EXPLAIN QUERY PLAN con parámetros de ejemplo"""
+    cursor = db.get_client().cursor()
+    cursor.execute(f"EXPLAIN QUERY PLAN {sql}", [1] * sql.count("?"))
+    return [row["detail"] for row in cursor.fetchall()]
+
+def permitido(caso: str, detalle: str) -> bool:
+    return any(caso.startswith(prefijo) and fragmento in detalle for prefijo, fragmento in PERMITIDOS)
+
+def main() -> int:
+    db.inicializar()
+    sembrar_datos()
+    fallos = 0
+    for caso, llamada in casos():
+        registro_sentencias.reiniciar()
+        resultado = llamada()
+        if asyncio.iscoroutine(resultado):
+            asyncio.run(resultado)
+        for sql in registro_sentencias.sentencias():
+            if not re.match(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", sql, re.IGNORECASE):
+                continue
+            for detalle in plan(sql):
+                if any(p.search(detalle) for p in PROBLEMAS) and not permitido(caso, detalle):
+                    fallos += 1
+                    print(f"❌ {caso}: {detalle}\n   {' '.join(sql.split())}")
+    if fallos:
+        print(f"\n{fallos} planes sin índice adecuado")
+        return 1
+    print("✅ Todas las consultas usan índices")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())